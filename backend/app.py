@@ -1,25 +1,46 @@
-from flask import Flask, request, jsonify, send_file, send_from_directory
+from flask import Flask, request, jsonify, send_file, send_from_directory, Response, stream_with_context
 from flask_cors import CORS
+from flask_migrate import Migrate
 import os
 from dotenv import load_dotenv
 load_dotenv()
-from services.ocr_service import extract_text_from_pdf
+from services.ocr_service import extract_text_from_pdf, classify_upload, ocr_available, OCR_DOC_TYPES, OCR_UNAVAILABLE_ERROR, UnreadablePDF
 from services.llm_service import extract_data_with_llm, generate_booking_email, generate_exception_email, generate_negotiation_email
+from services.llm_service import stream_booking_email, stream_exception_email, stream_negotiation_email
 from services.coordinator_agent import process_quote_fully
+from services.ingestion_service import extract_quote, record_usage, save_extracted_quote
+from services.extraction_cache import get_cache_stats
+from services.template_parser import get_fast_path_stats
+from services.llm_clients import get_client_stats
+from services.llm_metrics import get_llm_usage, export_llm_usage_csv
+from services.draft_cache import get_draft_cache_stats
+from services.surcharge_cache import invalidate_surcharge_cache, preload_surcharge_cache
+from services.upload_service import stream_to_disk, discard_upload, UploadTooLarge
+from services.llm_resilience import request_deadline
+from services.job_queue import enqueue_extraction_job, get_job, start_extraction_workers, workers_running, TERMINAL_STATUSES, EVENTS_MAX_SECONDS, EVENTS_POLL_SECONDS
+from services.batch_ingestion import stage_batch_files, discard_staged, create_batch, get_batch, start_batch, BATCH_MAX_REQUEST_BYTES
 from services.simulation_service import SimulationService
 # from services.pdf_service import generate_booking_pdf
-from services.risk_service import analyze_risk
+from services.risk_service import analyze_risk, get_cascade_stats
 from services.email_service import send_email
 from services.analytics_service import get_kpi_dashboard, get_analytics_trends
 # from services.negotiation_agent import get_negotiation_response
 from services.telematics_service import get_shipment_telemetry
-from services.customs_service import classify_hs_code, estimate_duties, generate_customs_docs
+from services.customs_service import classify_hs_code, classify_hs_codes_bulk, estimate_duties, generate_customs_docs, MAX_BULK_ITEMS
+from services.hs_cache import lookup_classification, get_hs_cache_stats
+from services.schema import MIGRATIONS_DIR, schema_is_current, upgrade_schema
+from services.pagination import paginate, InvalidPageRequest
+from services.provisioning_service import ensure_provisioned, provision_organization, get_provisioning_stats
 # from services.claims_service import analyze_damage_photo, file_claim
 # from services.messaging_service import create_thread, send_message, get_threads, get_messages, generate_ai_quick_replies
 
+import json
+import time
 import secrets
 from werkzeug.utils import secure_filename
 from models import Carrier, Quote, ExchangeRate, db, AuditLog, UsageMeter, Feedback, Comment, Invoice, Tender, Bid, SKU, InventoryImpact, SurchargeReference
+from sqlalchemy import func
+from sqlalchemy.orm import defer, joinedload
 
 import stripe
 from datetime import datetime
@@ -28,21 +49,6 @@ from datetime import datetime
 stripe.api_key = os.getenv("STRIPE_SECRET_KEY")
 FRONTEND_URL = os.getenv("FRONTEND_URL", "http://localhost:3000")
 
-# Enable CORS for all routes
-CORS(app, resources={
-    r"/api/*": {
-        "origins": [
-            "http://localhost:3000",
-            "https://logimatch-app.vercel.app",
-            "https://www.logimatch.online",
-            "https://logimatch.online",
-            "https://logimatch-ai-1.onrender.com"
-        ],
-        "methods": ["GET", "POST", "PUT", "DELETE", "OPTIONS"],
-        "allow_headers": ["Content-Type", "Authorization", "X-Organization-ID"],
-        "supports_credentials": True
-    }
-})
 def log_audit(action, details=None, category="GENERAL", user_id=None):
     try:
         org_id = get_org_id()
@@ -52,122 +58,25 @@ def log_audit(action, details=None, category="GENERAL", user_id=None):
     except Exception as e:
         print(f"Failed to log audit: {e}")
 
-def seed_organization_data(org_id):
-    """Clones demo data to a new organization context to prevent empty states."""
-    if not org_id or org_id == 'org_demo_123':
-        return
-    
-    # Check if already seeded by looking for any carriers
-    if Carrier.query.filter_by(organization_id=org_id).first():
-        return
-        
-    print(f"Seeding demo data for new organization: {org_id}")
-    
-    try:
-        # 1. Clone Carriers (appending org_id to name to satisfy unique constraint)
-        demo_carriers = Carrier.query.filter_by(organization_id='org_demo_123').all()
-        carrier_map = {} 
-        for c in demo_carriers:
-            safe_name = f"{c.name} ({org_id[-6:]})"
-            # Ensure we don't duplicate if it somehow exists
-            existing = Carrier.query.filter_by(name=safe_name).first()
-            if existing:
-                carrier_map[c.id] = existing.id
-                continue
-                
-            new_c = Carrier(
-                name=safe_name,
-                reliability_score=c.reliability_score,
-                contact_info=c.contact_info,
-                organization_id=org_id,
-                is_verified=c.is_verified,
-                tax_id=c.tax_id,
-                compliance_score=c.compliance_score,
-                onboarding_status=c.onboarding_status
-            )
-            db.session.add(new_c)
-            db.session.flush() 
-            carrier_map[c.id] = new_c.id
-            
-        # 2. Clone Quotes
-        demo_quotes = Quote.query.filter_by(organization_id='org_demo_123').all()
-        quote_map = {}
-        for q in demo_quotes:
-            new_q = Quote(
-                filename=q.filename,
-                organization_id=org_id,
-                carrier_id=carrier_map.get(q.carrier_id),
-                origin=q.origin,
-                destination=q.destination,
-                currency=q.currency,
-                total_price=q.total_price,
-                normalized_total_price_usd=q.normalized_total_price_usd,
-                surcharges=q.surcharges,
-                risk_flags=q.risk_flags,
-                full_text_content=q.full_text_content,
-                po_number=q.po_number,
-                status=q.status,
-                allocation_date=q.allocation_date,
-                time_to_value_seconds=q.time_to_value_seconds,
-                booking_ref=q.booking_ref,
-                agent_insights=q.agent_insights,
-                is_audited=q.is_audited,
-                audited_by=q.audited_by,
-                carbon_footprint_kg=q.carbon_footprint_kg,
-                transit_time_days=q.transit_time_days,
-                confidence_score=q.confidence_score,
-                estimated_duties=q.estimated_duties,
-                estimated_taxes=q.estimated_taxes,
-                pdf_path=q.pdf_path
-            )
-            db.session.add(new_q)
-            db.session.flush()
-            quote_map[q.id] = new_q.id
-            
-        # 3. Clone Invoices
-        demo_invoices = Invoice.query.filter_by(organization_id='org_demo_123').all()
-        for i in demo_invoices:
-            new_i = Invoice(
-                filename=i.filename,
-                invoice_date=i.invoice_date,
-                organization_id=org_id,
-                invoice_number=i.invoice_number,
-                quote_id=quote_map.get(i.quote_id),
-                total_amount=i.total_amount,
-                normalized_total_amount_usd=i.normalized_total_amount_usd,
-                currency=i.currency,
-                status=i.status,
-                discrepancy_details=i.discrepancy_details
-            )
-            db.session.add(new_i)
-            
-        # 4. Clone Tenders
-        demo_tenders = Tender.query.filter_by(organization_id='org_demo_123').all()
-        for t in demo_tenders:
-            new_t = Tender(
-                title=t.title,
-                description=t.description,
-                organization_id=org_id,
-                created_at=t.created_at,
-                deadline=t.deadline,
-                status=t.status,
-                estimated_volume=t.estimated_volume,
-                lane_info=t.lane_info
-            )
-            db.session.add(new_t)
-            
-        db.session.commit()
-    except Exception as e:
-        db.session.rollback()
-        print(f"Error seeding data for {org_id}: {e}")
-
 def get_org_id():
     """Helper to extract organization_id from headers and ensure seeding."""
     org_id = request.headers.get('X-Organization-ID', 'org_demo_123')
     if org_id != 'org_demo_123':
-        seed_organization_data(org_id)
+        # A set lookup once the org is provisioned; seeds demo data the first time a new org is seen
+        ensure_provisioned(org_id)
     return org_id
 
+def paged_json(items, next_cursor):
+    """JSON list of one page; X-Next-Cursor carries the cursor for the next page, if there is one."""
+    response = jsonify(items)
+    if next_cursor:
+        response.headers['X-Next-Cursor'] = next_cursor
+    return response
+
+def wants_regenerate(data=None):
+    """True when the client asked to bypass the draft cache (?regenerate=1 or "regenerate": true in the body)."""
+    return request.args.get('regenerate') in ('1', 'true') or bool((data or {}).get('regenerate'))
+
 # Load environment variables
 load_dotenv()
 
@@ -178,7 +87,9 @@ CORS(app, resources={r"/api/*": {
         "http://localhost:3000", 
         "http://localhost:3001", 
         "https://logimatch-app.vercel.app",
-        "https://www.logimatch.online"
+        "https://www.logimatch.online",
+        "https://logimatch.online",
+        "https://logimatch-ai-1.onrender.com"
     ],
     "methods": ["GET", "POST", "PUT", "DELETE", "OPTIONS"],
     "allow_headers": ["Content-Type", "Authorization", "X-Organization-ID"],
@@ -194,16 +105,34 @@ app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {
 }
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
 app.config['UPLOAD_FOLDER'] = os.path.join(os.getcwd(), 'uploads')
+# Per-request body limit; individual files are additionally capped at MAX_UPLOAD_MB while streaming
+app.config['MAX_CONTENT_LENGTH'] = int(float(os.getenv("MAX_REQUEST_MB", 40)) * 1024 * 1024)
 
 # Ensure upload folder exists
 if not os.path.exists(app.config['UPLOAD_FOLDER']):
     os.makedirs(app.config['UPLOAD_FOLDER'])
 
 db.init_app(app)
+# Tables and indexes come from migrations/ (`flask db upgrade`, the Procfile release step), not create_all()
+migrate = Migrate(app, db, directory=MIGRATIONS_DIR, render_as_batch=True)
 
-# Create tables on startup (for MVP simplicity)
-with app.app_context():
-    db.create_all()
+def start_background_services(workers=None):
+    """
+    Starts this process's background threads. Called only from entry points that serve traffic or jobs:
+    gunicorn's post_worker_init hook (gunicorn.conf.py), worker.py and `python app.py`. Never on import,
+    since `flask db upgrade` and the spawned PDF extraction processes import this module too.
+    Returns the extraction worker pool, or None when the schema is behind or workers are disabled.
+    """
+    if not schema_is_current(app):
+        return None
+    # Background ingestion workers for async /api/extract jobs and upload batches, including those interrupted
+    # when a process last stopped (EXTRACTION_WORKERS=0 to run them via worker.py instead)
+    pool = start_extraction_workers(app, size=workers)
+    # Parse the baseline surcharge dictionary once and warm the default org
+    preload_surcharge_cache(app)
+    # Logs once if Tesseract is missing; scanned uploads are then refused with a 422
+    ocr_available()
+    return pool
 
 @app.route('/api/audit-logs', methods=['GET'])
 def get_audit_logs():
@@ -214,8 +143,10 @@ def get_audit_logs():
         if category:
             query = query.filter_by(category=category)
         
-        logs = query.order_by(AuditLog.timestamp.desc()).limit(100).all()
-        return jsonify([l.to_dict() for l in logs])
+        logs, next_cursor = paginate(query, [(AuditLog.timestamp, True), (AuditLog.id, True)], request.args, default_limit=100)
+        return paged_json([l.to_dict() for l in logs], next_cursor)
+    except InvalidPageRequest as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         print(f"Error fetching audit logs: {e}")
         return jsonify({"error": str(e)}), 500
@@ -334,21 +265,27 @@ def stripe_webhook():
 def handle_surcharges():
     try:
         if request.method == 'GET':
-            surcharges = SurchargeReference.query.all()
-            return jsonify([s.to_dict() for s in surcharges])
+            surcharges, next_cursor = paginate(SurchargeReference.query, [(SurchargeReference.id, False)], request.args)
+            return paged_json([s.to_dict() for s in surcharges], next_cursor)
         
         if request.method == 'POST':
             data = request.json
+            org_id = get_org_id()
             new_surcharge = SurchargeReference(
                 raw_name=data.get('raw_name'),
                 normalized_name=data.get('normalized_name'),
                 category=data.get('category'),
-                is_approved=data.get('is_approved', True)
+                is_approved=data.get('is_approved', True),
+                organization_id=org_id
             )
             db.session.add(new_surcharge)
             db.session.commit()
+            # Next extraction for this org rebuilds its dictionary and prompt fragment
+            invalidate_surcharge_cache(org_id)
             log_audit("SURCHARGE_UPDATED", f"Added/Updated: {new_surcharge.raw_name}", category="SYSTEM")
             return jsonify(new_surcharge.to_dict()), 201
+    except InvalidPageRequest as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         print(f"Error in surcharges: {e}")
         return jsonify({"error": str(e)}), 500
@@ -358,8 +295,8 @@ def handle_surcharges():
 def handle_rates():
     try:
         if request.method == 'GET':
-            rates = ExchangeRate.query.all()
-            return jsonify([r.to_dict() for r in rates])
+            rates, next_cursor = paginate(ExchangeRate.query, [(ExchangeRate.currency_code, False)], request.args)
+            return paged_json([r.to_dict() for r in rates], next_cursor)
         
         if request.method == 'POST':
             data = request.json
@@ -378,6 +315,8 @@ def handle_rates():
             
             db.session.commit()
             return jsonify(rate.to_dict()), 201
+    except InvalidPageRequest as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         print(f"Error in rates: {e}")
         return jsonify({"error": str(e)}), 500
@@ -626,13 +565,41 @@ def generate_email():
         return jsonify({"error": "No data provided"}), 400
     
     try:
-        email_content = generate_booking_email(data)
+        email_content = generate_booking_email(data, get_org_id(), regenerate=wants_regenerate(data))
         log_audit("BOOKING_DRAFTED", f"For Carrier: {data.get('carrier')}", category="QUOTE")
         return jsonify(email_content)
     except Exception as e:
         print(f"Error generating email: {e}")
         return jsonify({"error": str(e)}), 500
 
+def stream_draft_events(events, on_draft):
+    """
+    SSE response for a streamed draft: "token" events carry {"text"} as the LLM produces it, then a
+    single "draft" event with the same payload the blocking endpoint returns (built by on_draft).
+    """
+    def generate():
+        for kind, value in events:
+            if kind == "token":
+                yield f"event: token\ndata: {json.dumps({'text': value})}\n\n"
+            else:
+                yield f"event: draft\ndata: {json.dumps(on_draft(value))}\n\n"
+
+    return Response(stream_with_context(generate()), mimetype='text/event-stream',
+                    headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+@app.route('/api/generate-email/stream', methods=['POST'])
+def generate_email_stream():
+    """Streaming /api/generate-email: tokens over SSE, then the final {subject, body}."""
+    data = request.json
+    if not data:
+        return jsonify({"error": "No data provided"}), 400
+
+    def on_draft(email_content):
+        log_audit("BOOKING_DRAFTED", f"For Carrier: {data.get('carrier')}", category="QUOTE")
+        return email_content
+
+    return stream_draft_events(stream_booking_email(data, get_org_id(), regenerate=wants_regenerate(data)), on_draft)
+
 @app.route('/api/extract', methods=['POST'])
 def extract_pdf():
     org_id = get_org_id()
@@ -644,74 +611,58 @@ def extract_pdf():
         return jsonify({"error": "No selected file"}), 400
 
     if file:
+        # 1. Save and OCR
+        filename = secure_filename(file.filename)
+        unique_filename = f"{secrets.token_hex(4)}_{filename}"
+        pdf_path = os.path.join(app.config['UPLOAD_FOLDER'], unique_filename)
+        # The stored file is kept only once a queued job or a saved quote points at it
+        keep_file = False
         try:
-            # 1. Save and OCR
-            filename = secure_filename(file.filename)
-            unique_filename = f"{secrets.token_hex(4)}_{filename}"
-            pdf_path = os.path.join(app.config['UPLOAD_FOLDER'], unique_filename)
-            
-            # Use original bytes for extraction then save
-            pdf_bytes = file.read()
-            with open(pdf_path, 'wb') as f:
-                f.write(pdf_bytes)
-
-            text = extract_text_from_pdf(pdf_bytes)
-            
-            if not text:
-                 return jsonify({"error": "Failed to extract text from PDF"}), 500
-
-            # Increment Usage Meter
-            user_id = request.form.get('user_id') or 'PilotUser_01'
-            usage = UsageMeter.query.filter_by(user_id=user_id).first()
-            if not usage:
-                usage = UsageMeter(user_id=user_id, quotes_processed=1)
-                db.session.add(usage)
-            else:
-                usage.quotes_processed += 1
-                usage.last_processed_at = datetime.utcnow()
-            
-            # 2. Multi-Agent Audit (Replaces linear LLM + Risk)
-            extracted_data = process_quote_fully(text)
+            # Stream to disk in chunks, hashing as we go (bounded memory for large uploads)
+            content_hash, _ = stream_to_disk(file.stream, pdf_path)
+
+            # Reject what no worker could read: not a PDF, or a pure scan without Tesseract
+            doc_type = classify_upload(pdf_path)
+            if doc_type == "scanned" and not ocr_available():
+                return jsonify({"error": OCR_UNAVAILABLE_ERROR}), 422
+
+            # Job mode: hand off to the ingestion workers and return immediately.
+            # Documents needing OCR always go this way: it can take up to OCR_TIMEOUT_SECONDS, too long to hold a request
+            mode = request.args.get('mode') or request.form.get('mode')
+            if mode == 'async' or (doc_type in OCR_DOC_TYPES and ocr_available()):
+                job = enqueue_extraction_job(org_id, request.form.get('user_id'), file.filename, unique_filename, content_hash=content_hash)
+                keep_file = True
+                log_audit("QUOTE_UPLOAD_QUEUED", f"Queued {file.filename} (Job {job.id})", category="QUOTE", user_id=job.user_id)
+                return jsonify({
+                    "job_id": job.id,
+                    "status": job.status,
+                    "mode": "async",
+                    "poll_url": f"/api/extract/jobs/{job.id}",
+                    "events_url": f"/api/extract/jobs/{job.id}/events"
+                }), 202
+
+            # 2. OCR + Multi-Agent Audit (byte-identical re-uploads are served from the extraction cache).
+            # The extraction and risk-agent LLM calls share one budget so the request fits gunicorn's timeout
+            with request_deadline():
+                text, extracted_data, cache_hit = extract_quote(pdf_path, org_id, content_hash=content_hash)
             
             if "error" in extracted_data:
                 return jsonify({"error": extracted_data["error"]}), 500
+
+            # Increment Usage Meter
+            record_usage(request.form.get('user_id'))
             
-            risk_flags = extracted_data.get('risk_flags', [])
-            agent_insights = extracted_data.get('agent_insights', [])
-            
-            # ... Save to DB ...
+            # 3. Save to DB
             carrier_name = extracted_data.get('carrier', 'Unknown')
-            # ... carrier creation logic ...
-            carrier = Carrier.query.filter_by(name=carrier_name, organization_id=org_id).first()
-            if not carrier:
-                carrier = Carrier(name=carrier_name, organization_id=org_id)
-                db.session.add(carrier)
-                db.session.commit()
-            
             user_id = request.form.get('user_id') # Get Clerk ID from frontend
-            
-            new_quote = Quote(
-                filename=file.filename,
+            new_quote = save_extracted_quote(
+                extracted_data, text,
                 organization_id=org_id,
                 user_id=user_id,
-                carrier=carrier,
-                origin=extracted_data.get('origin'),
-                destination=extracted_data.get('destination'),
-                total_price=extracted_data.get('total_price'),
-                currency=extracted_data.get('currency'),
-                normalized_total_price_usd=extracted_data.get('normalized_total_price_usd'),
-                surcharges=extracted_data.get('surcharges'), # Store list
-                risk_flags=risk_flags,
-                agent_insights=agent_insights, # New field
-                carbon_footprint_kg=extracted_data.get('carbon_footprint_kg'),
-                confidence_score=extracted_data.get('confidence_score', 1.0),
-                pdf_path=unique_filename,
-                transit_time_days=extracted_data.get('transit_time_days', 14), # Default for demo
-                status='DRAFT',
-                full_text_content=text
+                filename=file.filename,
+                pdf_path=unique_filename
             )
-            db.session.add(new_quote)
-            db.session.commit()
+            keep_file = True
             
             log_audit("QUOTE_UPLOAD", f"Processed {file.filename} ({carrier_name})", category="QUOTE", user_id=user_id)
 
@@ -720,11 +671,112 @@ def extract_pdf():
 
             return jsonify({
                 "text_preview": text[:500] + "..." if len(text) > 500 else text,
-                "data": response_data
+                "data": response_data,
+                "cache_hit": cache_hit
             })
+        except UploadTooLarge as e:
+            return jsonify({"error": str(e)}), 413
+        except UnreadablePDF as e:
+            return jsonify({"error": str(e)}), 400
         except Exception as e:
             print(f"Error extracting PDF: {e}")
             return jsonify({"error": str(e)}), 500
+        finally:
+            if not keep_file:
+                discard_upload(pdf_path)
+
+@app.route('/api/extract/batch', methods=['POST'])
+def extract_pdf_batch():
+    """
+    Bulk ingestion: accepts many PDFs under `files` and/or ZIP archives of PDFs.
+    Files are staged to disk and processed in the background; poll the batch for progress.
+    """
+    org_id = get_org_id()
+    # Batches are far larger than single uploads; raise the body cap for this request only
+    request.max_content_length = BATCH_MAX_REQUEST_BYTES
+    files = [f for key in ('files', 'archive', 'file') for f in request.files.getlist(key) if f.filename]
+    if not files:
+        return jsonify({"error": "No files uploaded"}), 400
+
+    try:
+        user_id = request.form.get('user_id')
+        staged, rejected = stage_batch_files(files, app.config['UPLOAD_FOLDER'])
+        if not staged:
+            return jsonify({"error": "No PDFs found in upload", "rejected": rejected}), 400
+
+        try:
+            batch = create_batch(org_id, user_id, staged)
+        except Exception:
+            db.session.rollback()
+            discard_staged(staged, app.config['UPLOAD_FOLDER'])
+            raise
+        # Otherwise a worker process's pool picks the batch up within BATCH_POLL_SECONDS
+        if workers_running():
+            start_batch(app, batch.id)
+        log_audit("QUOTE_BATCH_QUEUED", f"Queued {len(staged)} files (Batch {batch.id})", category="QUOTE", user_id=user_id)
+        return jsonify({
+            "batch_id": batch.id,
+            "status": batch.status,
+            "total": len(staged),
+            "rejected": rejected,
+            "poll_url": f"/api/extract/batch/{batch.id}"
+        }), 202
+    except Exception as e:
+        print(f"Error queuing batch: {e}")
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/api/extract/batch/<batch_id>', methods=['GET'])
+def get_extraction_batch(batch_id):
+    """Progress and per-file results for a bulk upload."""
+    org_id = get_org_id()
+    batch, jobs = get_batch(batch_id, organization_id=org_id)
+    if not batch:
+        return jsonify({"error": "Batch not found"}), 404
+    return jsonify(batch.to_dict(jobs))
+
+@app.route('/api/extract/jobs/<job_id>', methods=['GET'])
+def get_extraction_job(job_id):
+    """Polling endpoint for async extraction jobs."""
+    org_id = get_org_id()
+    job = get_job(job_id, organization_id=org_id)
+    if not job:
+        return jsonify({"error": "Job not found"}), 404
+    return jsonify(job.to_dict())
+
+@app.route('/api/extract/jobs/<job_id>/events', methods=['GET'])
+def stream_extraction_job(job_id):
+    """
+    Server-Sent Events feed for an extraction job.
+    Emits the job whenever its status/stage changes and closes once it is terminal. The stream is capped at
+    EVENTS_MAX_SECONDS because it holds a web thread: it then sends "timeout" and the client re-subscribes
+    (EventSource does so on its own) or polls /api/extract/jobs/<id>. A job that disappears ends the stream with "gone".
+    """
+    org_id = get_org_id()
+    if not get_job(job_id, organization_id=org_id):
+        return jsonify({"error": "Job not found"}), 404
+
+    def generate():
+        yield f"retry: {int(EVENTS_POLL_SECONDS * 1000)}\n\n"
+        last_state = None
+        deadline = time.time() + EVENTS_MAX_SECONDS
+        while True:
+            job = get_job(job_id, organization_id=org_id)
+            if job is None:
+                yield f"event: gone\ndata: {json.dumps({'job_id': job_id, 'error': 'Job not found'})}\n\n"
+                return
+            state = (job.status, job.stage, job.attempts)
+            if state != last_state:
+                last_state = state
+                yield f"event: job\ndata: {json.dumps(job.to_dict())}\n\n"
+            if job.status in TERMINAL_STATUSES:
+                return
+            if time.time() >= deadline:
+                break
+            time.sleep(EVENTS_POLL_SECONDS)
+        yield f"event: timeout\ndata: {json.dumps({'job_id': job_id, 'poll_url': f'/api/extract/jobs/{job_id}'})}\n\n"
+
+    return Response(stream_with_context(generate()), mimetype='text/event-stream',
+                    headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
 
 @app.route('/api/quotes/<int:quote_id>/simulate', methods=['POST'])
 def simulate_landed_cost(quote_id):
@@ -968,7 +1020,7 @@ def report_exception():
         
     try:
         # Real AI Drafting
-        email_content = generate_exception_email(po_number, reason)
+        email_content = generate_exception_email(po_number, reason, get_org_id(), regenerate=wants_regenerate(data))
         
         # Log the "Agent Action"
         log_audit("AGENT_EXCEPTION_HANDLING", f"Drafted email for {po_number}: {reason}", category="QUOTE")
@@ -984,6 +1036,28 @@ def report_exception():
         print(f"Error reporting exception: {e}")
         return jsonify({"error": str(e)}), 500
 
+@app.route('/api/shipments/exception/stream', methods=['POST'])
+def report_exception_stream():
+    """Streaming /api/shipments/exception: tokens over SSE, then the usual exception payload."""
+    data = request.json
+    po_number = data.get('po_number')
+    reason = data.get('reason', 'Unspecified Delay')
+
+    if not po_number:
+        return jsonify({"error": "PO Number required"}), 400
+
+    def on_draft(email_content):
+        log_audit("AGENT_EXCEPTION_HANDLING", f"Drafted email for {po_number}: {reason}", category="QUOTE")
+        return {
+            "po_number": po_number,
+            "reason": reason,
+            "action": "Email Drafted",
+            "draft_subject": email_content.get('subject', 'Urgent Update'),
+            "draft_body": email_content.get('body', 'Content generation failed.')
+        }
+
+    return stream_draft_events(stream_exception_email(po_number, reason, get_org_id(), regenerate=wants_regenerate(data)), on_draft)
+
 @app.route('/api/email/send', methods=['POST'])
 def send_email_endpoint():
     data = request.json
@@ -1005,6 +1079,63 @@ def send_email_endpoint():
         print(f"Error sending email: {e}")
         return jsonify({"error": str(e)}), 500
 
+@app.route('/api/admin/extraction-cache', methods=['GET'])
+def get_extraction_cache_stats():
+    """Hit/miss counters and size of the content-addressed extraction cache."""
+    try:
+        scope = request.args.get('scope')
+        org_id = None if scope == 'global' else get_org_id()
+        return jsonify(get_cache_stats(org_id))
+    except Exception as e:
+        print(f"Extraction cache stats error: {e}")
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/api/admin/extraction-paths', methods=['GET'])
+def get_extraction_path_stats():
+    """Template fast-path hit rate and template vs LLM extraction latency."""
+    return jsonify(get_fast_path_stats())
+
+@app.route('/api/admin/llm-clients', methods=['GET'])
+def get_llm_client_stats():
+    """Shared LLM connection pool: reuse ratio and HTTP call latency."""
+    return jsonify(get_client_stats())
+
+@app.route('/api/admin/llm-usage', methods=['GET'])
+def get_llm_usage_stats():
+    """LLM latency histograms and token counts per call site; ?format=csv exports per org and call site."""
+    org_id = None if request.args.get('scope') == 'global' else get_org_id()
+    if request.args.get('format') == 'csv':
+        return Response(export_llm_usage_csv(org_id), mimetype='text/csv',
+                        headers={"Content-Disposition": "attachment; filename=llm_usage.csv"})
+    return jsonify(get_llm_usage(org_id))
+
+@app.route('/api/admin/draft-cache', methods=['GET'])
+def get_draft_cache_admin_stats():
+    """Hit rate of the generated email/negotiation draft cache."""
+    return jsonify(get_draft_cache_stats())
+
+@app.route('/api/admin/hs-classifications', methods=['GET'])
+def get_hs_classification_stats():
+    """Hit rate and size of the HS classification cache."""
+    return jsonify(get_hs_cache_stats())
+
+@app.route('/api/admin/provisioning', methods=['GET'])
+def get_provisioning_status():
+    """Organizations provisioned in this worker and how many were seeded or failed since start-up."""
+    return jsonify(get_provisioning_stats())
+
+@app.route('/api/admin/organizations/<org_id>/provision', methods=['POST'])
+def provision_org(org_id):
+    """Explicit, idempotent provisioning (e.g. from the sign-up webhook) so the first request does not pay for seeding."""
+    status = provision_organization(org_id)
+    return jsonify({"organization_id": org_id, "status": status}), 500 if status == "failed" else 200
+
+@app.route('/api/admin/risk-cascade', methods=['GET'])
+def get_risk_cascade_stats():
+    """How often the risk agent escalated to the LLM, and the latency saved by not escalating."""
+    org_id = None if request.args.get('scope') == 'global' else get_org_id()
+    return jsonify(get_cascade_stats(org_id))
+
 @app.route('/api/admin/analytics', methods=['GET'])
 def get_admin_analytics():
     org_id = get_org_id()
@@ -1179,7 +1310,7 @@ def analyze_risk_impact():
         # Mocking for demo
         at_risk_lanes = ["Shanghai to Los Angeles", "Ningbo to Rotterdam"]
         
-        quotes = Quote.query.filter_by(organization_id=org_id).all()
+        quotes = Quote.query.filter_by(organization_id=org_id).options(joinedload(Quote.carrier)).all()
         impacted_quotes = []
         
         for q in quotes:
@@ -1242,7 +1373,7 @@ def get_executive_analytics():
     """
     try:
         org_id = get_org_id()
-        quotes = Quote.query.filter_by(organization_id=org_id).all()
+        quotes = Quote.query.filter_by(organization_id=org_id).options(joinedload(Quote.carrier)).all()
         # Filter for logic
         allocated = [q for q in quotes if q.status == 'ALLOCATED']
         
@@ -1423,12 +1554,14 @@ def inbound_email_webhook():
         return jsonify({"error": "No payload"}), 400
         
     try:
-        results = process_inbound_email(data)
-        log_audit("INBOUND_EMAIL_RECEIVED", f"From: {data.get('from')} - Quotes: {len(results)}", category="QUOTE")
+        results, jobs = process_inbound_email(data, organization_id=get_org_id())
+        log_audit("INBOUND_EMAIL_RECEIVED", f"From: {data.get('from')} - Quotes: {len(results)}, queued: {len(jobs)}", category="QUOTE")
         return jsonify({
             "status": "success",
             "processed_count": len(results),
-            "quotes": results
+            "quotes": results,
+            # Scanned attachments go through the extraction job queue (OCR is too slow for the webhook request)
+            "jobs": [{"job_id": job.id, "filename": job.filename, "poll_url": f"/api/extract/jobs/{job.id}"} for job in jobs]
         }), 201
     except Exception as e:
         print(f"Webhook Error: {e}")
@@ -1436,14 +1569,46 @@ def inbound_email_webhook():
 
 @app.route('/api/quotes', methods=['GET'])
 def get_quotes():
+    """
+    Quotes newest first. Filters: status (comma-separated), origin, destination, carrier_id, from/to (ISO dates).
+    With ?limit= or ?cursor= the list is one keyset page on (upload_date, id) and X-Next-Cursor holds the next
+    page's cursor. ?view=summary leaves out surcharges, agent_insights and agent_timings.
+    """
     try:
         org_id = get_org_id()
-        quotes = Quote.query.filter_by(organization_id=org_id).order_by(Quote.upload_date.desc()).all()
+        summary = request.args.get('view') == 'summary'
+        # The OCR text is never serialized; the JSON blobs only when the client wants details
+        deferred = [Quote.full_text_content] + ([Quote.surcharges, Quote.agent_insights, Quote.agent_timings] if summary else [])
+        query = Quote.query.filter(Quote.organization_id == org_id)\
+            .options(joinedload(Quote.carrier), *[defer(column) for column in deferred])
+
+        # Each filter lines up with an (organization_id, ..., upload_date) index
+        if request.args.get('status'):
+            query = query.filter(Quote.status.in_(request.args['status'].split(',')))
+        if request.args.get('origin'):
+            query = query.filter(Quote.origin == request.args['origin'])
+        if request.args.get('destination'):
+            query = query.filter(Quote.destination == request.args['destination'])
+        if request.args.get('carrier_id'):
+            query = query.filter(Quote.carrier_id == request.args.get('carrier_id', type=int))
+        try:
+            if request.args.get('from'):
+                query = query.filter(Quote.upload_date >= datetime.fromisoformat(request.args['from']))
+            if request.args.get('to'):
+                query = query.filter(Quote.upload_date < datetime.fromisoformat(request.args['to']))
+        except ValueError:
+            return jsonify({"error": "from/to must be ISO dates (YYYY-MM-DD)"}), 400
+
+        quotes, next_cursor = paginate(query, [(Quote.upload_date, True), (Quote.id, True)], request.args)
+
+        # Comment counts for the whole page from one grouped query
+        comment_counts = dict(db.session.query(Comment.quote_id, func.count(Comment.id))
+                              .filter(Comment.quote_id.in_([q.id for q in quotes])).group_by(Comment.quote_id).all()) if quotes else {}
         # Inject market delta für Phase 9
         market_avg = 1650.0 
         results = []
         for q in quotes:
-            d = q.to_dict()
+            d = q.to_dict(details=not summary)
             price = q.normalized_total_price_usd or 0
             if price > 0:
                 delta = ((price - market_avg) / market_avg) * 100
@@ -1451,10 +1616,11 @@ def get_quotes():
             else:
                 d["market_delta"] = 0
             
-            # Count comments
-            d["comment_count"] = Comment.query.filter_by(quote_id=q.id).count()
+            d["comment_count"] = comment_counts.get(q.id, 0)
             results.append(d)
-        return jsonify(results)
+        return paged_json(results, next_cursor)
+    except InvalidPageRequest as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         print(f"Error fetching quotes: {e}")
         return jsonify({"error": str(e)}), 500
@@ -1570,8 +1736,12 @@ def get_reconciled_matches():
     """Returns a list of invoices cross-referenced with their parent quotes."""
     try:
         org_id = get_org_id()
-        invoices = Invoice.query.filter_by(organization_id=org_id).order_by(Invoice.invoice_date.desc()).all()
-        return jsonify([i.to_dict() for i in invoices])
+        query = Invoice.query.filter_by(organization_id=org_id)\
+            .options(joinedload(Invoice.quote).joinedload(Quote.carrier))
+        invoices, next_cursor = paginate(query, [(Invoice.invoice_date, True), (Invoice.id, True)], request.args)
+        return paged_json([i.to_dict() for i in invoices], next_cursor)
+    except InvalidPageRequest as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         print(f"Matches Error: {e}")
         return jsonify({"error": str(e)}), 500
@@ -1614,7 +1784,7 @@ def challenge_rate():
         quote_data = data.get('quote')
         challenges = data.get('challenges', [])
         
-        negotiation_content = generate_negotiation_email(quote_data, challenges)
+        negotiation_content = generate_negotiation_email(quote_data, challenges, get_org_id(), regenerate=wants_regenerate(data))
         log_audit("NEGOTIATION_DRAFTED", f"For Quote: {quote_data.get('id')}", category="QUOTE")
         
         return jsonify(negotiation_content)
@@ -1622,6 +1792,19 @@ def challenge_rate():
         print(f"Negotiation Error: {e}")
         return jsonify({"error": str(e)}), 500
 
+@app.route('/api/negotiation/challenge/stream', methods=['POST'])
+def challenge_rate_stream():
+    """Streaming /api/negotiation/challenge: tokens over SSE, then the final {subject, body}."""
+    data = request.json
+    quote_data = data.get('quote') or {}
+    challenges = data.get('challenges', [])
+
+    def on_draft(negotiation_content):
+        log_audit("NEGOTIATION_DRAFTED", f"For Quote: {quote_data.get('id')}", category="QUOTE")
+        return negotiation_content
+
+    return stream_draft_events(stream_negotiation_email(quote_data, challenges, get_org_id(), regenerate=wants_regenerate(data)), on_draft)
+
 @app.route('/api/simulation/baseline', methods=['GET'])
 def get_simulation_baseline():
     """Calculates the current supply chain cost/performance baseline."""
@@ -1742,8 +1925,11 @@ def manage_carriers():
             return jsonify({"error": str(e)}), 500
             
     try:
-        carriers = Carrier.query.filter_by(organization_id=org_id).all()
-        return jsonify([c.to_dict() for c in carriers])
+        carriers, next_cursor = paginate(Carrier.query.filter_by(organization_id=org_id),
+                                         [(Carrier.name, False), (Carrier.id, False)], request.args)
+        return paged_json([c.to_dict() for c in carriers], next_cursor)
+    except InvalidPageRequest as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         print(f"Error fetching carriers: {e}")
         return jsonify({"error": str(e)}), 500
@@ -1775,8 +1961,14 @@ def manage_tenders():
             return jsonify({"error": str(e)}), 500
             
     try:
-        tenders = Tender.query.filter_by(organization_id=org_id).order_by(Tender.created_at.desc()).all()
-        return jsonify([t.to_dict() for t in tenders])
+        tenders, next_cursor = paginate(Tender.query.filter_by(organization_id=org_id),
+                                        [(Tender.created_at, True), (Tender.id, True)], request.args)
+        # Bid counts for the whole page from one grouped query
+        bid_counts = dict(db.session.query(Bid.tender_id, func.count(Bid.id))
+                          .filter(Bid.tender_id.in_([t.id for t in tenders])).group_by(Bid.tender_id).all()) if tenders else {}
+        return paged_json([t.to_dict(bid_count=bid_counts.get(t.id, 0)) for t in tenders], next_cursor)
+    except InvalidPageRequest as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
@@ -1800,7 +1992,8 @@ def get_tender_bids(tender_id):
         if not tender:
             return jsonify({"error": "Tender not found or access denied"}), 404
             
-        bids = Bid.query.filter_by(tender_id=tender_id).order_by(Bid.offered_rate.asc()).all()
+        bids = Bid.query.filter_by(tender_id=tender_id).options(joinedload(Bid.carrier))\
+            .order_by(Bid.offered_rate.asc()).all()
         return jsonify([b.to_dict() for b in bids])
     except Exception as e:
         return jsonify({"error": str(e)}), 500
@@ -1891,8 +2084,11 @@ def manage_skus():
             return jsonify({"error": str(e)}), 500
 
     try:
-        skus = SKU.query.filter_by(organization_id=org_id).all()
-        return jsonify([s.to_dict() for s in skus])
+        skus, next_cursor = paginate(SKU.query.filter_by(organization_id=org_id),
+                                     [(SKU.name, False), (SKU.id, False)], request.args)
+        return paged_json([s.to_dict() for s in skus], next_cursor)
+    except InvalidPageRequest as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
@@ -1931,10 +2127,16 @@ def get_inventory_status():
     org_id = get_org_id()
     try:
         skus = SKU.query.filter_by(organization_id=org_id).all()
+        # All in-transit impacts for the org's SKUs in one query instead of one per SKU
+        incoming_by_sku = {}
+        for impact in InventoryImpact.query.filter(
+            InventoryImpact.sku_id.in_([sku.id for sku in skus]), InventoryImpact.status == 'IN_TRANSIT'
+        ).all():
+            incoming_by_sku.setdefault(impact.sku_id, []).append(impact)
         report = []
         
         for sku in skus:
-            incoming = InventoryImpact.query.filter_by(sku_id=sku.id, status='IN_TRANSIT').all()
+            incoming = incoming_by_sku.get(sku.id, [])
             total_incoming = sum(i.quantity for i in incoming)
             
             # Enrich incoming with telematics drift
@@ -2009,7 +2211,8 @@ def submit_counter():
             bid.carrier.name,
             bid.offered_rate,
             counter_amount,
-            history
+            history,
+            organization_id=org_id
         )
         
         # Save user's counter as a comment
@@ -2064,9 +2267,33 @@ def classify_sku():
     if not description:
         return jsonify({"error": "Description is required"}), 400
         
-    result = classify_hs_code(description, material)
+    result = classify_hs_code(description, material, organization_id=get_org_id())
     return jsonify(result)
 
+@app.route('/api/customs/classify/bulk', methods=['POST'])
+def classify_sku_bulk():
+    """
+    Classifies many product descriptions: {"items": [{"description", "material"}]}.
+    Duplicates and cached descriptions cost no LLM call; results come back in input order.
+    Synchronous, so at most MAX_BULK_ITEMS (HS_BULK_MAX_ITEMS) items per request.
+    """
+    items = (request.json or {}).get('items') or []
+    if not items:
+        return jsonify({"error": "items is required"}), 400
+    if len(items) > MAX_BULK_ITEMS:
+        return jsonify({"error": f"At most {MAX_BULK_ITEMS} items per request"}), 400
+    if any(not isinstance(item, dict) or not item.get('description') for item in items):
+        return jsonify({"error": "Every item needs a description"}), 400
+
+    # Items still unclassified when the LLM budget runs out come back with an error and are not cached; resend them
+    with request_deadline():
+        results, summary = classify_hs_codes_bulk(items, organization_id=get_org_id())
+    return jsonify({
+        "results": [{"description": item['description'], "material": item.get('material'), **result}
+                    for item, result in zip(items, results)],
+        "summary": summary
+    })
+
 @app.route('/api/customs/estimate', methods=['POST'])
 def estimate_trade_costs():
     """Estimates duties and taxes for a given HS code and value."""
@@ -2100,7 +2327,11 @@ def update_sku(sku_id):
         if 'material_composition' in data: sku.material_composition = data['material_composition']
         
         db.session.commit()
-        return jsonify(sku.to_dict())
+        # Suggest a code from the HS classification cache (no LLM call) when it differs from the stored one
+        response = sku.to_dict()
+        suggestion = lookup_classification(sku.name, sku.material_composition)
+        response["hs_code_suggestion"] = suggestion if suggestion and suggestion["hs_code"] != sku.hs_code else None
+        return jsonify(response)
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
@@ -2114,7 +2345,7 @@ def analyze_claim():
     if not description:
         return jsonify({"error": "Description is required"}), 400
         
-    result = analyze_damage_photo(description)
+    result = analyze_damage_photo(description, organization_id=get_org_id())
     return jsonify(result)
 
 @app.route('/api/claims/submit', methods=['POST'])
@@ -2238,5 +2469,10 @@ def get_atlas_advice():
         return jsonify({"error": str(e)}), 500
 
 if __name__ == '__main__':
+    if not schema_is_current(app):
+        upgrade_schema(app)
+    # The debug reloader runs this twice; only its serving child starts threads
+    if os.environ.get("WERKZEUG_RUN_MAIN") == "true":
+        start_background_services()
     port = int(os.environ.get('PORT', 5000))
     app.run(debug=True, port=port, host='0.0.0.0')
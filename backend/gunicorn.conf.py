@@ -0,0 +1,7 @@
+# gunicorn settings for `gunicorn app:app` (see the Procfile and render.yaml)
+
+def post_worker_init(worker):
+    # Job workers, the surcharge warm-up and batch resumption start per serving process,
+    # never as a side effect of importing app (which `flask db upgrade` also does)
+    from app import start_background_services
+    start_background_services()
@@ -0,0 +1,216 @@
+"""baseline schema (the tables db.create_all() created at start-up before migrations existed)
+
+Databases created by that start-up already have these tables: run `flask db stamp 0001_baseline`
+once, then `flask db upgrade`.
+
+Revision ID: 0001_baseline
+Revises: 
+Create Date: 2026-10-18 09:32:00.808051
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0001_baseline'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('audit_log',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('action', sa.String(length=50), nullable=False),
+    sa.Column('category', sa.String(length=30), nullable=True),
+    sa.Column('details', sa.String(length=255), nullable=True),
+    sa.Column('user_id', sa.String(length=50), nullable=True),
+    sa.Column('organization_id', sa.String(length=50), nullable=True),
+    sa.Column('timestamp', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_table('carrier',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('name', sa.String(length=100), nullable=False),
+    sa.Column('reliability_score', sa.Float(), nullable=True),
+    sa.Column('contact_info', sa.String(length=255), nullable=True),
+    sa.Column('organization_id', sa.String(length=50), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('is_verified', sa.Boolean(), nullable=True),
+    sa.Column('tax_id', sa.String(length=50), nullable=True),
+    sa.Column('compliance_score', sa.Float(), nullable=True),
+    sa.Column('onboarding_status', sa.String(length=20), nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('name', 'organization_id', name='_name_org_uc')
+    )
+    op.create_table('exchange_rate',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('currency_code', sa.String(length=3), nullable=False),
+    sa.Column('rate_to_usd', sa.Float(), nullable=False),
+    sa.Column('last_updated', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('currency_code')
+    )
+    op.create_table('feedback',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.String(length=100), nullable=True),
+    sa.Column('category', sa.String(length=50), nullable=False),
+    sa.Column('message', sa.Text(), nullable=False),
+    sa.Column('page_url', sa.String(length=255), nullable=True),
+    sa.Column('organization_id', sa.String(length=50), nullable=True),
+    sa.Column('timestamp', sa.DateTime(), nullable=True),
+    sa.Column('status', sa.String(length=20), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_table('sku',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('organization_id', sa.String(length=50), nullable=False),
+    sa.Column('name', sa.String(length=100), nullable=False),
+    sa.Column('code', sa.String(length=50), nullable=False),
+    sa.Column('current_stock', sa.Integer(), nullable=True),
+    sa.Column('safety_stock', sa.Integer(), nullable=True),
+    sa.Column('reorder_point', sa.Integer(), nullable=True),
+    sa.Column('unit_measure', sa.String(length=20), nullable=True),
+    sa.Column('lead_time_days', sa.Integer(), nullable=True),
+    sa.Column('hs_code', sa.String(length=20), nullable=True),
+    sa.Column('origin_country', sa.String(length=50), nullable=True),
+    sa.Column('material_composition', sa.String(length=255), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_table('surcharge_reference',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('raw_name', sa.String(length=100), nullable=False),
+    sa.Column('normalized_name', sa.String(length=100), nullable=True),
+    sa.Column('category', sa.String(length=50), nullable=True),
+    sa.Column('is_approved', sa.Boolean(), nullable=True),
+    sa.Column('organization_id', sa.String(length=50), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_table('tender',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('title', sa.String(length=100), nullable=False),
+    sa.Column('description', sa.Text(), nullable=True),
+    sa.Column('organization_id', sa.String(length=50), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('deadline', sa.DateTime(), nullable=True),
+    sa.Column('status', sa.String(length=20), nullable=True),
+    sa.Column('estimated_volume', sa.String(length=100), nullable=True),
+    sa.Column('lane_info', sa.String(length=255), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_table('usage_meter',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.String(length=100), nullable=True),
+    sa.Column('quotes_processed', sa.Integer(), nullable=True),
+    sa.Column('subscription_tier', sa.String(length=20), nullable=True),
+    sa.Column('usage_limit', sa.Integer(), nullable=True),
+    sa.Column('billing_cycle_start', sa.DateTime(), nullable=True),
+    sa.Column('organization_id', sa.String(length=50), nullable=True),
+    sa.Column('last_processed_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('user_id')
+    )
+    op.create_table('bid',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('tender_id', sa.Integer(), nullable=False),
+    sa.Column('carrier_id', sa.Integer(), nullable=False),
+    sa.Column('offered_rate', sa.Float(), nullable=False),
+    sa.Column('currency', sa.String(length=10), nullable=True),
+    sa.Column('transit_time_days', sa.Integer(), nullable=True),
+    sa.Column('submitted_at', sa.DateTime(), nullable=True),
+    sa.Column('is_winning_bid', sa.Boolean(), nullable=True),
+    sa.Column('carrier_notes', sa.Text(), nullable=True),
+    sa.Column('organization_id', sa.String(length=50), nullable=True),
+    sa.ForeignKeyConstraint(['carrier_id'], ['carrier.id'], ),
+    sa.ForeignKeyConstraint(['tender_id'], ['tender.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_table('quote',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('filename', sa.String(length=255), nullable=False),
+    sa.Column('upload_date', sa.DateTime(), nullable=True),
+    sa.Column('user_id', sa.String(length=100), nullable=True),
+    sa.Column('organization_id', sa.String(length=50), nullable=True),
+    sa.Column('carrier_id', sa.Integer(), nullable=True),
+    sa.Column('origin', sa.String(length=100), nullable=True),
+    sa.Column('destination', sa.String(length=100), nullable=True),
+    sa.Column('currency', sa.String(length=10), nullable=True),
+    sa.Column('total_price', sa.Float(), nullable=True),
+    sa.Column('normalized_total_price_usd', sa.Float(), nullable=True),
+    sa.Column('surcharges', sa.JSON(), nullable=True),
+    sa.Column('risk_flags', sa.JSON(), nullable=True),
+    sa.Column('full_text_content', sa.Text(), nullable=True),
+    sa.Column('po_number', sa.String(length=50), nullable=True),
+    sa.Column('status', sa.String(length=20), nullable=True),
+    sa.Column('allocation_date', sa.DateTime(), nullable=True),
+    sa.Column('time_to_value_seconds', sa.Integer(), nullable=True),
+    sa.Column('booking_ref', sa.String(length=50), nullable=True),
+    sa.Column('agent_insights', sa.JSON(), nullable=True),
+    sa.Column('is_audited', sa.Boolean(), nullable=True),
+    sa.Column('audited_by', sa.String(length=100), nullable=True),
+    sa.Column('carbon_footprint_kg', sa.Float(), nullable=True),
+    sa.Column('transit_time_days', sa.Integer(), nullable=True),
+    sa.Column('confidence_score', sa.Float(), nullable=True),
+    sa.Column('estimated_duties', sa.Float(), nullable=True),
+    sa.Column('estimated_taxes', sa.Float(), nullable=True),
+    sa.Column('pdf_path', sa.String(length=255), nullable=True),
+    sa.ForeignKeyConstraint(['carrier_id'], ['carrier.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_table('comment',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('quote_id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.String(length=100), nullable=False),
+    sa.Column('organization_id', sa.String(length=50), nullable=False),
+    sa.Column('content', sa.Text(), nullable=False),
+    sa.Column('timestamp', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['quote_id'], ['quote.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_table('inventory_impact',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('organization_id', sa.String(length=50), nullable=False),
+    sa.Column('sku_id', sa.Integer(), nullable=False),
+    sa.Column('quote_id', sa.Integer(), nullable=True),
+    sa.Column('quantity', sa.Integer(), nullable=False),
+    sa.Column('expected_arrival_date', sa.DateTime(), nullable=True),
+    sa.Column('status', sa.String(length=20), nullable=True),
+    sa.ForeignKeyConstraint(['quote_id'], ['quote.id'], ),
+    sa.ForeignKeyConstraint(['sku_id'], ['sku.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_table('invoice',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('filename', sa.String(length=255), nullable=False),
+    sa.Column('invoice_date', sa.DateTime(), nullable=True),
+    sa.Column('user_id', sa.String(length=100), nullable=True),
+    sa.Column('organization_id', sa.String(length=50), nullable=True),
+    sa.Column('invoice_number', sa.String(length=50), nullable=True),
+    sa.Column('quote_id', sa.Integer(), nullable=True),
+    sa.Column('total_amount', sa.Float(), nullable=True),
+    sa.Column('normalized_total_amount_usd', sa.Float(), nullable=True),
+    sa.Column('currency', sa.String(length=10), nullable=True),
+    sa.Column('status', sa.String(length=20), nullable=True),
+    sa.Column('discrepancy_details', sa.JSON(), nullable=True),
+    sa.ForeignKeyConstraint(['quote_id'], ['quote.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+
+
+def downgrade():
+    # ### commands auto generated by Alembic - please adjust! ###
+    op.drop_table('invoice')
+    op.drop_table('inventory_impact')
+    op.drop_table('comment')
+    op.drop_table('quote')
+    op.drop_table('bid')
+    op.drop_table('usage_meter')
+    op.drop_table('tender')
+    op.drop_table('surcharge_reference')
+    op.drop_table('sku')
+    op.drop_table('feedback')
+    op.drop_table('exchange_rate')
+    op.drop_table('carrier')
+    op.drop_table('audit_log')
+    # ### end Alembic commands ###
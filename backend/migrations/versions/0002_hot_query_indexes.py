@@ -0,0 +1,50 @@
+"""composite indexes for org-scoped list and filter queries
+
+Revision ID: 0002_hot_query_indexes
+Revises: 0001_baseline
+Create Date: 2026-10-18 09:32:20.649823
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0002_hot_query_indexes'
+down_revision = '0001_baseline'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_audit_log_org_category_timestamp', 'audit_log', ['organization_id', 'category', 'timestamp'], unique=False)
+    op.create_index('ix_audit_log_org_timestamp', 'audit_log', ['organization_id', 'timestamp'], unique=False)
+    op.create_index('ix_bid_tender_rate', 'bid', ['tender_id', 'offered_rate'], unique=False)
+    op.create_index('ix_carrier_org_name', 'carrier', ['organization_id', 'name'], unique=False)
+    op.create_index('ix_comment_quote_timestamp', 'comment', ['quote_id', 'timestamp'], unique=False)
+    op.create_index('ix_inventory_impact_sku_status', 'inventory_impact', ['sku_id', 'status'], unique=False)
+    op.create_index('ix_invoice_org_invoice_date', 'invoice', ['organization_id', 'invoice_date'], unique=False)
+    op.create_index('ix_invoice_org_status', 'invoice', ['organization_id', 'status'], unique=False)
+    op.create_index('ix_quote_org_lane', 'quote', ['organization_id', 'origin', 'destination', 'upload_date'], unique=False)
+    op.create_index('ix_quote_org_status', 'quote', ['organization_id', 'status'], unique=False)
+    op.create_index('ix_quote_org_upload_date', 'quote', ['organization_id', 'upload_date'], unique=False)
+    op.create_index('ix_sku_org_name', 'sku', ['organization_id', 'name'], unique=False)
+    op.create_index('ix_tender_org_created_at', 'tender', ['organization_id', 'created_at'], unique=False)
+    op.create_index('ix_tender_org_status', 'tender', ['organization_id', 'status'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_tender_org_status', table_name='tender')
+    op.drop_index('ix_tender_org_created_at', table_name='tender')
+    op.drop_index('ix_sku_org_name', table_name='sku')
+    op.drop_index('ix_quote_org_upload_date', table_name='quote')
+    op.drop_index('ix_quote_org_status', table_name='quote')
+    op.drop_index('ix_quote_org_lane', table_name='quote')
+    op.drop_index('ix_invoice_org_status', table_name='invoice')
+    op.drop_index('ix_invoice_org_invoice_date', table_name='invoice')
+    op.drop_index('ix_inventory_impact_sku_status', table_name='inventory_impact')
+    op.drop_index('ix_comment_quote_timestamp', table_name='comment')
+    op.drop_index('ix_carrier_org_name', table_name='carrier')
+    op.drop_index('ix_bid_tender_rate', table_name='bid')
+    op.drop_index('ix_audit_log_org_timestamp', table_name='audit_log')
+    op.drop_index('ix_audit_log_org_category_timestamp', table_name='audit_log')
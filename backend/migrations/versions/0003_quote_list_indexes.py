@@ -0,0 +1,29 @@
+"""quote list indexes for keyset pages with status and carrier filters
+
+Revision ID: 0003_quote_list_indexes
+Revises: 0002_hot_query_indexes
+Create Date: 2026-10-18 09:36:43.771495
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0003_quote_list_indexes'
+down_revision = '0002_hot_query_indexes'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Status and carrier filters on the quote list keep upload_date order from the index (keyset pages, no temp sort)
+    op.drop_index('ix_quote_org_status', table_name='quote')
+    op.create_index('ix_quote_org_status_upload_date', 'quote', ['organization_id', 'status', 'upload_date'], unique=False)
+    op.create_index('ix_quote_org_carrier_upload_date', 'quote', ['organization_id', 'carrier_id', 'upload_date'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_quote_org_carrier_upload_date', table_name='quote')
+    op.drop_index('ix_quote_org_status_upload_date', table_name='quote')
+    op.create_index('ix_quote_org_status', 'quote', ['organization_id', 'status'], unique=False)
@@ -0,0 +1,26 @@
+"""per-agent wall times on quotes (CoordinatorAgent dependency graph)
+
+Revision ID: 0005_quote_agent_timings
+Revises: 0004_organization_provision
+Create Date: 2026-10-18 16:05:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0005_quote_agent_timings'
+down_revision = '0004_organization_provision'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('quote', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('agent_timings', sa.JSON(), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('quote', schema=None) as batch_op:
+        batch_op.drop_column('agent_timings')
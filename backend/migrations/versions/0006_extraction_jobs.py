@@ -0,0 +1,58 @@
+"""async extraction jobs and upload batches
+
+Revision ID: 0006_extraction_jobs
+Revises: 0005_quote_agent_timings
+Create Date: 2026-10-18 16:20:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0006_extraction_jobs'
+down_revision = '0005_quote_agent_timings'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('extraction_batch',
+    sa.Column('id', sa.String(length=32), nullable=False),
+    sa.Column('organization_id', sa.String(length=50), nullable=True),
+    sa.Column('user_id', sa.String(length=100), nullable=True),
+    sa.Column('status', sa.String(length=20), nullable=True),
+    sa.Column('total_files', sa.Integer(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('finished_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_table('extraction_job',
+    sa.Column('id', sa.String(length=32), nullable=False),
+    sa.Column('batch_id', sa.String(length=32), nullable=True),
+    sa.Column('organization_id', sa.String(length=50), nullable=True),
+    sa.Column('user_id', sa.String(length=100), nullable=True),
+    sa.Column('filename', sa.String(length=255), nullable=False),
+    sa.Column('pdf_path', sa.String(length=255), nullable=False),
+    sa.Column('content_hash', sa.String(length=64), nullable=True),
+    sa.Column('status', sa.String(length=20), nullable=True),
+    sa.Column('stage', sa.String(length=20), nullable=True),
+    sa.Column('attempts', sa.Integer(), nullable=True),
+    sa.Column('error', sa.Text(), nullable=True),
+    sa.Column('quote_id', sa.Integer(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('started_at', sa.DateTime(), nullable=True),
+    sa.Column('finished_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['batch_id'], ['extraction_batch.id'], ),
+    sa.ForeignKeyConstraint(['quote_id'], ['quote.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_extraction_job_batch_status', 'extraction_job', ['batch_id', 'status'], unique=False)
+    op.create_index('ix_extraction_job_status_created_at', 'extraction_job', ['status', 'created_at'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_extraction_job_status_created_at', table_name='extraction_job')
+    op.drop_index('ix_extraction_job_batch_status', table_name='extraction_job')
+    op.drop_table('extraction_job')
+    op.drop_table('extraction_batch')
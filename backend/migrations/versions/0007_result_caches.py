@@ -0,0 +1,63 @@
+"""extraction, draft and HS classification caches
+
+Revision ID: 0007_result_caches
+Revises: 0006_extraction_jobs
+Create Date: 2026-10-18 16:20:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0007_result_caches'
+down_revision = '0006_extraction_jobs'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('extraction_cache_entry',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('organization_id', sa.String(length=50), nullable=False),
+    sa.Column('content_hash', sa.String(length=64), nullable=False),
+    sa.Column('text', sa.Text(), nullable=True),
+    sa.Column('extracted_data', sa.JSON(), nullable=False),
+    sa.Column('hit_count', sa.Integer(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('last_hit_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('organization_id', 'content_hash', name='_org_content_hash_uc')
+    )
+    op.create_table('draft_cache_entry',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('cache_key', sa.String(length=64), nullable=False),
+    sa.Column('organization_id', sa.String(length=50), nullable=True),
+    sa.Column('kind', sa.String(length=50), nullable=False),
+    sa.Column('payload', sa.JSON(), nullable=False),
+    sa.Column('hit_count', sa.Integer(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('expires_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('cache_key')
+    )
+    op.create_table('hs_classification',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('lookup_key', sa.String(length=64), nullable=False),
+    sa.Column('description', sa.String(length=255), nullable=False),
+    sa.Column('material', sa.String(length=255), nullable=True),
+    sa.Column('hs_code', sa.String(length=20), nullable=False),
+    sa.Column('category', sa.String(length=100), nullable=True),
+    sa.Column('confidence', sa.Float(), nullable=True),
+    sa.Column('rationale', sa.Text(), nullable=True),
+    sa.Column('hit_count', sa.Integer(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('lookup_key')
+    )
+
+
+def downgrade():
+    op.drop_table('hs_classification')
+    op.drop_table('draft_cache_entry')
+    op.drop_table('extraction_cache_entry')
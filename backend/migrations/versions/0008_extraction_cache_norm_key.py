@@ -0,0 +1,34 @@
+"""key cached extractions by surcharge dictionary and normalization mode too
+
+Existing entries do not record which dictionary they were normalized with, so they are dropped.
+
+Revision ID: 0008_extraction_cache_norm_key
+Revises: 0007_result_caches
+Create Date: 2026-10-18 18:20:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0008_extraction_cache_norm_key'
+down_revision = '0007_result_caches'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.execute("DELETE FROM extraction_cache_entry")
+    with op.batch_alter_table('extraction_cache_entry', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('normalization_key', sa.String(length=64), nullable=False))
+        batch_op.drop_constraint('_org_content_hash_uc', type_='unique')
+        batch_op.create_unique_constraint('_org_content_norm_uc', ['organization_id', 'content_hash', 'normalization_key'])
+
+
+def downgrade():
+    op.execute("DELETE FROM extraction_cache_entry")
+    with op.batch_alter_table('extraction_cache_entry', schema=None) as batch_op:
+        batch_op.drop_constraint('_org_content_norm_uc', type_='unique')
+        batch_op.create_unique_constraint('_org_content_hash_uc', ['organization_id', 'content_hash'])
+        batch_op.drop_column('normalization_key')
@@ -0,0 +1,26 @@
+"""status for the quote an extraction job saves (inbound email quotes start as PENDING)
+
+Revision ID: 0009_extraction_job_quote_status
+Revises: 0008_extraction_cache_norm_key
+Create Date: 2026-10-18 19:05:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0009_extraction_job_quote_status'
+down_revision = '0008_extraction_cache_norm_key'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('extraction_job', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('quote_status', sa.String(length=20), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('extraction_job', schema=None) as batch_op:
+        batch_op.drop_column('quote_status')
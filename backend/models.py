@@ -5,7 +5,10 @@ import json
 db = SQLAlchemy()
 
 class Carrier(db.Model):
-    __table_args__ = (db.UniqueConstraint('name', 'organization_id', name='_name_org_uc'),)
+    __table_args__ = (
+        db.UniqueConstraint('name', 'organization_id', name='_name_org_uc'),
+        db.Index('ix_carrier_org_name', 'organization_id', 'name')
+    )
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(100), nullable=False)
     reliability_score = db.Column(db.Float, default=100.0)
@@ -65,6 +68,10 @@ class ExchangeRate(db.Model):
         }
 
 class AuditLog(db.Model):
+    __table_args__ = (
+        db.Index('ix_audit_log_org_timestamp', 'organization_id', 'timestamp'),
+        db.Index('ix_audit_log_org_category_timestamp', 'organization_id', 'category', 'timestamp')
+    )
     id = db.Column(db.Integer, primary_key=True)
     action = db.Column(db.String(50), nullable=False) # e.g. "QUOTE_UPLOAD"
     category = db.Column(db.String(30), default="GENERAL") # QUOTE, AUTH, SYSTEM, GENERAL
@@ -85,6 +92,12 @@ class AuditLog(db.Model):
         }
 
 class Quote(db.Model):
+    __table_args__ = (
+        db.Index('ix_quote_org_upload_date', 'organization_id', 'upload_date'),
+        db.Index('ix_quote_org_status_upload_date', 'organization_id', 'status', 'upload_date'),
+        db.Index('ix_quote_org_carrier_upload_date', 'organization_id', 'carrier_id', 'upload_date'),
+        db.Index('ix_quote_org_lane', 'organization_id', 'origin', 'destination', 'upload_date')
+    )
     id = db.Column(db.Integer, primary_key=True)
     filename = db.Column(db.String(255), nullable=False)
     upload_date = db.Column(db.DateTime, default=datetime.utcnow)
@@ -115,6 +128,7 @@ class Quote(db.Model):
     time_to_value_seconds = db.Column(db.Integer, nullable=True) # Duration from Upload -> Allocation
     booking_ref = db.Column(db.String(50), nullable=True)
     agent_insights = db.Column(db.JSON, nullable=True) # JSON Audit log from Multi-Agent Team
+    agent_timings = db.Column(db.JSON, nullable=True) # Per-agent wall time {name: {"ms", "status"}}
     is_audited = db.Column(db.Boolean, default=False)
     audited_by = db.Column(db.String(100), nullable=True) # User ID who verified
     carbon_footprint_kg = db.Column(db.Float, nullable=True) # Estimated CO2 impact
@@ -126,8 +140,9 @@ class Quote(db.Model):
     estimated_taxes = db.Column(db.Float, default=0.0)
     pdf_path = db.Column(db.String(255), nullable=True) # Path to stored PDF
 
-    def to_dict(self):
-        return {
+    def to_dict(self, details=True):
+        # details=False skips the JSON blobs (surcharges, agent output) so they can stay deferred in list queries
+        data = {
             "id": self.id,
             "filename": self.filename,
             "upload_date": self.upload_date.isoformat(),
@@ -137,12 +152,10 @@ class Quote(db.Model):
             "total_price": self.total_price,
             "currency": self.currency,
             "normalized_total_price_usd": self.normalized_total_price_usd,
-            "surcharges": self.surcharges,
             "risk_flags": self.risk_flags or [],
             "po_number": self.po_number,
             "status": self.status,
             "booking_ref": self.booking_ref,
-            "agent_insights": self.agent_insights,
             "is_audited": self.is_audited,
             "audited_by": self.audited_by,
             "carbon_footprint_kg": self.carbon_footprint_kg,
@@ -155,6 +168,9 @@ class Quote(db.Model):
             "time_to_value_seconds": self.time_to_value_seconds,
             "organization_id": self.organization_id
         }
+        if details:
+            data.update(surcharges=self.surcharges, agent_insights=self.agent_insights, agent_timings=self.agent_timings)
+        return data
 
 class UsageMeter(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -201,6 +217,7 @@ class Feedback(db.Model):
         }
 
 class Comment(db.Model):
+    __table_args__ = (db.Index('ix_comment_quote_timestamp', 'quote_id', 'timestamp'),)
     id = db.Column(db.Integer, primary_key=True)
     quote_id = db.Column(db.Integer, db.ForeignKey('quote.id'), nullable=False)
     user_id = db.Column(db.String(100), nullable=False)
@@ -221,6 +238,10 @@ class Comment(db.Model):
         }
 
 class Invoice(db.Model):
+    __table_args__ = (
+        db.Index('ix_invoice_org_invoice_date', 'organization_id', 'invoice_date'),
+        db.Index('ix_invoice_org_status', 'organization_id', 'status')
+    )
     id = db.Column(db.Integer, primary_key=True)
     filename = db.Column(db.String(255), nullable=False)
     invoice_date = db.Column(db.DateTime, default=datetime.utcnow)
@@ -254,7 +275,12 @@ class Invoice(db.Model):
             "organization_id": self.organization_id,
             "quote_data": self.quote.to_dict() if self.quote else None
         }
+
 class Tender(db.Model):
+    __table_args__ = (
+        db.Index('ix_tender_org_created_at', 'organization_id', 'created_at'),
+        db.Index('ix_tender_org_status', 'organization_id', 'status')
+    )
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String(100), nullable=False)
     description = db.Column(db.Text, nullable=True)
@@ -266,7 +292,8 @@ class Tender(db.Model):
     estimated_volume = db.Column(db.String(100), nullable=True)
     lane_info = db.Column(db.String(255), nullable=True) # e.g. "Shanghai -> LA"
 
-    def to_dict(self):
+    def to_dict(self, bid_count=None):
+        # List endpoints pass bid_count from an aggregate query instead of loading every bid
         return {
             "id": self.id,
             "title": self.title,
@@ -277,10 +304,11 @@ class Tender(db.Model):
             "status": self.status,
             "estimated_volume": self.estimated_volume,
             "lane_info": self.lane_info,
-            "bid_count": len(self.bids)
+            "bid_count": len(self.bids) if bid_count is None else bid_count
         }
 
 class Bid(db.Model):
+    __table_args__ = (db.Index('ix_bid_tender_rate', 'tender_id', 'offered_rate'),)
     id = db.Column(db.Integer, primary_key=True)
     tender_id = db.Column(db.Integer, db.ForeignKey('tender.id'), nullable=False)
     carrier_id = db.Column(db.Integer, db.ForeignKey('carrier.id'), nullable=False)
@@ -313,6 +341,7 @@ class Bid(db.Model):
         }
 
 class SKU(db.Model):
+    __table_args__ = (db.Index('ix_sku_org_name', 'organization_id', 'name'),)
     id = db.Column(db.Integer, primary_key=True)
     organization_id = db.Column(db.String(50), nullable=False)
     name = db.Column(db.String(100), nullable=False)
@@ -346,6 +375,7 @@ class SKU(db.Model):
 
 class InventoryImpact(db.Model):
     """Links a Quote/Shipment to SKU volumes for stock prediction."""
+    __table_args__ = (db.Index('ix_inventory_impact_sku_status', 'sku_id', 'status'),)
     id = db.Column(db.Integer, primary_key=True)
     organization_id = db.Column(db.String(50), nullable=False)
     sku_id = db.Column(db.Integer, db.ForeignKey('sku.id'), nullable=False)
@@ -368,3 +398,162 @@ class InventoryImpact(db.Model):
             "expected_arrival_date": self.expected_arrival_date.isoformat() if self.expected_arrival_date else None,
             "status": self.status
         }
+
+class ExtractionBatch(db.Model):
+    """Bulk upload (/api/extract/batch). Each file is an ExtractionJob with this batch_id."""
+    id = db.Column(db.String(32), primary_key=True)
+    organization_id = db.Column(db.String(50), nullable=True, default="org_demo_123")
+    user_id = db.Column(db.String(100), nullable=True) # Clerk ID
+    status = db.Column(db.String(20), default="QUEUED") # QUEUED, RUNNING, COMPLETED
+    total_files = db.Column(db.Integer, default=0)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    finished_at = db.Column(db.DateTime, nullable=True)
+
+    def to_dict(self, jobs=None):
+        counts = {"QUEUED": 0, "RUNNING": 0, "COMPLETED": 0, "FAILED": 0}
+        for job in jobs or []:
+            counts[job.status] = counts.get(job.status, 0) + 1
+        done = counts["COMPLETED"] + counts["FAILED"]
+        return {
+            "id": self.id,
+            "organization_id": self.organization_id,
+            "user_id": self.user_id,
+            "status": self.status,
+            "total_files": self.total_files,
+            "counts": counts,
+            "progress": round(done / self.total_files, 3) if self.total_files else 1.0,
+            "created_at": self.created_at.isoformat() if self.created_at else None,
+            "finished_at": self.finished_at.isoformat() if self.finished_at else None,
+            "files": [{
+                "job_id": job.id,
+                "filename": job.filename,
+                "status": job.status,
+                "stage": job.stage,
+                "error": job.error,
+                "quote_id": job.quote_id
+            } for job in jobs or []]
+        }
+
+class ExtractionJob(db.Model):
+    """Queued /api/extract work item. Claimed and processed by the ingestion workers."""
+    __table_args__ = (
+        db.Index('ix_extraction_job_status_created_at', 'status', 'created_at'),
+        db.Index('ix_extraction_job_batch_status', 'batch_id', 'status')
+    )
+    id = db.Column(db.String(32), primary_key=True)
+    batch_id = db.Column(db.String(32), db.ForeignKey('extraction_batch.id'), nullable=True)
+    organization_id = db.Column(db.String(50), nullable=True, default="org_demo_123")
+    user_id = db.Column(db.String(100), nullable=True) # Clerk ID
+    filename = db.Column(db.String(255), nullable=False) # Original upload name
+    pdf_path = db.Column(db.String(255), nullable=False) # Stored name inside UPLOAD_FOLDER
+    content_hash = db.Column(db.String(64), nullable=True) # SHA-256 computed while streaming the upload
+    quote_status = db.Column(db.String(20), nullable=True, default="DRAFT") # Status the resulting Quote is saved with
+
+    status = db.Column(db.String(20), default="QUEUED") # QUEUED, RUNNING, COMPLETED, FAILED
+    stage = db.Column(db.String(20), nullable=True) # OCR, EXTRACTION, PERSIST
+    attempts = db.Column(db.Integer, default=0)
+    error = db.Column(db.Text, nullable=True)
+    quote_id = db.Column(db.Integer, db.ForeignKey('quote.id'), nullable=True)
+
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    started_at = db.Column(db.DateTime, nullable=True)
+    finished_at = db.Column(db.DateTime, nullable=True)
+
+    quote = db.relationship('Quote')
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "organization_id": self.organization_id,
+            "user_id": self.user_id,
+            "filename": self.filename,
+            "status": self.status,
+            "stage": self.stage,
+            "attempts": self.attempts,
+            "error": self.error,
+            "quote_id": self.quote_id,
+            "created_at": self.created_at.isoformat() if self.created_at else None,
+            "started_at": self.started_at.isoformat() if self.started_at else None,
+            "finished_at": self.finished_at.isoformat() if self.finished_at else None,
+            "quote": self.quote.to_dict() if self.quote else None
+        }
+
+class ExtractionCacheEntry(db.Model):
+    """Stored extraction result for a byte-identical PDF, scoped to an organization."""
+    __table_args__ = (db.UniqueConstraint('organization_id', 'content_hash', 'normalization_key', name='_org_content_norm_uc'),)
+    id = db.Column(db.Integer, primary_key=True)
+    organization_id = db.Column(db.String(50), nullable=False)
+    content_hash = db.Column(db.String(64), nullable=False) # SHA-256 of the PDF bytes
+    normalization_key = db.Column(db.String(64), nullable=False) # Surcharge dictionary + normalization mode the result used
+    text = db.Column(db.Text, nullable=True)
+    extracted_data = db.Column(db.JSON, nullable=False) # process_quote_fully output
+    hit_count = db.Column(db.Integer, default=0)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    last_hit_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "organization_id": self.organization_id,
+            "content_hash": self.content_hash,
+            "hit_count": self.hit_count,
+            "created_at": self.created_at.isoformat(),
+            "last_hit_at": self.last_hit_at.isoformat() if self.last_hit_at else None
+        }
+
+class DraftCacheEntry(db.Model):
+    """Generated email/negotiation draft shared by all workers when DRAFT_CACHE_BACKEND=sql."""
+    id = db.Column(db.Integer, primary_key=True)
+    cache_key = db.Column(db.String(64), unique=True, nullable=False) # SHA-256 of kind + org + canonical inputs
+    organization_id = db.Column(db.String(50), nullable=True)
+    kind = db.Column(db.String(50), nullable=False) # booking_email, exception_email, negotiation_email
+    payload = db.Column(db.JSON, nullable=False)
+    hit_count = db.Column(db.Integer, default=0)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    expires_at = db.Column(db.DateTime, nullable=False)
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "organization_id": self.organization_id,
+            "kind": self.kind,
+            "hit_count": self.hit_count,
+            "created_at": self.created_at.isoformat(),
+            "expires_at": self.expires_at.isoformat()
+        }
+
+class HSClassification(db.Model):
+    """HS code suggested for a normalized product description + material; shared by all organizations."""
+    id = db.Column(db.Integer, primary_key=True)
+    lookup_key = db.Column(db.String(64), unique=True, nullable=False) # SHA-256 of normalized description|material
+    description = db.Column(db.String(255), nullable=False) # normalized
+    material = db.Column(db.String(255), nullable=True) # normalized
+    hs_code = db.Column(db.String(20), nullable=False)
+    category = db.Column(db.String(100), nullable=True)
+    confidence = db.Column(db.Float, nullable=True)
+    rationale = db.Column(db.Text, nullable=True)
+    hit_count = db.Column(db.Integer, default=0)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def to_dict(self):
+        return {
+            "hs_code": self.hs_code,
+            "category": self.category,
+            "confidence": self.confidence,
+            "rationale": self.rationale
+        }
+
+class OrganizationProvision(db.Model):
+    """Provisioning flag for an organization; replaces probing its carriers on every request."""
+    organization_id = db.Column(db.String(50), primary_key=True)
+    status = db.Column(db.String(20), default="SEEDING") # SEEDING, READY
+    started_at = db.Column(db.DateTime, default=datetime.utcnow)
+    provisioned_at = db.Column(db.DateTime, nullable=True)
+
+    def to_dict(self):
+        return {
+            "organization_id": self.organization_id,
+            "status": self.status,
+            "started_at": self.started_at.isoformat() if self.started_at else None,
+            "provisioned_at": self.provisioned_at.isoformat() if self.provisioned_at else None
+        }
@@ -1,10 +1,12 @@
-
 from app import app, db
+from services.schema import upgrade_schema
 
 with app.app_context():
     try:
         db.drop_all()
-        db.create_all()
-        print("Database schema reset successfully using drop_all().")
+        db.session.execute(db.text("DROP TABLE IF EXISTS alembic_version"))
+        db.session.commit()
+        upgrade_schema(app)
+        print("Database schema reset successfully using drop_all() and migrations.")
     except Exception as e:
         print(f"Error resetting database: {e}")
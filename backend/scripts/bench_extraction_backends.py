@@ -0,0 +1,68 @@
+import sys
+import os
+import json
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import fitz
+from services import ocr_service
+
+def _text_page(doc, n):
+    page = doc.new_page()
+    lines = [f"Ocean Freight Shanghai -> Los Angeles 40HC USD {1500 + i * 3:.2f} BAF 120.00 THC 85.00 line {n}-{i}" for i in range(40)]
+    page.insert_text((36, 36), "\n".join(lines), fontsize=8)
+
+def _scanned_page(doc):
+    pix = fitz.Pixmap(fitz.csRGB, fitz.IRect(0, 0, 400, 500))
+    pix.clear_with(230)
+    doc.new_page().insert_image(fitz.Rect(36, 36, 560, 760), pixmap=pix)
+
+def build_corpus():
+    """One synthetic document per engine document type (scanned is OCR-only, so not benchmarked)."""
+    corpus = {}
+
+    doc = fitz.open()
+    for n in range(3):
+        _text_page(doc, n)
+    corpus["text"] = doc.tobytes()
+
+    doc = fitz.open()
+    for n in range(ocr_service.PARALLEL_MIN_PAGES * 2):
+        _text_page(doc, n)
+    corpus["large"] = doc.tobytes()
+
+    doc = fitz.open()
+    for n in range(6):
+        _text_page(doc, n) if n % 2 == 0 else _scanned_page(doc)
+    corpus["mixed"] = doc.tobytes()
+    return corpus
+
+def time_backend(name, pdf_bytes, repeat=3):
+    with ocr_service.open_pdf(pdf_bytes) as doc:
+        page_count = min(len(doc), ocr_service.MAX_PAGES)
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        ocr_service.BACKENDS[name](pdf_bytes, page_count)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+def run(write=False):
+    preferences = {}
+    print(f"{'doc_type':>8} " + " ".join(f"{name + '_s':>13}" for name in ocr_service.BACKENDS) + "  fastest")
+    for doc_type, pdf_bytes in build_corpus().items():
+        timings = {name: time_backend(name, pdf_bytes) for name in ocr_service.BACKENDS}
+        fastest = min(timings, key=timings.get)
+        preferences[doc_type] = fastest
+        print(f"{doc_type:>8} " + " ".join(f"{timings[name]:>13.4f}" for name in timings) + f"  {fastest}")
+
+    if write:
+        with open(ocr_service.BACKEND_PREFERENCES_PATH, 'w') as f:
+            json.dump(preferences, f, indent=4)
+        print(f"Wrote {ocr_service.BACKEND_PREFERENCES_PATH}")
+    return preferences
+
+if __name__ == "__main__":
+    run(write="--write" in sys.argv)
@@ -0,0 +1,99 @@
+import sys
+import os
+import argparse
+import tempfile
+import threading
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from llm_standin import start_in_background
+
+CORPUS_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'data', 'fixtures', 'quotes'))
+ORG_ID = "org_bench"
+
+def load_texts():
+    return [open(os.path.join(CORPUS_DIR, name)).read() for name in sorted(os.listdir(CORPUS_DIR)) if name.endswith(".txt")]
+
+def _percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(int(len(ordered) * pct), len(ordered) - 1)] if ordered else 0.0
+
+def run_level(app, texts, quotes, concurrency):
+    """Pushes `quotes` texts through process_quote_fully + save with `concurrency` threads."""
+    from models import db
+    from services.coordinator_agent import process_quote_fully
+    from services.ingestion_service import save_extracted_quote
+
+    latencies, errors, lock = [], [], threading.Lock()
+    next_index = [0]
+
+    def worker():
+        with app.app_context():
+            while True:
+                with lock:
+                    i = next_index[0]
+                    next_index[0] += 1
+                if i >= quotes:
+                    break
+                started = time.perf_counter()
+                text = texts[i % len(texts)]
+                data = process_quote_fully(text, ORG_ID)
+                if "error" in data:
+                    with lock:
+                        errors.append(data["error"])
+                    continue
+                save_extracted_quote(data, text, ORG_ID, "bench", f"bench_{i}.pdf")
+                with lock:
+                    latencies.append((time.perf_counter() - started) * 1000)
+            db.session.remove()
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - started
+    return elapsed, latencies, errors
+
+def run(quotes, levels, latency_scale, error_rate, seed):
+    server, base_url = start_in_background(latency_scale=latency_scale, error_rate=error_rate, seed=seed)
+    # Must be set before services.llm_clients is imported
+    os.environ["LLM_BASE_URL"] = base_url
+
+    from flask import Flask
+    from models import db
+    from services.llm_clients import get_client_stats
+
+    app = Flask(__name__)
+    # A file DB so worker threads share it; the dev database is never touched
+    db_file = os.path.join(tempfile.mkdtemp(), "bench.db")
+    app.config['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{db_file}'
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {"connect_args": {"check_same_thread": False, "timeout": 30}}
+    db.init_app(app)
+    with app.app_context():
+        db.create_all()
+
+    texts = load_texts()
+    print(f"stand-in {base_url} latency_scale={latency_scale} error_rate={error_rate} seed={seed}")
+    print(f"{'threads':>7} {'quotes':>6} {'errors':>6} {'seconds':>8} {'quotes/s':>9} {'p50_ms':>8} {'p95_ms':>8}")
+    for concurrency in levels:
+        elapsed, latencies, errors = run_level(app, texts, quotes, concurrency)
+        print(f"{concurrency:>7} {len(latencies):>6} {len(errors):>6} {elapsed:>8.2f} {len(latencies) / elapsed:>9.2f} "
+              f"{_percentile(latencies, 0.5):>8.0f} {_percentile(latencies, 0.95):>8.0f}")
+
+    print("stand-in routes:", server.RequestHandlerClass.state.stats()["routes"])
+    client = get_client_stats()
+    print(f"client: requests={client['requests']} errors={client['errors']} reuse_ratio={client['reuse_ratio']}")
+    server.shutdown()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="End-to-end quote pipeline throughput against the offline LLM stand-in.")
+    parser.add_argument("--quotes", type=int, default=20, help="quotes per concurrency level")
+    parser.add_argument("--concurrency", default="1,4,8", help="comma-separated thread counts")
+    parser.add_argument("--latency-scale", type=float, default=1.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+    run(args.quotes, [int(c) for c in args.concurrency.split(",")], args.latency_scale, args.error_rate, args.seed)
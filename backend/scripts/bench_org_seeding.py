@@ -0,0 +1,147 @@
+import sys
+import os
+import argparse
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+# app.py puts its database and uploads folder in the working directory; keep them in a scratch dir
+os.chdir(tempfile.mkdtemp())
+os.environ.setdefault("EXTRACTION_WORKERS", "0")
+
+from sqlalchemy import event
+from app import app
+from models import db, Carrier, Quote, Invoice, Tender
+from services.provisioning_service import (DEMO_ORG_ID, CARRIER_COLUMNS, QUOTE_COLUMNS, INVOICE_COLUMNS,
+                                           TENDER_COLUMNS, seed_organization_data)
+from services.schema import upgrade_schema
+
+def legacy_seed(org_id):
+    """The clone this replaced: an ORM object per row, a flush per carrier and quote and a name lookup per carrier."""
+    carrier_map = {}
+    for c in Carrier.query.filter_by(organization_id=DEMO_ORG_ID).all():
+        safe_name = f"{c.name} ({org_id[-6:]})"
+        existing = Carrier.query.filter_by(name=safe_name).first()
+        if existing:
+            carrier_map[c.id] = existing.id
+            continue
+        new_c = Carrier(organization_id=org_id, **{col: getattr(c, col) for col in CARRIER_COLUMNS})
+        new_c.name = safe_name
+        db.session.add(new_c)
+        db.session.flush()
+        carrier_map[c.id] = new_c.id
+
+    quote_map = {}
+    for q in Quote.query.filter_by(organization_id=DEMO_ORG_ID).all():
+        new_q = Quote(organization_id=org_id, **{col: getattr(q, col) for col in QUOTE_COLUMNS})
+        new_q.carrier_id = carrier_map.get(q.carrier_id)
+        db.session.add(new_q)
+        db.session.flush()
+        quote_map[q.id] = new_q.id
+
+    for i in Invoice.query.filter_by(organization_id=DEMO_ORG_ID).all():
+        new_i = Invoice(organization_id=org_id, **{col: getattr(i, col) for col in INVOICE_COLUMNS})
+        new_i.quote_id = quote_map.get(i.quote_id)
+        db.session.add(new_i)
+
+    for t in Tender.query.filter_by(organization_id=DEMO_ORG_ID).all():
+        db.session.add(Tender(organization_id=org_id, **{col: getattr(t, col) for col in TENDER_COLUMNS}))
+
+    db.session.commit()
+    return True
+
+def seed_demo(carriers, quotes, invoices, tenders):
+    start = datetime(2025, 1, 1)
+    db.session.execute(Carrier.__table__.insert(), [
+        {"name": f"Carrier {i}", "organization_id": DEMO_ORG_ID, "tax_id": f"TX{i}", "onboarding_status": "APPROVED"}
+        for i in range(carriers)
+    ])
+    carrier_ids = [c.id for c in Carrier.query.filter_by(organization_id=DEMO_ORG_ID)]
+    db.session.execute(Quote.__table__.insert(), [
+        {"filename": f"quote_{i}.pdf", "organization_id": DEMO_ORG_ID, "carrier_id": carrier_ids[i % carriers],
+         "origin": "Shanghai", "destination": "Rotterdam", "currency": "USD", "total_price": 1000.0 + i,
+         "surcharges": [{"name": "BAF", "amount": 120.0}, {"name": "THC", "amount": 85.0}],
+         "risk_flags": ["Unmapped surcharge"], "full_text_content": "Ocean freight quotation " * 80,
+         "agent_insights": {"auditor": "ok"}, "status": "ALLOCATED", "upload_date": start + timedelta(hours=i)}
+        for i in range(quotes)
+    ])
+    quote_ids = [q.id for q in Quote.query.filter_by(organization_id=DEMO_ORG_ID).with_entities(Quote.id)]
+    db.session.execute(Invoice.__table__.insert(), [
+        {"filename": f"invoice_{i}.pdf", "organization_id": DEMO_ORG_ID, "quote_id": quote_ids[i % quotes],
+         "invoice_number": f"INV-{i}", "total_amount": 1100.0 + i, "currency": "USD", "status": "DISCREPANCY",
+         "discrepancy_details": {"diff": 100.0}, "invoice_date": start + timedelta(hours=i)}
+        for i in range(invoices)
+    ])
+    db.session.execute(Tender.__table__.insert(), [
+        {"title": f"Tender {i}", "organization_id": DEMO_ORG_ID, "lane_info": "Shanghai -> LA",
+         "created_at": start + timedelta(days=i)}
+        for i in range(tenders)
+    ])
+    db.session.commit()
+
+def snapshot(org_id):
+    """The cloned rows, sorted, with foreign keys replaced by what they point at, for comparing the two clones."""
+    carriers = {c.id: c.name for c in Carrier.query.filter_by(organization_id=org_id)}
+    quotes = {q.id: q for q in Quote.query.filter_by(organization_id=org_id)}
+    return repr((
+        sorted(carriers.values()),
+        sorted(repr((carriers.get(q.carrier_id),) + tuple(getattr(q, col) for col in QUOTE_COLUMNS if col != "carrier_id"))
+               for q in quotes.values()),
+        sorted(repr((quotes[i.quote_id].filename if i.quote_id else None,) + tuple(getattr(i, col) for col in INVOICE_COLUMNS if col != "quote_id"))
+               for i in Invoice.query.filter_by(organization_id=org_id)),
+        sorted(repr(tuple(getattr(t, col) for col in TENDER_COLUMNS)) for t in Tender.query.filter_by(organization_id=org_id))
+    ))
+
+def timed_clone(clone, org_id):
+    """Runs one clone; returns (total ms, ms from the first write to the commit, SQL statements)."""
+    thread_id = threading.get_ident()
+    statements = [0]
+    first_write = []
+
+    def count(conn, cursor, statement, *args):
+        if threading.get_ident() != thread_id:
+            return
+        statements[0] += 1
+        if not first_write and statement.lstrip().upper().startswith("INSERT"):
+            first_write.append(time.perf_counter())
+
+    event.listen(db.engine, "before_cursor_execute", count)
+    try:
+        started = time.perf_counter()
+        assert clone(org_id)
+        finished = time.perf_counter()
+    finally:
+        event.remove(db.engine, "before_cursor_execute", count)
+    db.session.remove()
+    return (finished - started) * 1000, (finished - first_write[0]) * 1000, statements[0]
+
+def run(carriers, quotes, invoices, tenders, rounds):
+    """Clones a demo org of the given size with the legacy row-by-row path and the bulk path, `rounds` times each."""
+    upgrade_schema(app)
+    with app.app_context():
+        seed_demo(carriers, quotes, invoices, tenders)
+        print(f"demo org: {carriers} carriers, {quotes} quotes, {invoices} invoices, {tenders} tenders; best of {rounds}")
+        print(f"{'path':<22} {'total_ms':>9} {'write_lock_ms':>14} {'statements':>11}")
+        results = {}
+        for label, slug, clone in [("before: row-by-row", "legacy", legacy_seed), ("after: bulk", "bulk", seed_organization_data)]:
+            runs = [timed_clone(clone, f"org_{slug}_{n:06d}") for n in range(rounds)]
+            results[label] = snapshot(f"org_{slug}_{0:06d}").replace(f"({0:06d})", "")
+            total, lock, statements = min(runs)
+            print(f"{label:<22} {total:>9.1f} {lock:>14.1f} {statements:>11}")
+
+    same = len(set(results.values())) == 1
+    print("clones match" if same else "MISMATCH: the bulk clone differs from the row-by-row clone")
+    return same
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Time new-organization demo data cloning, row-by-row vs bulk.")
+    parser.add_argument("--carriers", type=int, default=50)
+    parser.add_argument("--quotes", type=int, default=2000)
+    parser.add_argument("--invoices", type=int, default=1000)
+    parser.add_argument("--tenders", type=int, default=200)
+    parser.add_argument("--rounds", type=int, default=3)
+    args = parser.parse_args()
+    sys.exit(0 if run(args.carriers, args.quotes, args.invoices, args.tenders, args.rounds) else 1)
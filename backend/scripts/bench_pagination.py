@@ -0,0 +1,114 @@
+import sys
+import os
+import argparse
+import statistics
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+# app.py puts its database and uploads folder in the working directory; keep them in a scratch dir
+os.chdir(tempfile.mkdtemp())
+os.environ.setdefault("EXTRACTION_WORKERS", "0")
+
+from app import app
+from models import db, AuditLog, Quote
+from services.pagination import encode_cursor
+from services.schema import upgrade_schema
+
+ORG_ID = "org_demo_123"
+START = datetime(2020, 1, 1)
+
+def grow(current, target, chunk=50000):
+    """Appends audit log rows for the org until the table holds `target` rows, one second apart."""
+    for low in range(current, target, chunk):
+        db.session.execute(AuditLog.__table__.insert(), [
+            {"action": "QUOTE_UPLOAD", "category": "QUOTE", "details": f"quote_{i}.pdf",
+             "organization_id": ORG_ID, "timestamp": START + timedelta(seconds=i)}
+            for i in range(low, min(low + chunk, target))
+        ])
+        db.session.commit()
+
+def add_quotes(count, text_kb=20, chunk=1000):
+    """Quotes for the org with OCR text and the JSON blobs the detail view returns."""
+    for low in range(0, count, chunk):
+        db.session.execute(Quote.__table__.insert(), [
+            {"filename": f"quote_{i}.pdf", "organization_id": ORG_ID, "origin": "Shanghai", "destination": "Rotterdam",
+             "currency": "USD", "total_price": 1000.0 + i, "normalized_total_price_usd": 1000.0 + i, "status": "DRAFT",
+             "surcharges": [{"name": "BAF", "amount": 120.0}, {"name": "THC", "amount": 85.0}],
+             "agent_insights": {"risk": {"summary": "Rates in line with the lane average. " * 20}},
+             "full_text_content": "x" * (text_kb * 1024), "upload_date": START + timedelta(minutes=i)}
+            for i in range(low, min(low + chunk, count))
+        ])
+        db.session.commit()
+
+def timed(call, repeat):
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        call()
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples)
+
+def run(sizes, limit, repeat):
+    """
+    Times /api/audit-logs pages as the table grows: the first page, a keyset page near the end
+    of the table, and the same deep page fetched with OFFSET for comparison.
+    """
+    upgrade_schema(app)
+    client = app.test_client()
+    print(f"{'rows':>9} {'first_ms':>9} {'deep_cursor_ms':>15} {'deep_offset_ms':>15}")
+    current = 0
+    with app.app_context():
+        for size in sizes:
+            grow(current, size)
+            current = size
+
+            # Newest first: a cursor at row id limit*2 asks for a page next to the oldest end of the table
+            deep_row = AuditLog.query.filter_by(id=limit * 2).first()
+            deep_cursor = encode_cursor([deep_row.timestamp, deep_row.id])
+
+            def first_page():
+                assert client.get(f"/api/audit-logs?limit={limit}").status_code == 200
+
+            def deep_page():
+                response = client.get(f"/api/audit-logs?limit={limit}&cursor={deep_cursor}")
+                assert response.status_code == 200 and len(response.json) == limit
+
+            def offset_page():
+                rows = AuditLog.query.filter_by(organization_id=ORG_ID)\
+                    .order_by(AuditLog.timestamp.desc(), AuditLog.id.desc()).offset(size - limit * 2).limit(limit).all()
+                [r.to_dict() for r in rows]
+
+            print(f"{size:>9} {timed(first_page, repeat):>9.2f} {timed(deep_page, repeat):>15.2f} {timed(offset_page, repeat):>15.2f}")
+            db.session.remove()
+
+def run_quotes(count, limit, repeat):
+    """Times /api/quotes as one full list against one page and one summary page: median ms and response size."""
+    upgrade_schema(app)
+    client = app.test_client()
+    with app.app_context():
+        add_quotes(count)
+        print(f"{'/api/quotes, ' + str(count) + ' quotes':<30} {'ms':>9} {'KB':>9}")
+        for label, url in [("full list", "/api/quotes"), (f"{limit}-row page", f"/api/quotes?limit={limit}"),
+                           (f"{limit}-row summary page", f"/api/quotes?limit={limit}&view=summary")]:
+            size = len(client.get(url).data)
+
+            def fetch():
+                assert client.get(url).status_code == 200
+
+            print(f"{label:<30} {timed(fetch, repeat):>9.1f} {size / 1024:>9.0f}")
+            db.session.remove()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Keyset pagination latency as the audit log grows.")
+    parser.add_argument("--sizes", default="1000,10000,100000,1000000", help="comma-separated row counts")
+    parser.add_argument("--limit", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--quotes", type=int, default=0, help="time /api/quotes pages over this many quotes instead")
+    args = parser.parse_args()
+    if args.quotes:
+        run_quotes(args.quotes, args.limit, max(1, args.repeat // 4))
+    else:
+        run([int(s) for s in args.sizes.split(",")], args.limit, args.repeat)
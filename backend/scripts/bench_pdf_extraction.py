@@ -0,0 +1,58 @@
+import sys
+import os
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import fitz
+from services import ocr_service
+
+LINES_PER_PAGE = 45
+
+def build_pdf(pages):
+    """Synthetic rate sheet: every page is a dense block of tariff lines."""
+    doc = fitz.open()
+    for p in range(pages):
+        page = doc.new_page()
+        lines = [
+            f"Lane {p}-{i}: Shanghai -> Rotterdam 40HC USD {1000 + i * 7:.2f} BAF 120.00 THC 85.00 PSS 300.00"
+            for i in range(LINES_PER_PAGE)
+        ]
+        page.insert_text((36, 36), "\n".join(lines), fontsize=7)
+    data = doc.tobytes()
+    doc.close()
+    return data
+
+def legacy_extract(pdf_bytes):
+    """The pre-sharding implementation, kept here for comparison."""
+    doc = fitz.open(stream=pdf_bytes, filetype="pdf")
+    text = ""
+    for page in doc:
+        text += page.get_text()
+    return text
+
+def timed(fn, *args, repeat=3):
+    best = None
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn(*args)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+def run(sizes=(10, 100, 500)):
+    # Warm the process pool so the first measurement doesn't include spawn cost
+    ocr_service.extract_pages_parallel(build_pdf(ocr_service.MIN_SHARD_PAGES * 2), ocr_service.MIN_SHARD_PAGES * 2)
+
+    print(f"{'pages':>6} {'size_kb':>8} {'legacy_s':>9} {'current_s':>10} {'speedup':>8}")
+    for pages in sizes:
+        pdf = build_pdf(pages)
+        legacy_s, legacy_text = timed(legacy_extract, pdf)
+        current_s, current_text = timed(ocr_service.extract_text_from_pdf, pdf)
+        assert legacy_text == current_text, f"Output mismatch at {pages} pages"
+        print(f"{pages:>6} {len(pdf) // 1024:>8} {legacy_s:>9.3f} {current_s:>10.3f} {legacy_s / current_s:>7.2f}x")
+
+if __name__ == "__main__":
+    sizes = tuple(int(a) for a in sys.argv[1:]) or (10, 100, 500)
+    run(sizes)
@@ -0,0 +1,96 @@
+import sys
+import os
+import argparse
+import statistics
+import tempfile
+import threading
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+# app.py puts its database and uploads folder in the working directory; keep them in a scratch dir
+os.chdir(tempfile.mkdtemp())
+os.environ.setdefault("EXTRACTION_WORKERS", "0")
+
+from sqlalchemy import event
+import app as app_module
+from app import app, get_org_id
+from models import db, Carrier
+from services import provisioning_service
+from services.schema import upgrade_schema
+
+ORG_ID = "org_bench_tenant"
+
+def legacy_check(org_id):
+    # What get_org_id() did before provisioning flags: probe the org's carriers on every request
+    Carrier.query.filter_by(organization_id=org_id).first()
+
+def flag_only(org_id):
+    # The persisted flag without the in-process set (e.g. every request landing on a fresh worker)
+    provisioning_service._provisioned.discard(org_id)
+    provisioning_service.ensure_provisioned(org_id)
+
+MODES = [("before: carrier probe", legacy_check), ("flag lookup", flag_only),
+         ("after: in-process set", provisioning_service.ensure_provisioned)]
+
+def seed(orgs, carriers_per_org):
+    db.session.execute(Carrier.__table__.insert(), [
+        {"name": f"Carrier {i}", "organization_id": f"org_{o}"} for o in range(orgs) for i in range(carriers_per_org)
+    ])
+    db.session.commit()
+
+def measure(client, requests):
+    """Median get_org_id() time (us), median request time (ms) and SQL statements per request."""
+    with app.test_request_context(headers={"X-Organization-ID": ORG_ID}):
+        samples = []
+        for _ in range(requests):
+            started = time.perf_counter()
+            get_org_id()
+            samples.append((time.perf_counter() - started) * 1e6)
+        org_us = statistics.median(samples)
+
+    statements = [0]
+    thread_id = threading.get_ident()
+
+    def count(*args):
+        if threading.get_ident() == thread_id:
+            statements[0] += 1
+
+    event.listen(db.engine, "before_cursor_execute", count)
+    samples = []
+    try:
+        for _ in range(requests):
+            started = time.perf_counter()
+            client.get("/api/audit-logs?limit=1", headers={"X-Organization-ID": ORG_ID})
+            samples.append((time.perf_counter() - started) * 1000)
+    finally:
+        event.remove(db.engine, "before_cursor_execute", count)
+    return org_us, statistics.median(samples), statements[0] / requests
+
+def run(orgs, carriers_per_org, requests):
+    upgrade_schema(app)
+    client = app.test_client()
+    with app.app_context():
+        seed(orgs, carriers_per_org)
+        # First request provisions the tenant (clones the demo data once)
+        print(f"provision {ORG_ID}: {provisioning_service.provision_organization(ORG_ID)}")
+        db.session.remove()
+
+    print(f"{orgs * carriers_per_org} carriers across {orgs} orgs, {requests} requests per mode")
+    print(f"{'mode':<24} {'get_org_id_us':>14} {'request_ms':>11} {'queries/req':>12}")
+    with app.app_context():
+        for label, check in MODES:
+            app_module.ensure_provisioned = check
+            try:
+                org_us, request_ms, queries = measure(client, requests)
+            finally:
+                app_module.ensure_provisioned = provisioning_service.ensure_provisioned
+            print(f"{label:<24} {org_us:>14.1f} {request_ms:>11.3f} {queries:>12.1f}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Per-request cost of the organization provisioning check.")
+    parser.add_argument("--orgs", type=int, default=2000)
+    parser.add_argument("--carriers-per-org", type=int, default=10)
+    parser.add_argument("--requests", type=int, default=2000)
+    args = parser.parse_args()
+    run(args.orgs, args.carriers_per_org, args.requests)
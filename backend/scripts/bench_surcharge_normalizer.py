@@ -0,0 +1,96 @@
+import sys
+import os
+import difflib
+import random
+import string
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from services.surcharge_cache import load_baseline
+from services.surcharge_normalizer import SurchargeIndex, normalize_key
+
+WORDS = ["Bunker", "Terminal", "Handling", "Peak", "Season", "Security", "Port", "Congestion", "Equipment",
+         "Imbalance", "Documentation", "Origin", "Destination", "Delivery", "Emergency", "Fuel", "Canal",
+         "Transit", "Winter", "Carbon", "Emission", "Inspection", "Storage", "Chassis", "Customs", "Manifest"]
+
+def synthetic_dictionary(size, seed=11):
+    """Baseline aliases plus `size` generated org aliases (codes and spelled-out names)."""
+    rng = random.Random(seed)
+    dictionary = dict(load_baseline())
+    while len(dictionary) < size:
+        if rng.random() < 0.5:
+            alias = "".join(rng.choices(string.ascii_uppercase, k=rng.randint(3, 5))) + str(rng.randint(0, 99))
+        else:
+            alias = " ".join(rng.sample(WORDS, rng.randint(2, 4))) + f" {rng.choice(['Surcharge', 'Fee', 'Charge'])}"
+        dictionary[alias] = {"normalized": f"Standard {len(dictionary)}", "category": rng.choice(["Fuel", "Handling", "Security"])}
+    return dictionary
+
+def _typo(alias, rng):
+    i = rng.randrange(len(alias))
+    return alias[:i] + alias[i + 1:] if rng.random() < 0.5 else alias[:i] + rng.choice(string.ascii_lowercase) + alias[i:]
+
+def build_queries(dictionary, count=5000, seed=5):
+    """
+    Mix of exact, embedded-code, one-typo and unknown names, each with the alias it should map to.
+    Generated names reuse a small vocabulary, so some typos are genuinely closer to another alias.
+    """
+    rng = random.Random(seed)
+    aliases = list(dictionary)
+    long_aliases = [a for a in aliases if len(a) > 12]
+    queries = []
+    for _ in range(count):
+        kind = rng.random()
+        if kind < 0.4:
+            alias = rng.choice(aliases)
+            queries.append(("exact", alias.lower(), alias))
+        elif kind < 0.6:
+            code = rng.choice(['BAF', 'THC', 'PSS'])
+            queries.append(("contains", f"{code} - {rng.choice(['origin', 'per box', 'adjusted'])}", code))
+        elif kind < 0.85:
+            alias = rng.choice(long_aliases)
+            queries.append(("typo", _typo(alias, rng), alias))
+        else:
+            queries.append(("miss", "".join(rng.choices(string.ascii_uppercase + " ", k=rng.randint(6, 20))), None))
+    return queries
+
+def naive_match(raw_name, keys):
+    # What an unindexed approach does: fuzzy-compare against every alias
+    return difflib.get_close_matches(normalize_key(raw_name), keys, n=1, cutoff=0.75)
+
+def run(sizes=(1000, 10000, 50000)):
+    print(f"{'aliases':>8} {'build_ms':>9} {'queries/s':>10} {'us/query':>9} {'naive_us':>9} {'correct':>8}  correct by kind")
+    for size in sizes:
+        dictionary = synthetic_dictionary(size)
+        start = time.perf_counter()
+        index = SurchargeIndex(dictionary)
+        build_ms = (time.perf_counter() - start) * 1000
+
+        queries = build_queries(dictionary)
+        start = time.perf_counter()
+        results = [index.match(raw_name)[0] for _, raw_name, _ in queries]
+        elapsed = time.perf_counter() - start
+
+        # Correct = mapped to the alias the query was generated from (misses must stay unmapped)
+        correct, by_kind = 0, {}
+        for (kind, _, expected), entry in zip(queries, results):
+            ok = entry is None if expected is None else entry is dictionary[expected]
+            correct += ok
+            by_kind.setdefault(kind, [0, 0])
+            by_kind[kind][0] += ok
+            by_kind[kind][1] += 1
+
+        # Naive baseline on a small sample only; it is orders of magnitude slower
+        keys = [normalize_key(a) for a in dictionary]
+        sample = queries[:50]
+        naive_start = time.perf_counter()
+        for _, raw_name, _ in sample:
+            naive_match(raw_name, keys)
+        naive_us = (time.perf_counter() - naive_start) / len(sample) * 1e6
+
+        kinds = " ".join(f"{k}={m}/{n}" for k, (m, n) in sorted(by_kind.items()))
+        print(f"{len(index):>8} {build_ms:>9.0f} {len(queries) / elapsed:>10.0f} {elapsed / len(queries) * 1e6:>9.1f} "
+              f"{naive_us:>9.0f} {correct / len(queries):>8.3f}  {kinds}")
+
+if __name__ == "__main__":
+    run(tuple(int(a) for a in sys.argv[1:]) or (1000, 10000, 50000))
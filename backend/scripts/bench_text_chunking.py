@@ -0,0 +1,82 @@
+import sys
+import os
+import json
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from services import text_chunking
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'data', 'fixtures', 'quotes')
+SURCHARGE_CODES = ["BAF", "GRI", "PSS", "LSS", "THC", "DTHC", "OTHC", "ISPS", "AMS", "CAF", "DOC", "WRS", "EIS", "DDC"]
+
+def load_corpus():
+    with open(os.path.join(FIXTURES_DIR, 'expected.json')) as f:
+        expected = json.load(f)
+    corpus = {}
+    for name in sorted(expected):
+        with open(os.path.join(FIXTURES_DIR, f"{name}.txt")) as f:
+            corpus[name] = f.read()
+    return corpus, expected
+
+def ground_truth_recall(text, truth):
+    """Share of expected field values still present in the text sent to the model."""
+    needles = [truth["carrier"].upper(), truth["origin"], truth["destination"], truth["currency"], f"{truth['total_price']:,.2f}"]
+    needles += [f"\n{code} " for code in truth["surcharges"]]
+    haystack = "\n" + text
+    return sum(1 for n in needles if n in haystack or n in haystack.upper()) / len(needles)
+
+def llm_accuracy(data, truth):
+    """Share of expected fields the LLM got right (surcharges scored as a set)."""
+    if "error" in data:
+        return 0.0
+    checks = [
+        truth["origin"].lower() in str(data.get("origin", "")).lower(),
+        truth["destination"].lower() in str(data.get("destination", "")).lower(),
+        abs(float(data.get("total_price") or 0) - truth["total_price"]) < 0.01,
+        str(data.get("currency", "")).upper() == truth["currency"],
+        {s.get("raw_name", "").upper() for s in data.get("surcharges", [])} >= set(truth["surcharges"])
+    ]
+    return sum(checks) / len(checks)
+
+def run(budgets=(100, 250, 500, 1000, 3000)):
+    corpus, expected = load_corpus()
+    print(f"{'fixture':<28} {'budget':>6} {'tokens':>7} {'sent':>6} {'kept':>7} {'recall':>7} {'ms':>6}")
+    for budget in budgets:
+        for name, text in corpus.items():
+            start = time.perf_counter()
+            selected, stats = text_chunking.select_relevant_text(text, budget=budget, surcharge_codes=SURCHARGE_CODES)
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            kept = f"{stats['kept_sections']}/{stats['sections']}" if stats["sections"] else "all"
+            print(f"{name:<28} {budget:>6} {stats['original_tokens']:>7} {stats['sent_tokens']:>6} {kept:>7} "
+                  f"{ground_truth_recall(selected, expected[name]):>7.2f} {elapsed_ms:>6.1f}")
+
+def run_llm(budget=None):
+    """Full text vs trimmed text through extract_data_with_llm. Needs OPENAI_API_KEY."""
+    from flask import Flask
+    from models import db
+    from services.llm_service import extract_data_with_llm
+
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+    db.init_app(app)
+    corpus, expected = load_corpus()
+    if budget:
+        text_chunking.TOKEN_BUDGET = budget
+    print(f"{'fixture':<28} {'mode':>8} {'accuracy':>9} {'seconds':>8}")
+    with app.app_context():
+        db.create_all()
+        for name, text in corpus.items():
+            for enabled in (False, True):
+                text_chunking.CHUNKING_ENABLED = enabled
+                start = time.perf_counter()
+                data = extract_data_with_llm(text)
+                elapsed = time.perf_counter() - start
+                print(f"{name:<28} {'trimmed' if enabled else 'full':>8} {llm_accuracy(data, expected[name]):>9.2f} {elapsed:>8.2f}")
+
+if __name__ == "__main__":
+    if "--llm" in sys.argv:
+        args = [a for a in sys.argv[1:] if a != "--llm"]
+        run_llm(int(args[0]) if args else None)
+    else:
+        run()
@@ -0,0 +1,104 @@
+import sys
+import os
+import json
+import resource
+import subprocess
+import tempfile
+import threading
+import tracemalloc
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import fitz
+from services.ocr_service import extract_text_from_pdf
+from services.upload_service import stream_to_disk
+
+def build_pdf(path, size_mb):
+    """Quote PDF padded with incompressible scan images until it reaches ~size_mb."""
+    doc = fitz.open()
+    while True:
+        page = doc.new_page()
+        page.insert_text((36, 36), "Ocean Freight Shanghai -> Rotterdam USD 2450.00 BAF 120.00", fontsize=10)
+        pix = fitz.Pixmap(fitz.csRGB, fitz.IRect(0, 0, 512, 512))
+        pix.set_rect(pix.irect, (0, 0, 0))
+        pix.samples_mv[:] = os.urandom(len(pix.samples_mv))
+        page.insert_image(fitz.Rect(36, 60, 560, 580), pixmap=pix)
+        if len(doc.tobytes()) >= size_mb * 1024 * 1024:
+            break
+    doc.save(path)
+
+def legacy_upload(src, dest):
+    # Pre-streaming handler: whole body in memory, written out, then parsed from bytes
+    with open(src, 'rb') as f:
+        pdf_bytes = f.read()
+    with open(dest, 'wb') as out:
+        out.write(pdf_bytes)
+    doc = fitz.open(stream=pdf_bytes, filetype="pdf")
+    "".join(page.get_text() for page in doc)
+    doc.close()
+
+def streaming_upload(src, dest):
+    with open(src, 'rb') as f:
+        stream_to_disk(f, dest)
+    extract_text_from_pdf(dest)
+
+def _rss_anon_kb():
+    # Anonymous (heap) RSS only: mapped file pages are clean and reclaimable, so they are reported apart
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("RssAnon:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return 0
+
+def run_child(mode, src, concurrency):
+    handler = legacy_upload if mode == "legacy" else streaming_upload
+    workdir = tempfile.mkdtemp()
+    peak_anon = [0]
+    done = threading.Event()
+
+    def sample():
+        while not done.is_set():
+            peak_anon[0] = max(peak_anon[0], _rss_anon_kb())
+            done.wait(0.005)
+
+    sampler = threading.Thread(target=sample, daemon=True)
+    sampler.start()
+    tracemalloc.start()
+    threads = [
+        threading.Thread(target=handler, args=(src, os.path.join(workdir, f"upload_{i}.pdf")))
+        for i in range(concurrency)
+    ]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    _, peak = tracemalloc.get_traced_memory()
+    done.set()
+    sampler.join()
+    print(json.dumps({
+        "python_peak_mb": round(peak / 1024 / 1024, 1),
+        "peak_anon_rss_mb": round(peak_anon[0] / 1024, 1),
+        "max_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+    }))
+
+def run(size_mb=20, concurrency=8):
+    src = os.path.join(tempfile.mkdtemp(), "upload.pdf")
+    build_pdf(src, size_mb)
+    print(f"{concurrency} concurrent uploads of {os.path.getsize(src) / 1024 / 1024:.1f} MB")
+    print(f"{'mode':>10} {'python_peak_mb':>15} {'peak_anon_rss_mb':>17} {'max_rss_mb':>11}")
+    for mode in ("legacy", "streaming"):
+        # Separate process per mode so max RSS is not shared between runs
+        out = subprocess.check_output([sys.executable, __file__, "--child", mode, src, str(concurrency)])
+        result = json.loads(out.decode().strip().splitlines()[-1])
+        print(f"{mode:>10} {result['python_peak_mb']:>15} {result['peak_anon_rss_mb']:>17} {result['max_rss_mb']:>11}")
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "--child":
+        run_child(sys.argv[2], sys.argv[3], int(sys.argv[4]))
+    else:
+        size_mb = float(sys.argv[1]) if len(sys.argv) > 1 else 20
+        concurrency = int(sys.argv[2]) if len(sys.argv) > 2 else 8
+        run(size_mb, concurrency)
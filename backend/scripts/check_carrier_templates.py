@@ -0,0 +1,52 @@
+import sys
+import os
+import json
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from services import template_parser
+from services.surcharge_cache import load_baseline
+from services.surcharge_normalizer import SurchargeIndex
+
+def run(path=None, repeat=1000):
+    """
+    Parses every template's sample text and checks it fingerprints to itself at full confidence.
+    Exits non-zero on a failing template so it can gate edits to carrier_templates.json.
+    """
+    path = path or template_parser.TEMPLATES_PATH
+    with open(path) as f:
+        raw = {t["id"]: t for t in json.load(f)}
+    templates = template_parser.load_templates(path)
+    dictionary = SurchargeIndex(load_baseline())
+    failures = 0
+
+    print(f"{'template':<24} {'match':>6} {'conf':>5} {'surch':>6} {'flagged':>8} {'us/parse':>9}")
+    for template in templates:
+        sample = raw[template["id"]].get("sample", "")
+        matched = template_parser.fingerprint(sample, templates)
+        data, confidence = template_parser.parse_with_template(template, sample, dictionary)
+
+        start = time.perf_counter()
+        for _ in range(repeat):
+            template_parser.parse_with_template(template, sample, dictionary)
+        per_parse_us = (time.perf_counter() - start) / repeat * 1e6
+
+        ok = matched is template and confidence >= template_parser.MIN_CONFIDENCE
+        failures += not ok
+        flagged = sum(1 for s in data["surcharges"] if s["flagged"])
+        print(f"{template['id']:<24} {'yes' if matched is template else 'NO':>6} {confidence:>5.2f} "
+              f"{len(data['surcharges']):>6} {flagged:>8} {per_parse_us:>9.1f}")
+        if not ok:
+            print(f"  -> {json.dumps(data)}")
+
+    unknown = "Generic Forwarder Ltd\nRate sheet\nOrigin Shanghai\nTotal USD 100.00\n"
+    if template_parser.fingerprint(unknown, templates):
+        print("Unknown layout was fingerprinted as a carrier template")
+        failures += 1
+
+    print(f"{len(templates) - failures}/{len(templates)} templates OK")
+    return failures
+
+if __name__ == "__main__":
+    sys.exit(1 if run(sys.argv[1] if len(sys.argv) > 1 else None) else 0)
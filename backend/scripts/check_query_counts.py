@@ -0,0 +1,98 @@
+import sys
+import os
+import tempfile
+import threading
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+# app.py puts its database and uploads folder in the working directory; keep them in a scratch dir
+os.chdir(tempfile.mkdtemp())
+os.environ.setdefault("EXTRACTION_WORKERS", "0")
+
+from sqlalchemy import event
+from app import app
+from models import db, Bid, Carrier, Comment, InventoryImpact, Invoice, Quote, SKU, Tender
+from services.schema import upgrade_schema
+
+ORG_ID = "org_demo_123"
+SIZES = (5, 50)
+
+def list_endpoints():
+    """(label, path) for list endpoints whose query count must not grow with the number of rows."""
+    tender_id = Tender.query.filter_by(organization_id=ORG_ID).first().id
+    return [
+        ("quotes", "/api/quotes"),
+        ("reconcile matches", "/api/reconcile/matches"),
+        ("tenders", "/api/tenders"),
+        ("tender bids", f"/api/tenders/{tender_id}/bids"),
+        ("executive analytics", "/api/analytics/executive"),
+        ("inventory status", "/api/inventory/status")
+    ]
+
+def seed(rows):
+    """Adds `rows` linked carriers, quotes (with comments), invoices, tenders (with bids) and SKUs (with impacts)."""
+    first_tender = Tender.query.filter_by(organization_id=ORG_ID).first()
+    start = Carrier.query.count()
+    for i in range(start, start + rows):
+        carrier = Carrier(name=f"Carrier {i}", organization_id=ORG_ID)
+        quote = Quote(filename=f"q{i}.pdf", organization_id=ORG_ID, carrier=carrier, origin="Shanghai",
+                      destination="Los Angeles", normalized_total_price_usd=1500 + i, status="ALLOCATED")
+        tender = Tender(title=f"Tender {i}", organization_id=ORG_ID)
+        sku = SKU(name=f"SKU {i}", code=f"SKU-{i}", organization_id=ORG_ID)
+        db.session.add_all([
+            carrier, quote, tender, sku,
+            Comment(quote=quote, user_id="u", organization_id=ORG_ID, content="ok"),
+            Invoice(filename=f"i{i}.pdf", organization_id=ORG_ID, quote=quote, total_amount=1500 + i),
+            Bid(tender=first_tender or tender, carrier=carrier, offered_rate=1000 + i, organization_id=ORG_ID),
+            Bid(tender=tender, carrier=carrier, offered_rate=1200 + i, organization_id=ORG_ID),
+            InventoryImpact(organization_id=ORG_ID, sku=sku, quote=quote, quantity=10)
+        ])
+        first_tender = first_tender or tender
+    db.session.commit()
+
+def count_queries(client, path):
+    statements = []
+    thread_id = threading.get_ident()
+
+    def record(conn, cursor, statement, *args):
+        # Only this request's statements, not background threads
+        if threading.get_ident() == thread_id:
+            statements.append(statement)
+
+    event.listen(db.engine, "before_cursor_execute", record)
+    try:
+        response = client.get(path)
+    finally:
+        event.remove(db.engine, "before_cursor_execute", record)
+    if response.status_code != 200:
+        raise RuntimeError(f"{path} returned {response.status_code}: {response.get_data(as_text=True)[:200]}")
+    return len(statements)
+
+def run():
+    """
+    Calls each list endpoint at two table sizes and compares the number of SQL statements.
+    Exits non-zero if any endpoint issues more queries for more rows (an N+1).
+    """
+    upgrade_schema(app)
+    client = app.test_client()
+    counts = {}
+    with app.app_context():
+        seeded = 0
+        for size in SIZES:
+            seed(size - seeded)
+            seeded = size
+            for label, path in list_endpoints():
+                counts.setdefault(label, []).append(count_queries(client, path))
+            db.session.remove()
+
+    failures = 0
+    print(f"{'endpoint':<22} " + " ".join(f"{f'{n} rows':>8}" for n in SIZES) + f" {'ok':>4}")
+    for label, per_size in counts.items():
+        ok = len(set(per_size)) == 1
+        failures += not ok
+        print(f"{label:<22} " + " ".join(f"{n:>8}" for n in per_size) + f" {'yes' if ok else 'NO':>4}")
+    print(f"{'FAILED' if failures else 'OK'}: {failures} endpoint(s) scale their query count with rows")
+    return failures
+
+if __name__ == "__main__":
+    sys.exit(1 if run() else 0)
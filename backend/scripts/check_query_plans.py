@@ -0,0 +1,117 @@
+import sys
+import os
+import re
+import tempfile
+from datetime import datetime
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from flask import Flask
+from flask_migrate import Migrate
+from alembic.autogenerate import compare_metadata
+from alembic.migration import MigrationContext
+from sqlalchemy import func, or_
+from models import db, AuditLog, Bid, Carrier, Comment, ExchangeRate, ExtractionJob, InventoryImpact, Invoice, Quote, SKU, SurchargeReference, Tender
+from services.pagination import encode_cursor, keyset_query
+from services.schema import MIGRATIONS_DIR, upgrade_schema
+
+ORG_ID = "org_plan_check"
+QUOTE_ORDER = [(Quote.upload_date, True), (Quote.id, True)]
+DATE_CURSOR = encode_cursor([datetime(2025, 1, 1), 500])
+NAME_CURSOR = encode_cursor(["M", 500])
+# EXPLAIN QUERY PLAN lines that mean every row (or every index entry) is visited, or the result is sorted in a temp b-tree
+FULL_SCAN = re.compile(r"^SCAN (?!CONSTANT ROW)")
+TEMP_SORT = re.compile(r"USE TEMP B-TREE FOR ORDER BY")
+
+def hot_queries():
+    """(label, query) for the org-scoped filters the API runs on every page load."""
+    return [
+        ("audit logs", AuditLog.query.filter_by(organization_id=ORG_ID).order_by(AuditLog.timestamp.desc()).limit(100)),
+        ("audit logs by category", AuditLog.query.filter_by(organization_id=ORG_ID, category="QUOTE")
+            .order_by(AuditLog.timestamp.desc()).limit(100)),
+        ("quotes", Quote.query.filter_by(organization_id=ORG_ID).order_by(Quote.upload_date.desc())),
+        ("quotes page", keyset_query(Quote.query.filter_by(organization_id=ORG_ID), QUOTE_ORDER, DATE_CURSOR)),
+        ("quotes page by status", keyset_query(Quote.query.filter_by(organization_id=ORG_ID)
+            .filter(Quote.status.in_(["ALLOCATED"])), QUOTE_ORDER, DATE_CURSOR)),
+        ("quotes page by lane", keyset_query(Quote.query.filter_by(organization_id=ORG_ID, origin="Shanghai", destination="Rotterdam"),
+            QUOTE_ORDER, DATE_CURSOR)),
+        ("quotes page by carrier", keyset_query(Quote.query.filter_by(organization_id=ORG_ID, carrier_id=3), QUOTE_ORDER, DATE_CURSOR)),
+        ("quotes page by date", keyset_query(Quote.query.filter_by(organization_id=ORG_ID)
+            .filter(Quote.upload_date >= datetime(2024, 1, 1), Quote.upload_date < datetime(2024, 7, 1)), QUOTE_ORDER)),
+        ("page comment counts", Comment.query.filter(Comment.quote_id.in_([1, 2, 3]))
+            .with_entities(Comment.quote_id, func.count(Comment.id)).group_by(Comment.quote_id)),
+        ("audit logs page", keyset_query(AuditLog.query.filter_by(organization_id=ORG_ID, category="QUOTE"),
+            [(AuditLog.timestamp, True), (AuditLog.id, True)], DATE_CURSOR)),
+        ("invoices page", keyset_query(Invoice.query.filter_by(organization_id=ORG_ID),
+            [(Invoice.invoice_date, True), (Invoice.id, True)], DATE_CURSOR)),
+        ("tenders page", keyset_query(Tender.query.filter_by(organization_id=ORG_ID),
+            [(Tender.created_at, True), (Tender.id, True)], DATE_CURSOR)),
+        ("page bid counts", Bid.query.filter(Bid.tender_id.in_([1, 2, 3]))
+            .with_entities(Bid.tender_id, func.count(Bid.id)).group_by(Bid.tender_id)),
+        ("carriers page", keyset_query(Carrier.query.filter_by(organization_id=ORG_ID),
+            [(Carrier.name, False), (Carrier.id, False)], NAME_CURSOR)),
+        ("skus page", keyset_query(SKU.query.filter_by(organization_id=ORG_ID), [(SKU.name, False), (SKU.id, False)], NAME_CURSOR)),
+        ("surcharges page", keyset_query(SurchargeReference.query, [(SurchargeReference.id, False)], encode_cursor([500]))),
+        ("rates page", keyset_query(ExchangeRate.query, [(ExchangeRate.currency_code, False)], encode_cursor(["EUR"]))),
+        ("quote count", Quote.query.filter_by(organization_id=ORG_ID).with_entities(func.count(Quote.id))),
+        ("quotes allocated/booked", Quote.query.filter_by(organization_id=ORG_ID).filter(Quote.status.in_(["ALLOCATED", "BOOKED"]))),
+        ("lane history", Quote.query.filter_by(organization_id=ORG_ID, origin="Shanghai", destination="Rotterdam")
+            .with_entities(Quote.normalized_total_price_usd, Quote.agent_insights)
+            .order_by(Quote.upload_date.desc()).limit(20)),
+        ("quote comments", Comment.query.filter_by(quote_id=1).order_by(Comment.timestamp.asc())),
+        ("invoices", Invoice.query.filter_by(organization_id=ORG_ID).order_by(Invoice.invoice_date.desc())),
+        ("invoices by status", Invoice.query.filter_by(organization_id=ORG_ID, status="DISCREPANCY")),
+        ("tenders", Tender.query.filter_by(organization_id=ORG_ID).order_by(Tender.created_at.desc())),
+        ("tender bids", Bid.query.filter_by(tender_id=1).order_by(Bid.offered_rate.asc())),
+        ("carriers", Carrier.query.filter_by(organization_id=ORG_ID)),
+        ("carrier by name", Carrier.query.filter_by(name="Maersk", organization_id=ORG_ID)),
+        ("skus", SKU.query.filter_by(organization_id=ORG_ID)),
+        ("incoming stock", InventoryImpact.query.filter_by(sku_id=1, status="IN_TRANSIT")),
+        ("job claim", ExtractionJob.query.filter_by(status="QUEUED", batch_id=None)
+            .filter(or_(ExtractionJob.started_at.is_(None), ExtractionJob.started_at < datetime(2025, 1, 1)))
+            .order_by(ExtractionJob.created_at.asc()).limit(5)),
+        ("batch jobs", ExtractionJob.query.filter_by(batch_id="b1", status="QUEUED"))
+    ]
+
+def explain(query):
+    compiled = query.statement.compile(dialect=db.engine.dialect, compile_kwargs={"render_postcompile": True})
+    params = tuple(compiled.params[name] for name in compiled.positiontup)
+    with db.engine.connect() as conn:
+        return [row[-1] for row in conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {compiled.string}", params)]
+
+def schema_drift():
+    """Differences between models.py and the schema the migrations build (tables, columns, indexes)."""
+    with db.engine.connect() as conn:
+        return compare_metadata(MigrationContext.configure(conn), db.metadata)
+
+def run(verbose=False):
+    """
+    Builds a scratch database from migrations/ and runs EXPLAIN QUERY PLAN on every hot query.
+    Exits non-zero if one falls back to a full scan or a temp sort, or if the migrated schema differs from models.py.
+    """
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'plans.db')}"
+    db.init_app(app)
+    Migrate(app, db, directory=MIGRATIONS_DIR)
+    upgrade_schema(app)
+
+    failures = 0
+    with app.app_context():
+        for diff in schema_drift():
+            print(f"models.py and migrations/ disagree (flask db migrate): {diff}")
+            failures += 1
+
+        print(f"{'query':<26} {'ok':>4}  plan")
+        for label, query in hot_queries():
+            plan = explain(query)
+            bad = [line for line in plan if FULL_SCAN.search(line) or TEMP_SORT.search(line)]
+            failures += bool(bad)
+            print(f"{label:<26} {'NO' if bad else 'yes':>4}  {' | '.join(plan)}")
+            if bad and verbose:
+                print(f"  -> {query.statement}")
+
+    print(f"{'FAILED' if failures else 'OK'}: {failures} problem(s)")
+    return failures
+
+if __name__ == "__main__":
+    sys.exit(1 if run("-v" in sys.argv) else 0)
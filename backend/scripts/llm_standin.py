@@ -0,0 +1,201 @@
+import sys
+import os
+import argparse
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+FIXTURES_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'data', 'fixtures', 'llm_standin.json'))
+# Characters per streamed delta when a client asks for stream=true
+STREAM_CHUNK_CHARS = 24
+# Share of a streamed response's latency spent before the first delta; the rest is spread over the deltas
+STREAM_FIRST_TOKEN_SHARE = 0.3
+
+class StandinState:
+    """
+    Routes, latency/error settings and counters shared by all handler threads.
+    Latency jitter and error injection come from one seeded RNG, so a given seed
+    reproduces the same sequence of delays and failures.
+    """
+    def __init__(self, fixtures_path=None, latency_scale=1.0, jitter=0.2, error_rate=0.0, seed=7):
+        with open(fixtures_path or FIXTURES_PATH) as f:
+            self.routes = [{**r, "pattern": re.compile(r["match"], re.IGNORECASE)} for r in json.load(f)]
+        self.latency_scale = latency_scale
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.counts = {}
+
+    def route(self, prompt):
+        for route in self.routes:
+            if route["pattern"].search(prompt):
+                return route
+        return {"name": "unmatched", "latency_ms": 0, "response": {}}
+
+    def respond(self, route, prompt):
+        """Fixture content for a prompt; with several responses the prompt hash picks one, so replays match."""
+        if "responses" in route:
+            digest = int(hashlib.sha1(prompt.encode()).hexdigest(), 16)
+            response = route["responses"][digest % len(route["responses"])]
+        else:
+            response = route.get("response", {})
+        return response if isinstance(response, str) else json.dumps(response)
+
+    def draw(self, route):
+        # 1. Latency around the route's baseline, 2. Whether to inject a failure
+        with self.lock:
+            spread = self.rng.uniform(-self.jitter, self.jitter)
+            fail = self.rng.random() < self.error_rate
+            status = self.rng.choice((429, 500)) if fail else 200
+        return max(route.get("latency_ms", 0) * self.latency_scale * (1 + spread), 0) / 1000, status
+
+    def record(self, name, status, elapsed_s):
+        with self.lock:
+            bucket = self.counts.setdefault(name, {"requests": 0, "errors": 0, "total_ms": 0.0})
+            bucket["requests"] += 1
+            bucket["errors"] += status != 200
+            bucket["total_ms"] += elapsed_s * 1000
+
+    def stats(self):
+        with self.lock:
+            return {
+                "latency_scale": self.latency_scale,
+                "jitter": self.jitter,
+                "error_rate": self.error_rate,
+                "routes": {name: {**b, "avg_ms": round(b["total_ms"] / b["requests"], 1)} for name, b in self.counts.items()}
+            }
+
+def _estimate_tokens(text):
+    return max(len(text) // 4, 1)
+
+class StandinHandler(BaseHTTPRequestHandler):
+    # Keep-alive, so the shared client pool behaves the way it does against the real API
+    protocol_version = "HTTP/1.1"
+    state = None
+
+    def _send_json(self, status, payload):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path.rstrip("/").endswith("/stats"):
+            return self._send_json(200, self.state.stats())
+        if self.path.rstrip("/").endswith("/models"):
+            return self._send_json(200, {"object": "list", "data": [{"id": "gpt-4o", "object": "model"}]})
+        self._send_json(404, {"error": {"message": "Not found"}})
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        try:
+            request = json.loads(self.rfile.read(length) or b"{}")
+        except ValueError:
+            return self._send_json(400, {"error": {"message": "Invalid JSON", "type": "invalid_request_error"}})
+        if not self.path.rstrip("/").endswith("/chat/completions"):
+            return self._send_json(404, {"error": {"message": "Not found"}})
+
+        prompt = "\n".join(str(m.get("content", "")) for m in request.get("messages", []))
+        route = self.state.route(prompt)
+        delay, status = self.state.draw(route)
+        streaming = request.get("stream") and status == 200
+        time.sleep(delay * STREAM_FIRST_TOKEN_SHARE if streaming else delay)
+        self.state.record(route["name"], status, delay)
+
+        if status != 200:
+            error_type = "rate_limit_error" if status == 429 else "server_error"
+            return self._send_json(status, {"error": {"message": f"Injected {status} from stand-in", "type": error_type}})
+
+        content = self.state.respond(route, prompt)
+        model = request.get("model", "gpt-4o")
+        if streaming:
+            return self._stream(model, content, delay * (1 - STREAM_FIRST_TOKEN_SHARE))
+        self._send_json(200, {
+            "id": f"chatcmpl-standin-{route['name']}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": model,
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+            "usage": {
+                "prompt_tokens": _estimate_tokens(prompt),
+                "completion_tokens": _estimate_tokens(content),
+                "total_tokens": _estimate_tokens(prompt) + _estimate_tokens(content)
+            }
+        })
+
+    def _stream(self, model, content, spread_s):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        pieces = [content[i:i + STREAM_CHUNK_CHARS] for i in range(0, len(content), STREAM_CHUNK_CHARS)]
+        for i, piece in enumerate(pieces + [None]):
+            if i:
+                time.sleep(spread_s / len(pieces))
+            delta = {"content": piece} if piece is not None else {}
+            if i == 0:
+                delta["role"] = "assistant"
+            chunk = {
+                "id": "chatcmpl-standin", "object": "chat.completion.chunk", "created": int(time.time()), "model": model,
+                "choices": [{"index": 0, "delta": delta, "finish_reason": None if piece is not None else "stop"}]
+            }
+            self._write_chunk(f"data: {json.dumps(chunk)}\n\n")
+        self._write_chunk("data: [DONE]\n\n")
+        self.wfile.write(b"0\r\n\r\n")
+
+    def _write_chunk(self, text):
+        data = text.encode()
+        self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+        self.wfile.flush()
+
+    def log_message(self, format, *args):
+        pass
+
+class StandinServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        # Clients that time out hang up mid-response; that is expected under load tests
+        if isinstance(sys.exc_info()[1], ConnectionError):
+            return
+        super().handle_error(request, client_address)
+
+def make_server(host="127.0.0.1", port=8089, **settings):
+    """
+    OpenAI-compatible /v1/chat/completions stand-in. Port 0 picks a free port.
+    Call serve_forever() (e.g. in a daemon thread) and point LLM_BASE_URL at http://host:port/v1.
+    """
+    handler = type("BoundStandinHandler", (StandinHandler,), {"state": StandinState(**settings)})
+    return StandinServer((host, port), handler)
+
+def start_in_background(**settings):
+    """Starts a stand-in on a free port in a daemon thread. Returns (server, base_url)."""
+    server = make_server(port=0, **settings)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_port}/v1"
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Offline OpenAI-compatible stand-in for benchmarks.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument("--fixtures", default=None, help="routes JSON (default data/fixtures/llm_standin.json)")
+    parser.add_argument("--latency-scale", type=float, default=1.0, help="multiplier on each route's latency_ms; 0 disables")
+    parser.add_argument("--jitter", type=float, default=0.2, help="+/- fraction applied to each delay")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of requests answered with 429/500")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    server = make_server(args.host, args.port, fixtures_path=args.fixtures, latency_scale=args.latency_scale,
+                         jitter=args.jitter, error_rate=args.error_rate, seed=args.seed)
+    print(f"LLM stand-in on http://{args.host}:{server.server_port}/v1 (set LLM_BASE_URL to this)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
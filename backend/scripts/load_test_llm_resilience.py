@@ -0,0 +1,91 @@
+import sys
+import os
+import argparse
+import threading
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from llm_standin import start_in_background
+
+def _percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(int(len(ordered) * pct), len(ordered) - 1)] if ordered else 0.0
+
+def run(calls, concurrency, orgs, latency_scale, error_rate, deadline, recover_after):
+    """
+    Fires booking-email drafts at a slow stand-in from many threads and reports how long callers
+    waited, how many got the template fallback, and what the breaker did.
+    """
+    server, base_url = start_in_background(latency_scale=latency_scale, error_rate=error_rate)
+    # Must be set before the LLM modules are imported
+    os.environ["LLM_BASE_URL"] = base_url
+    os.environ["LLM_CALL_DEADLINE_SECONDS"] = str(deadline)
+
+    from services.llm_clients import get_chat_model
+    from services.llm_service import generate_booking_email
+    from services.llm_resilience import get_resilience_stats, BREAKER_COOLDOWN_SECONDS
+
+    # Build the shared client up front, as a warmed-up server process would have it
+    get_chat_model(temperature=0.7, model_name="gpt-4o")
+
+    quote = {"carrier": "Evergreen Line", "origin": "Shanghai", "destination": "Rotterdam", "total_price": 2255, "currency": "USD"}
+
+    def phase(label):
+        results, lock, next_index = [], threading.Lock(), [0]
+
+        def worker():
+            while True:
+                with lock:
+                    i = next_index[0]
+                    next_index[0] += 1
+                if i >= calls:
+                    return
+                started = time.perf_counter()
+                email = generate_booking_email(quote, f"org_load_{i % orgs}")
+                outcome = "fallback" if email.get("fallback") else "error" if "error" in email else "llm"
+                with lock:
+                    results.append((time.perf_counter() - started, outcome))
+
+        started = time.perf_counter()
+        threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        elapsed = time.perf_counter() - started
+
+        waits = [w for w, _ in results]
+        counts = {k: sum(1 for _, o in results if o == k) for k in ("llm", "fallback", "error")}
+        stats = get_resilience_stats()
+        print(f"{label:<10} {elapsed:>7.2f} {_percentile(waits, 0.5):>7.2f} {_percentile(waits, 0.95):>7.2f} {max(waits):>7.2f} "
+              f"{counts['llm']:>5} {counts['fallback']:>8} {counts['error']:>6} {stats['breaker']['state']:>10} "
+              f"{stats['breaker_rejected']:>9} {stats['slot_timeouts']:>6} {stats['retries']:>7}")
+
+    print(f"stand-in latency_scale={latency_scale} error_rate={error_rate}, deadline={deadline}s, "
+          f"{calls} calls x {concurrency} threads over {orgs} orgs")
+    print(f"{'phase':<10} {'wall_s':>7} {'p50_s':>7} {'p95_s':>7} {'max_s':>7} {'llm':>5} {'fallback':>8} {'error':>6} "
+          f"{'breaker':>10} {'rejected':>9} {'slots':>6} {'retries':>7}")
+    phase("slow")
+
+    if recover_after:
+        # Upstream recovers; after the cooldown a single probe call closes the breaker again,
+        # while the calls racing it still get the fallback
+        server.RequestHandlerClass.state.latency_scale = 0.05
+        server.RequestHandlerClass.state.error_rate = 0.0
+        time.sleep(BREAKER_COOLDOWN_SECONDS)
+        phase("half-open")
+        phase("recovered")
+    server.shutdown()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="LLM resilience load test against a slow local stand-in.")
+    parser.add_argument("--calls", type=int, default=64)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--orgs", type=int, default=4)
+    parser.add_argument("--latency-scale", type=float, default=10.0, help="booking_email is 1.5s at scale 1")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--deadline", type=float, default=3.0, help="LLM_CALL_DEADLINE_SECONDS for this run")
+    parser.add_argument("--no-recovery", action="store_true", help="skip the recovery phase")
+    args = parser.parse_args()
+    run(args.calls, args.concurrency, args.orgs, args.latency_scale, args.error_rate, args.deadline, not args.no_recovery)
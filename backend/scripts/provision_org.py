@@ -0,0 +1,22 @@
+import sys
+import os
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app import app
+from services.provisioning_service import provision_organization
+
+def provision(org_ids):
+    """Clones the demo data into each organization once; safe to re-run."""
+    with app.app_context():
+        failed = 0
+        for org_id in org_ids:
+            status = provision_organization(org_id)
+            failed += status == "failed"
+            print(f"{org_id}: {status}")
+    return failed
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        sys.exit("usage: python scripts/provision_org.py <organization_id> [...]")
+    sys.exit(1 if provision(sys.argv[1:]) else 0)
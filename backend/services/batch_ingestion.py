@@ -0,0 +1,288 @@
+import os
+import secrets
+import threading
+import zipfile
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timedelta
+from sqlalchemy import or_
+from werkzeug.utils import secure_filename
+from models import db, Carrier, ExtractionBatch, ExtractionJob
+from services.ingestion_service import extract_quote, build_quote, record_usage
+from services.job_queue import discard_job_upload, extraction_error, MAX_ATTEMPTS, RETRY_DELAY_SECONDS, TRANSIENT_ERRORS
+from services.upload_service import stream_to_disk, discard_upload, UploadTooLarge
+
+BATCH_WORKERS = int(os.getenv("BATCH_WORKERS", 4)) # OCR + extraction threads per batch
+BATCH_LLM_CONCURRENCY = int(os.getenv("BATCH_LLM_CONCURRENCY", 2)) # process_quote_fully calls in flight
+BATCH_INSERT_SIZE = int(os.getenv("BATCH_INSERT_SIZE", 25)) # Quotes per commit
+BATCH_MAX_FILES = int(os.getenv("BATCH_MAX_FILES", 500))
+BATCH_MAX_REQUEST_BYTES = int(float(os.getenv("BATCH_MAX_REQUEST_MB", 500)) * 1024 * 1024)
+
+_llm_gate = threading.BoundedSemaphore(BATCH_LLM_CONCURRENCY)
+_running = set()
+_running_lock = threading.Lock()
+
+def _store_upload(stream, original_name, upload_folder):
+    stored_name = f"{secrets.token_hex(4)}_{secure_filename(original_name) or 'quote.pdf'}"
+    content_hash, _ = stream_to_disk(stream, os.path.join(upload_folder, stored_name))
+    return {"filename": original_name, "pdf_path": stored_name, "content_hash": content_hash}
+
+def stage_batch_files(files, upload_folder):
+    """
+    Streams uploaded PDFs (and the PDFs inside any ZIP archives) to disk.
+    Returns (staged, rejected) where rejected lists {"filename", "error"}.
+    """
+    staged, rejected = [], []
+    try:
+        _stage_files(files, upload_folder, staged, rejected)
+    except Exception:
+        # Anything unexpected (an unreadable member, a full disk) must not strand what was already written
+        discard_staged(staged, upload_folder)
+        raise
+    return staged, rejected
+
+def discard_staged(staged, upload_folder):
+    """Removes staged files that will not become batch jobs."""
+    for f in staged:
+        discard_upload(os.path.join(upload_folder, f["pdf_path"]))
+
+def _stage_files(files, upload_folder, staged, rejected):
+    for file in files:
+        name = file.filename or ''
+        try:
+            if name.lower().endswith('.zip'):
+                archive_path = os.path.join(upload_folder, f"{secrets.token_hex(4)}_{secure_filename(name)}")
+                stream_to_disk(file.stream, archive_path, max_bytes=BATCH_MAX_REQUEST_BYTES)
+                try:
+                    with zipfile.ZipFile(archive_path) as archive:
+                        for info in archive.infolist():
+                            member = os.path.basename(info.filename)
+                            if info.is_dir() or not member.lower().endswith('.pdf') or info.filename.startswith('__MACOSX'):
+                                continue
+                            try:
+                                with archive.open(info) as member_stream:
+                                    staged.append(_store_upload(member_stream, member, upload_folder))
+                            except UploadTooLarge as e:
+                                rejected.append({"filename": member, "error": str(e)})
+                finally:
+                    os.remove(archive_path)
+            elif name.lower().endswith('.pdf'):
+                staged.append(_store_upload(file.stream, name, upload_folder))
+            else:
+                rejected.append({"filename": name, "error": "Unsupported file type"})
+        except (UploadTooLarge, zipfile.BadZipFile) as e:
+            rejected.append({"filename": name, "error": str(e)})
+
+        if len(staged) > BATCH_MAX_FILES:
+            extras = staged[BATCH_MAX_FILES:]
+            discard_staged(extras, upload_folder)
+            rejected.extend({"filename": extra["filename"], "error": f"Batch limit of {BATCH_MAX_FILES} files reached"}
+                            for extra in extras)
+            del staged[BATCH_MAX_FILES:]
+
+def create_batch(organization_id, user_id, staged):
+    """Persists the batch and one QUEUED job per file in a single commit."""
+    batch = ExtractionBatch(
+        id=secrets.token_hex(8),
+        organization_id=organization_id,
+        user_id=user_id,
+        total_files=len(staged)
+    )
+    db.session.add(batch)
+    db.session.add_all([
+        ExtractionJob(
+            id=secrets.token_hex(8),
+            batch_id=batch.id,
+            organization_id=organization_id,
+            user_id=user_id,
+            filename=f["filename"],
+            pdf_path=f["pdf_path"],
+            content_hash=f["content_hash"],
+            status="QUEUED"
+        ) for f in staged
+    ])
+    db.session.commit()
+    return batch
+
+def get_batch(batch_id, organization_id=None):
+    db.session.expire_all()
+    query = ExtractionBatch.query.filter_by(id=batch_id)
+    if organization_id:
+        query = query.filter_by(organization_id=organization_id)
+    batch = query.first()
+    if not batch:
+        return None, []
+    jobs = ExtractionJob.query.filter_by(batch_id=batch_id).order_by(ExtractionJob.filename.asc()).all()
+    return batch, jobs
+
+def _claim_batch_jobs(batch_id):
+    claimed_at = datetime.utcnow()
+    # started_at is the last claim: jobs re-queued after a transient failure wait out RETRY_DELAY_SECONDS
+    ExtractionJob.query.filter(
+        ExtractionJob.batch_id == batch_id, ExtractionJob.status == "QUEUED",
+        or_(ExtractionJob.started_at.is_(None), ExtractionJob.started_at < claimed_at - timedelta(seconds=RETRY_DELAY_SECONDS))
+    ).update({
+        "status": "RUNNING",
+        "stage": "EXTRACTION",
+        "started_at": claimed_at,
+        "attempts": ExtractionJob.attempts + 1
+    }, synchronize_session=False)
+    db.session.commit()
+    return [
+        {"id": j.id, "pdf_path": j.pdf_path, "content_hash": j.content_hash}
+        for j in ExtractionJob.query.filter_by(batch_id=batch_id, status="RUNNING", started_at=claimed_at).all()
+    ]
+
+def _extract_one(app, organization_id, job):
+    """Runs in a pool thread: OCR + extraction only, no Quote writes."""
+    with app.app_context():
+        try:
+            pdf_file = os.path.join(app.config['UPLOAD_FOLDER'], job["pdf_path"])
+            text, extracted_data, _ = extract_quote(
+                pdf_file, organization_id, content_hash=job["content_hash"], llm_gate=_llm_gate
+            )
+            return text, extracted_data
+        finally:
+            db.session.remove()
+
+def _flush(batch, results):
+    """Writes a chunk of finished extractions: one carrier query, one insert round, one commit."""
+    if not results:
+        return
+    try:
+        _insert_quotes(batch, results)
+    except Exception as e:
+        db.session.rollback()
+        print(f"[BATCH] {batch.id} insert failed: {e}")
+        for job_id, _, _ in results:
+            _retry_or_fail(job_id, e, prefix="Failed to save quote: ")
+
+def _insert_quotes(batch, results):
+    jobs = {j.id: j for j in ExtractionJob.query.filter(ExtractionJob.id.in_([job_id for job_id, _, _ in results])).all()}
+
+    names = {data.get('carrier', 'Unknown') for _, _, data in results}
+    carriers = {c.name: c for c in Carrier.query.filter(
+        Carrier.organization_id == batch.organization_id, Carrier.name.in_(names)
+    ).all()}
+    for name in names - set(carriers):
+        carriers[name] = Carrier(name=name, organization_id=batch.organization_id)
+        db.session.add(carriers[name])
+
+    pairs = []
+    for job_id, text, data in results:
+        job = jobs[job_id]
+        quote = build_quote(
+            data, text, batch.organization_id, batch.user_id, job.filename,
+            carriers[data.get('carrier', 'Unknown')], pdf_path=job.pdf_path
+        )
+        db.session.add(quote)
+        pairs.append((job, quote))
+    record_usage(batch.user_id, count=len(results))
+    db.session.flush()
+
+    finished_at = datetime.utcnow()
+    for job, quote in pairs:
+        job.quote_id = quote.id
+        job.status = "COMPLETED"
+        job.stage = None
+        job.error = None
+        job.finished_at = finished_at
+    db.session.commit()
+
+def _retry_or_fail(job_id, error, prefix=""):
+    """job_queue's rule: transient errors re-queue the job until it has used MAX_ATTEMPTS, anything else fails it."""
+    job = db.session.get(ExtractionJob, job_id)
+    if isinstance(error, TRANSIENT_ERRORS) and job.attempts < MAX_ATTEMPTS:
+        job.status = "QUEUED"
+        job.stage = None
+        job.error = f"{prefix}{error}"
+        db.session.commit()
+    else:
+        _fail(job_id, f"{prefix}{error}")
+
+def _fail(job_id, error):
+    job = db.session.get(ExtractionJob, job_id)
+    job.status = "FAILED"
+    job.stage = None
+    job.error = error
+    job.finished_at = datetime.utcnow()
+    db.session.commit()
+    discard_job_upload(job.pdf_path)
+
+def run_batch(app, batch_id):
+    """
+    Fans a batch's files out over a bounded thread pool. LLM calls are throttled by
+    BATCH_LLM_CONCURRENCY and Quotes are inserted BATCH_INSERT_SIZE at a time.
+    """
+    with _running_lock:
+        if batch_id in _running:
+            return
+        _running.add(batch_id)
+    try:
+        with app.app_context():
+            batch = db.session.get(ExtractionBatch, batch_id)
+            batch.status = "RUNNING"
+            db.session.commit()
+            jobs = _claim_batch_jobs(batch_id)
+
+            pending = []
+            with ThreadPoolExecutor(max_workers=BATCH_WORKERS, thread_name_prefix=f"batch-{batch_id}") as pool:
+                futures = {pool.submit(_extract_one, app, batch.organization_id, job): job["id"] for job in jobs}
+                for future in as_completed(futures):
+                    job_id = futures[future]
+                    try:
+                        text, extracted_data = future.result()
+                    except Exception as e:
+                        _retry_or_fail(job_id, e)
+                        continue
+                    if "error" in extracted_data:
+                        _retry_or_fail(job_id, extraction_error(extracted_data))
+                        continue
+                    pending.append((job_id, text, extracted_data))
+                    if len(pending) >= BATCH_INSERT_SIZE:
+                        _flush(batch, pending)
+                        pending = []
+            _flush(batch, pending)
+
+            # Another process may still own RUNNING jobs of this batch; only the last runner closes it
+            open_jobs = ExtractionJob.query.filter(
+                ExtractionJob.batch_id == batch_id,
+                ExtractionJob.status.in_(["QUEUED", "RUNNING"])
+            ).count()
+            if not open_jobs:
+                batch.status = "COMPLETED"
+                batch.finished_at = datetime.utcnow()
+            db.session.commit()
+            print(f"[BATCH] {batch_id} processed {len(jobs)} files ({open_jobs} still open)")
+    except Exception as e:
+        print(f"[BATCH] {batch_id} runner error: {e}")
+    finally:
+        with _running_lock:
+            _running.discard(batch_id)
+
+def start_batch(app, batch_id):
+    threading.Thread(target=run_batch, args=(app, batch_id), name=f"batch-runner-{batch_id}", daemon=True).start()
+
+def resume_batches(app):
+    """
+    Starts runners for open batches with claimable QUEUED jobs (new, re-queued by recover_stale_jobs
+    or retrying) and for open batches with no open jobs left, which the runner closes.
+    Run by the worker pools' maintenance thread, so only processes that run workers run batches.
+    """
+    retry_after = datetime.utcnow() - timedelta(seconds=RETRY_DELAY_SECONDS)
+    with app.app_context():
+        claimable = db.session.query(ExtractionJob.batch_id).filter(
+            ExtractionJob.batch_id.isnot(None), ExtractionJob.status == "QUEUED",
+            or_(ExtractionJob.started_at.is_(None), ExtractionJob.started_at < retry_after)
+        )
+        still_open = db.session.query(ExtractionJob.batch_id).filter(
+            ExtractionJob.batch_id.isnot(None), ExtractionJob.status.in_(["QUEUED", "RUNNING"])
+        )
+        pending = [b.id for b in ExtractionBatch.query.filter(
+            ExtractionBatch.status.in_(["QUEUED", "RUNNING"]),
+            or_(ExtractionBatch.id.in_(claimable), ExtractionBatch.id.notin_(still_open))
+        ).all()]
+    with _running_lock:
+        pending = [batch_id for batch_id in pending if batch_id not in _running]
+    for batch_id in pending:
+        start_batch(app, batch_id)
+    return pending
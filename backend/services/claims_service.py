@@ -2,7 +2,7 @@ import os
 import json
 import random
 from datetime import datetime
-from openai import OpenAI
+from services.llm_clients import create_chat_completion
 
 # Damage categories for AI labeling
 DAMAGE_CATEGORIES = {
@@ -13,13 +13,11 @@ DAMAGE_CATEGORIES = {
     "OPENED": "Evidence of tampering or security seal breach."
 }
 
-def analyze_damage_photo(description_from_ui, image_url=None):
+def analyze_damage_photo(description_from_ui, image_url=None, organization_id=None):
     """
     Uses GPT-4 Vision (or mock) to analyze cargo damage.
     In a real app, 'image_url' would be a path to a cloud storage bucket.
     """
-    client = OpenAI(api_key=os.getenv("OPENAI_API_KEY", "mock_key"))
-    
     prompt = f"""
     You are a Freight Damage Specialist. 
     Analyze this incident report: {description_from_ui}
@@ -65,7 +63,8 @@ def analyze_damage_photo(description_from_ui, image_url=None):
     try:
         # In production, we'd pass the actual image to the vision model
         # For this implementation, we use the text-based description to drive the "AI" logic
-        completion = client.chat.completions.create(
+        completion = create_chat_completion(
+            "damage_analysis", organization_id,
             model="gpt-4-turbo-preview",
             messages=[{"role": "system", "content": prompt}],
             response_format={ "type": "json_object" }
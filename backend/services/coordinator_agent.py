@@ -1,54 +1,179 @@
+import contextvars
+import copy
 import json
 import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from flask import current_app, has_app_context
+from models import db
 from services.llm_service import extract_data_with_llm
-from langchain_openai import ChatOpenAI
+from services.template_parser import extract_with_fast_path
+from services.llm_clients import get_chat_model, invoke_chat
+from services.llm_resilience import UNAVAILABLE_ERRORS
+from services.risk_service import assess_risk, record_cascade
 from langchain_core.messages import HumanMessage, SystemMessage
 
+# Threads shared by all audits; agents run here unless they are marked as mutating the quote
+AUDIT_WORKERS = int(os.getenv("AUDIT_WORKERS", 8))
+LLM_AGENT_TIMEOUT = float(os.getenv("AUDIT_LLM_AGENT_TIMEOUT", 20))
+LOCAL_AGENT_TIMEOUT = float(os.getenv("AUDIT_LOCAL_AGENT_TIMEOUT", 2))
+
+_audit_pool = ThreadPoolExecutor(max_workers=AUDIT_WORKERS, thread_name_prefix="audit-agent")
+
+# Audit graph. Each agent: run(coordinator, data, text, results, organization_id) -> report with "finding"/"status".
+# depends_on: agents whose reports must exist first (passed in `results`).
+# mutates: runs on the live quote in the coordinator thread (keep these cheap and local);
+#   everything else runs concurrently on a private copy of the quote.
+# timeout/fallback: report used when the agent errors or runs past its timeout.
+AUDIT_AGENTS = [
+    {
+        "name": "finance",
+        "label": "Finance Specialist",
+        "run": lambda agent, data, text, results, org: agent._finance_agent(data),
+        "mutates": True, # Tags surcharges with confidence for the UI
+        "timeout": LOCAL_AGENT_TIMEOUT,
+        "fallback": {"status": "WARNING", "finding": "Finance audit unavailable. Manual review recommended.", "confidence_score": 0.5}
+    },
+    {
+        "name": "risk",
+        "label": "Risk Specialist",
+        "run": lambda agent, data, text, results, org: agent._risk_agent(data, text, org),
+        "depends_on": ["finance"],
+        "timeout": LLM_AGENT_TIMEOUT,
+        "fallback": {"status": "OK", "finding": "Basic validation passed. No critical route risks identified."}
+    },
+    {
+        "name": "ops",
+        "label": "Ops Specialist",
+        "run": lambda agent, data, text, results, org: agent._ops_agent(data),
+        "timeout": LOCAL_AGENT_TIMEOUT,
+        "fallback": {"status": "WARNING", "finding": "Booking readiness check unavailable."}
+    },
+    {
+        "name": "sustainability",
+        "label": "Sustainability Specialist",
+        "run": lambda agent, data, text, results, org: agent._sustainability_agent(data),
+        "timeout": LOCAL_AGENT_TIMEOUT,
+        "fallback": {"status": "OK", "finding": "Carbon estimate unavailable.", "carbon_kg": None},
+        "insight_fields": ["carbon_kg"]
+    }
+]
+
+def register_audit_agent(name, label, run, depends_on=None, timeout=None, fallback=None, insight_fields=None, mutates=False):
+    """
+    Plugs an extra agent into the audit graph. Agents with no dependencies run alongside
+    the risk LLM call, so adding one does not lengthen the audit unless it is slower.
+    """
+    AUDIT_AGENTS.append({
+        "name": name,
+        "label": label,
+        "run": run,
+        "depends_on": depends_on or [],
+        "mutates": mutates,
+        "timeout": timeout or LOCAL_AGENT_TIMEOUT,
+        "fallback": fallback or {"status": "WARNING", "finding": f"{label} audit unavailable."},
+        "insight_fields": insight_fields or []
+    })
+
 class CoordinatorAgent:
     def __init__(self):
-        api_key = os.getenv("OPENAI_API_KEY")
-        self.llm = ChatOpenAI(temperature=0, model_name="gpt-4o", openai_api_key=api_key)
+        self.llm = get_chat_model(temperature=0, model_name="gpt-4o")
 
-    def audit_quote(self, text, raw_data):
+    def audit_quote(self, text, raw_data, organization_id=None):
         """
-        Orchestrates specialized sub-audits.
+        Orchestrates specialized sub-audits as a dependency graph; independent agents run concurrently.
+        Returns (insights, carbon_kg, confidence_score, timings).
         """
+        reports, timings = self._run_graph(AUDIT_AGENTS, text, raw_data, organization_id)
+
         insights = []
-        
-        # 1. Finance Audit (Confidence Logic)
-        finance_report = self._finance_agent(raw_data)
-        insights.append({
-            "agent": "Finance Specialist",
-            "finding": finance_report.get("finding"),
-            "status": finance_report.get("status")
-        })
-
-        # 2. Risk Audit
-        risk_report = self._risk_agent(raw_data, text)
-        insights.append({
-            "agent": "Risk Specialist",
-            "finding": risk_report.get("finding"),
-            "status": risk_report.get("status")
-        })
-
-        # 3. Operations Audit
-        ops_report = self._ops_agent(raw_data)
-        insights.append({
-            "agent": "Ops Specialist",
-            "finding": ops_report.get("finding"),
-            "status": ops_report.get("status")
-        })
-
-        # 4. Sustainability Audit (GLEC approximation)
-        eco_report = self._sustainability_agent(raw_data)
-        insights.append({
-            "agent": "Sustainability Specialist",
-            "finding": eco_report.get("finding"),
-            "status": eco_report.get("status"),
-            "carbon_kg": eco_report.get("carbon_kg")
-        })
-
-        return insights, eco_report.get("carbon_kg"), finance_report.get("confidence_score")
+        for spec in AUDIT_AGENTS:
+            report = reports[spec["name"]]
+            insight = {
+                "agent": spec["label"],
+                "finding": report.get("finding"),
+                "status": report.get("status")
+            }
+            for field in spec.get("insight_fields", []):
+                insight[field] = report.get(field)
+            insights.append(insight)
+
+        return insights, reports["sustainability"].get("carbon_kg"), reports["finance"].get("confidence_score"), timings
+
+    def _call_agent(self, app, spec, data, text, results, organization_id):
+        # Pool threads have no Flask context of their own; agents may touch the DB
+        if app is None:
+            return spec["run"](self, data, text, results, organization_id)
+        with app.app_context():
+            try:
+                return spec["run"](self, data, text, results, organization_id)
+            finally:
+                db.session.remove()
+
+    def _run_graph(self, agents, text, raw_data, organization_id=None):
+        app = current_app._get_current_object() if has_app_context() else None
+        pending = {spec["name"]: spec for spec in agents}
+        reports, timings, running = {}, {}, {}
+
+        def finish(spec, report, started, status):
+            if not isinstance(report, dict) or status != "ok":
+                report = dict(spec["fallback"])
+            reports[spec["name"]] = report
+            timings[spec["name"]] = {"ms": round((time.perf_counter() - started) * 1000, 1), "status": status}
+
+        while pending or running:
+            # 1. Start every agent whose dependencies are done
+            launched = False
+            for name, spec in list(pending.items()):
+                if not all(dep in reports for dep in spec.get("depends_on", [])):
+                    continue
+                del pending[name]
+                launched = True
+                results = {dep: reports[dep] for dep in spec.get("depends_on", [])}
+                started = time.perf_counter()
+                if spec.get("mutates"):
+                    try:
+                        finish(spec, spec["run"](self, raw_data, text, results, organization_id), started, "ok")
+                    except Exception as e:
+                        print(f"Audit agent {name} failed: {e}")
+                        finish(spec, None, started, "error")
+                else:
+                    # Copied context: pool threads keep the caller's request_deadline() for their LLM calls
+                    future = _audit_pool.submit(contextvars.copy_context().run, self._call_agent, app, spec,
+                                                copy.deepcopy(raw_data), text, results, organization_id)
+                    running[future] = (spec, started)
+            if launched:
+                continue
+
+            if not running:
+                # Unknown or circular dependencies: nothing can start any more
+                for name, spec in pending.items():
+                    print(f"Audit agent {name} has unmet dependencies {spec.get('depends_on')}")
+                    finish(spec, None, time.perf_counter(), "skipped")
+                break
+
+            # 2. Wait for the next agent to finish or the nearest deadline
+            now = time.perf_counter()
+            next_deadline = min(started + spec["timeout"] for spec, started in running.values())
+            done, _ = wait(list(running), timeout=max(next_deadline - now, 0), return_when=FIRST_COMPLETED)
+            for future in done:
+                spec, started = running.pop(future)
+                try:
+                    finish(spec, future.result(), started, "ok")
+                except Exception as e:
+                    print(f"Audit agent {spec['name']} failed: {e}")
+                    finish(spec, None, started, "error")
+
+            # 3. Give up on agents past their timeout; their thread finishes in the background
+            now = time.perf_counter()
+            for future, (spec, started) in list(running.items()):
+                if now >= started + spec["timeout"]:
+                    running.pop(future)
+                    print(f"Audit agent {spec['name']} timed out after {spec['timeout']}s, using fallback")
+                    finish(spec, None, started, "timeout")
+
+        return reports, timings
 
     def _finance_agent(self, data):
         # Logic: Check if all surcharges are normalized/approved
@@ -75,8 +200,15 @@ class CoordinatorAgent:
             "confidence_score": 1.0
         }
 
-    def _risk_agent(self, data, text):
-        # Logic: AI-driven risk assessment
+    def _risk_agent(self, data, text, organization_id=None):
+        # Logic: Rules and lane/carrier history first; AI-driven assessment only above the threshold
+        assessment = assess_risk(data, organization_id)
+        if not assessment["escalate"]:
+            record_cascade(organization_id, escalated=False)
+            notes = f" Notes: {'; '.join(assessment['flags'])}." if assessment["flags"] else ""
+            return {"status": "OK", "finding": f"Low risk (score {assessment['score']:.2f}); no escalation needed.{notes}"}
+
+        started = time.perf_counter()
         prompt = f"""
         Analyze this quote for shipping risks. Look for:
         1. High-risk origin/destination pairs.
@@ -84,15 +216,24 @@ class CoordinatorAgent:
         3. Missing mandatory info.
         
         Quote Data: {json.dumps(data)}
+        Pre-screen findings (score {assessment['score']:.2f}): {json.dumps(assessment['flags'])}
         
         Output a single sentence summary of the risk level and the status (OK/WARNING/FLAG).
         Output valid JSON: {{"finding": "string", "status": "string"}}
         """
         try:
-            res = self.llm.invoke([SystemMessage(content="You are a Risk Compliance Agent."), HumanMessage(content=prompt)])
+            # Deadline inside the agent's own timeout so the graph never abandons a call still holding a slot
+            res = invoke_chat(self.llm, [SystemMessage(content="You are a Risk Compliance Agent."), HumanMessage(content=prompt)],
+                              "risk_agent", organization_id, deadline_seconds=LLM_AGENT_TIMEOUT * 0.9)
             return json.loads(res.content.replace("```json", "").replace("```", "").strip())
+        except UNAVAILABLE_ERRORS:
+            # The pre-screen already found elevated risk; report it instead of a blanket OK
+            return {"status": "WARNING", "finding": f"Elevated risk (score {assessment['score']:.2f}): "
+                                                    f"{'; '.join(assessment['flags']) or 'rule pre-screen'}. AI review unavailable."}
         except:
             return {"status": "OK", "finding": "Basic validation passed. No critical route risks identified."}
+        finally:
+            record_cascade(organization_id, escalated=True, llm_ms=(time.perf_counter() - started) * 1000)
 
     def _ops_agent(self, data):
         # Logic: Check for data completeness for booking
@@ -132,23 +273,37 @@ class CoordinatorAgent:
             "carbon_kg": co2_kg
         }
 
-def process_quote_fully(text):
+_coordinator = None
+_coordinator_lock = threading.Lock()
+
+def get_coordinator():
+    """
+    Shared CoordinatorAgent. The agent keeps no per-quote state, so every request thread can use it.
+    """
+    global _coordinator
+    with _coordinator_lock:
+        if _coordinator is None:
+            _coordinator = CoordinatorAgent()
+        return _coordinator
+
+def process_quote_fully(text, organization_id=None):
     """
-    The entry point for the Multi-Agent flow.
+    The entry point for the Multi-Agent flow. organization_id scopes the surcharge dictionary and risk history.
     """
-    # Step 1: Raw Extraction (Existing OCR Agent)
-    raw_data = extract_data_with_llm(text)
+    # Step 1: Raw Extraction (known carrier layouts are parsed by template, the rest by the LLM)
+    raw_data = extract_with_fast_path(text, extract_data_with_llm, organization_id)
     if "error" in raw_data:
         return raw_data
 
     # Step 2: Multi-Agent Audit
-    coordinator = CoordinatorAgent()
-    insights, carbon_kg, confidence = coordinator.audit_quote(text, raw_data)
+    coordinator = get_coordinator()
+    insights, carbon_kg, confidence, timings = coordinator.audit_quote(text, raw_data, organization_id)
     
     # Step 3: Bundle everything
     raw_data["agent_insights"] = insights
     raw_data["carbon_footprint_kg"] = carbon_kg
     raw_data["confidence_score"] = confidence
+    raw_data["agent_timings"] = timings
     # Extract overall risk flags for the existing UI field
     raw_data["risk_flags"] = [i["finding"] for i in insights if i["status"] != "OK"]
     
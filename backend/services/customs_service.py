@@ -1,6 +1,17 @@
+import contextvars
 import os
 import json
-from openai import OpenAI
+from concurrent.futures import ThreadPoolExecutor
+from services.llm_clients import create_chat_completion
+from services.hs_cache import classification_key, lookup_classification, store_classification
+
+# Concurrent LLM classifications per bulk request (each still takes an llm_resilience slot)
+BULK_WORKERS = int(os.getenv("HS_BULK_WORKERS", 4))
+# The bulk endpoint is synchronous: every uncached item is an LLM call, and the request has to finish
+# inside gunicorn's 30 s timeout, so clients send long SKU lists in chunks of this size
+MAX_BULK_ITEMS = int(os.getenv("HS_BULK_MAX_ITEMS", 50))
+
+_bulk_pool = ThreadPoolExecutor(max_workers=BULK_WORKERS, thread_name_prefix="hs-classify")
 
 # Mock Duty Rates by Category (First 2 digits of HS Code)
 DUTY_RATES = {
@@ -10,12 +21,64 @@ DUTY_RATES = {
     "default": {"name": "General Goods", "rate": 0.03, "vat": 0.10}
 }
 
-def classify_hs_code(description, material=None):
+def classify_hs_code(description, material=None, organization_id=None):
     """
     Uses GPT-4 to suggest an HS Code based on product description and material.
+    Served from the HS classification cache when the normalized description was seen before.
     """
-    client = OpenAI(api_key=os.getenv("OPENAI_API_KEY", "mock_key"))
-    
+    key = classification_key(description, material)
+    cached = lookup_classification(description, material, key)
+    if cached:
+        return {**cached, "cached": True}
+
+    result = _classify_with_llm(description, material, organization_id)
+    _store_if_real(description, material, result, key)
+    return result
+
+def _store_if_real(description, material, result, key):
+    # Rule-based mock answers are not worth persisting
+    if os.getenv("OPENAI_API_KEY") != "mock_key":
+        store_classification(description, material, result, key)
+
+def classify_hs_codes_bulk(items, organization_id=None):
+    """
+    Classifies [{"description", "material"}] in input order. Duplicates (after normalization) are
+    classified once, cached ones are not sent to the LLM, and the misses run concurrently.
+    Returns (results, summary).
+    """
+    # 1. Dedupe by normalized description + material
+    keys = [classification_key(item.get("description"), item.get("material")) for item in items]
+    unique = {}
+    for key, item in zip(keys, items):
+        unique.setdefault(key, item)
+
+    # 2. Cache lookups (memory, then DB)
+    results, misses = {}, []
+    for key, item in unique.items():
+        cached = lookup_classification(item.get("description"), item.get("material"), key)
+        if cached:
+            results[key] = {**cached, "cached": True}
+        else:
+            misses.append(key)
+
+    # 3. LLM for the misses only; DB writes stay on the request thread.
+    # Each submit copies the context so the caller's request_deadline() bounds the pool's calls too
+    futures = {key: _bulk_pool.submit(contextvars.copy_context().run, _classify_with_llm, unique[key].get("description"),
+                                      unique[key].get("material"), organization_id) for key in misses}
+    for key, future in futures.items():
+        results[key] = future.result()
+        _store_if_real(unique[key].get("description"), unique[key].get("material"), results[key], key)
+
+    summary = {
+        "items": len(items),
+        "unique": len(unique),
+        "cache_hits": len(unique) - len(misses),
+        "classified": len(misses),
+        "errors": sum(1 for key in misses if "error" in results[key])
+    }
+    return [results[key] for key in keys], summary
+
+def _classify_with_llm(description, material=None, organization_id=None):
     prompt = f"""
     You are a Global Trade Compliance expert. 
     Classify the following product for international shipping:
@@ -57,7 +120,8 @@ def classify_hs_code(description, material=None):
             }
 
     try:
-        completion = client.chat.completions.create(
+        completion = create_chat_completion(
+            "hs_classification", organization_id,
             model="gpt-4-turbo-preview",
             messages=[{"role": "system", "content": prompt}],
             response_format={ "type": "json_object" }
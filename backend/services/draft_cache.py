@@ -0,0 +1,150 @@
+import copy
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from sqlalchemy.exc import IntegrityError
+
+# memory: per-process LRU (fine for a single gunicorn worker); sql: DraftCacheEntry rows shared by every worker
+BACKEND = os.getenv("DRAFT_CACHE_BACKEND", "memory")
+TTL_SECONDS = float(os.getenv("DRAFT_CACHE_TTL_SECONDS", 24 * 3600))
+MAX_ENTRIES = int(os.getenv("DRAFT_CACHE_MAX_ENTRIES", 2000))
+
+class MemoryDraftBackend:
+    """Thread-safe LRU with per-entry expiry."""
+    def __init__(self, max_entries=MAX_ENTRIES):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            if entry[1] < time.time():
+                del self.entries[key]
+                return None
+            self.entries.move_to_end(key)
+            return entry[0]
+
+    def set(self, key, value, ttl, organization_id=None, kind=None):
+        with self.lock:
+            self.entries[key] = (value, time.time() + ttl)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def __len__(self):
+        return len(self.entries)
+
+class SQLDraftBackend:
+    """DraftCacheEntry rows; needs an app context. Expired rows are replaced on the next store."""
+    def get(self, key):
+        from models import db, DraftCacheEntry
+        entry = DraftCacheEntry.query.filter_by(cache_key=key).first()
+        if not entry or entry.expires_at < datetime.utcnow():
+            return None
+        entry.hit_count = (entry.hit_count or 0) + 1
+        db.session.commit()
+        return entry.payload
+
+    def set(self, key, value, ttl, organization_id=None, kind=None):
+        from models import db, DraftCacheEntry
+        expires_at = datetime.utcnow() + timedelta(seconds=ttl)
+        entry = DraftCacheEntry.query.filter_by(cache_key=key).first()
+        if entry:
+            entry.payload, entry.created_at, entry.expires_at = value, datetime.utcnow(), expires_at
+        else:
+            db.session.add(DraftCacheEntry(cache_key=key, organization_id=organization_id, kind=kind,
+                                           payload=value, expires_at=expires_at))
+        try:
+            db.session.commit()
+        except IntegrityError:
+            # Another worker stored the same draft concurrently
+            db.session.rollback()
+
+    def __len__(self):
+        from models import DraftCacheEntry
+        return DraftCacheEntry.query.count()
+
+BACKENDS = {"memory": MemoryDraftBackend, "sql": SQLDraftBackend}
+
+_lock = threading.Lock()
+_backend = None
+_stats = {}
+
+def register_draft_backend(name, factory):
+    """Adds a backend (e.g. Redis) selectable with DRAFT_CACHE_BACKEND. Must provide get/set/__len__."""
+    BACKENDS[name] = factory
+
+def get_draft_backend():
+    global _backend
+    with _lock:
+        if _backend is None:
+            _backend = BACKENDS.get(BACKEND, MemoryDraftBackend)()
+        return _backend
+
+def _bump(kind, key):
+    with _lock:
+        bucket = _stats.setdefault(kind, {"hits": 0, "misses": 0, "regenerated": 0, "stores": 0})
+        bucket[key] += 1
+
+def draft_cache_key(kind, organization_id, inputs):
+    """SHA-256 of the draft kind, org and canonical JSON of the inputs the prompt is built from."""
+    canonical = json.dumps({"kind": kind, "org": organization_id, "inputs": inputs},
+                           sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+def get_cached_draft(kind, organization_id, inputs):
+    """The stored draft for these inputs (a copy marked cached=True), or None. Counts a hit or miss."""
+    cached = get_draft_backend().get(draft_cache_key(kind, organization_id, inputs))
+    if cached is None:
+        _bump(kind, "misses")
+        return None
+    _bump(kind, "hits")
+    return {**copy.deepcopy(cached), "cached": True}
+
+def store_draft(kind, organization_id, inputs, draft):
+    """Stores a freshly generated draft. Errors and template fallbacks are skipped."""
+    if "error" in draft or draft.get("fallback"):
+        return
+    get_draft_backend().set(draft_cache_key(kind, organization_id, inputs), copy.deepcopy(draft), TTL_SECONDS,
+                            organization_id=organization_id, kind=kind)
+    _bump(kind, "stores")
+
+def cached_draft(kind, organization_id, inputs, generate, regenerate=False):
+    """
+    Returns the cached draft for these inputs, or calls generate() and stores its result.
+    regenerate=True skips the lookup and replaces the stored draft.
+    """
+    if regenerate:
+        _bump(kind, "regenerated")
+    else:
+        cached = get_cached_draft(kind, organization_id, inputs)
+        if cached is not None:
+            return cached
+
+    draft = generate()
+    store_draft(kind, organization_id, inputs, draft)
+    return draft
+
+def get_draft_cache_stats():
+    """Per-kind hit rate since process start (per worker) and the backend's entry count."""
+    with _lock:
+        kinds = {kind: dict(bucket) for kind, bucket in _stats.items()}
+    for bucket in kinds.values():
+        lookups = bucket["hits"] + bucket["misses"]
+        bucket["hit_rate"] = round(bucket["hits"] / lookups, 3) if lookups else 0.0
+    hits = sum(b["hits"] for b in kinds.values())
+    lookups = hits + sum(b["misses"] for b in kinds.values())
+    return {
+        "backend": BACKEND,
+        "ttl_seconds": TTL_SECONDS,
+        "entries": len(get_draft_backend()),
+        "hit_rate": round(hits / lookups, 3) if lookups else 0.0,
+        "kinds": kinds
+    }
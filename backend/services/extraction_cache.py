@@ -0,0 +1,121 @@
+import copy
+import hashlib
+import os
+import threading
+from datetime import datetime, timedelta
+from sqlalchemy import func
+from sqlalchemy.exc import IntegrityError
+from models import db, ExtractionCacheEntry
+
+# Eviction policy: entries expire after TTL_DAYS, and each org keeps at most
+# MAX_ENTRIES_PER_ORG, dropping the least recently used first.
+MAX_ENTRIES_PER_ORG = int(os.getenv("EXTRACTION_CACHE_MAX_ENTRIES", 5000))
+TTL_DAYS = int(os.getenv("EXTRACTION_CACHE_TTL_DAYS", 30))
+
+_stats_lock = threading.Lock()
+_stats = {"hits": 0, "misses": 0, "stores": 0, "evictions": 0}
+
+def _bump(key, amount=1):
+    with _stats_lock:
+        _stats[key] += amount
+
+def hash_bytes(data):
+    """SHA-256 hex digest of a PDF payload."""
+    return hashlib.sha256(data).hexdigest()
+
+def normalization_key(organization_id):
+    """
+    What a cached result depends on besides the file: the org's surcharge dictionary and whether
+    surcharges are normalized locally or by the prompt. Editing either misses the old entries.
+    """
+    from services.llm_service import LOCAL_NORMALIZATION
+    from services.surcharge_cache import get_surcharge_entry
+
+    mode = "local" if LOCAL_NORMALIZATION else "prompt"
+    return hashlib.sha256(f"{mode}:{get_surcharge_entry(organization_id)['fingerprint']}".encode()).hexdigest()
+
+def get_cached_extraction(organization_id, content_hash, norm_key=None):
+    """
+    Returns (text, extracted_data) for a byte-identical file seen before by this org under the
+    same surcharge dictionary and normalization mode, else None.
+    """
+    entry = ExtractionCacheEntry.query.filter_by(
+        organization_id=organization_id, content_hash=content_hash,
+        normalization_key=norm_key or normalization_key(organization_id)
+    ).first()
+
+    if entry and entry.created_at < datetime.utcnow() - timedelta(days=TTL_DAYS):
+        db.session.delete(entry)
+        db.session.commit()
+        _bump("evictions")
+        entry = None
+
+    if not entry:
+        _bump("misses")
+        return None
+
+    entry.hit_count = (entry.hit_count or 0) + 1
+    entry.last_hit_at = datetime.utcnow()
+    db.session.commit()
+    _bump("hits")
+    # Callers mutate the result (surcharge confidence, etc.), so never hand out the stored JSON
+    return entry.text, copy.deepcopy(entry.extracted_data)
+
+def store_extraction(organization_id, content_hash, text, extracted_data, norm_key=None):
+    """Saves a fresh extraction result and applies the eviction policy for the org."""
+    entry = ExtractionCacheEntry(
+        organization_id=organization_id,
+        content_hash=content_hash,
+        normalization_key=norm_key or normalization_key(organization_id),
+        text=text,
+        extracted_data=copy.deepcopy(extracted_data)
+    )
+    try:
+        db.session.add(entry)
+        db.session.commit()
+        _bump("stores")
+    except IntegrityError:
+        # Another worker stored the same file concurrently
+        db.session.rollback()
+        return
+    evict_entries(organization_id)
+
+def evict_entries(organization_id):
+    """Drops expired entries and trims the org down to MAX_ENTRIES_PER_ORG (LRU)."""
+    cutoff = datetime.utcnow() - timedelta(days=TTL_DAYS)
+    evicted = ExtractionCacheEntry.query.filter(
+        ExtractionCacheEntry.organization_id == organization_id,
+        ExtractionCacheEntry.created_at < cutoff
+    ).delete(synchronize_session=False)
+
+    overflow = ExtractionCacheEntry.query.filter_by(organization_id=organization_id).count() - MAX_ENTRIES_PER_ORG
+    if overflow > 0:
+        stale_ids = [row.id for row in db.session.query(ExtractionCacheEntry.id)
+            .filter(ExtractionCacheEntry.organization_id == organization_id)
+            .order_by(ExtractionCacheEntry.last_hit_at.asc())
+            .limit(overflow).all()]
+        evicted += ExtractionCacheEntry.query.filter(
+            ExtractionCacheEntry.id.in_(stale_ids)
+        ).delete(synchronize_session=False)
+
+    db.session.commit()
+    if evicted:
+        _bump("evictions", evicted)
+    return evicted
+
+def get_cache_stats(organization_id=None):
+    """Process-local hit/miss counters plus the persisted entry counts."""
+    with _stats_lock:
+        stats = dict(_stats)
+    lookups = stats["hits"] + stats["misses"]
+    stats["hit_rate"] = round(stats["hits"] / lookups, 3) if lookups else 0.0
+
+    query = db.session.query(func.count(ExtractionCacheEntry.id), func.sum(ExtractionCacheEntry.hit_count))
+    if organization_id:
+        query = query.filter(ExtractionCacheEntry.organization_id == organization_id)
+    entries, stored_hits = query.one()
+    stats["entries"] = entries
+    stats["lifetime_hits"] = stored_hits or 0
+    stats["max_entries_per_org"] = MAX_ENTRIES_PER_ORG
+    stats["ttl_days"] = TTL_DAYS
+    return stats
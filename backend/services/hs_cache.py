@@ -0,0 +1,87 @@
+import hashlib
+import os
+import re
+import threading
+from collections import OrderedDict
+from sqlalchemy.exc import IntegrityError
+from models import db, HSClassification
+
+# Hot descriptions stay in process memory; the HSClassification table is the shared, persistent copy
+MAX_MEMORY_ENTRIES = int(os.getenv("HS_CACHE_MAX_ENTRIES", 10000))
+
+_NON_ALNUM = re.compile(r"[^a-z0-9]+")
+
+_lock = threading.Lock()
+_memory = OrderedDict()
+_stats = {"memory_hits": 0, "db_hits": 0, "misses": 0, "stores": 0}
+
+def normalize_text(value):
+    return _NON_ALNUM.sub(" ", (value or "").lower()).strip()
+
+def classification_key(description, material=None):
+    """SHA-256 of the normalized description and material ("Cotton T-Shirt!" == "cotton t shirt")."""
+    return hashlib.sha256(f"{normalize_text(description)}|{normalize_text(material)}".encode()).hexdigest()
+
+def _remember(key, result):
+    with _lock:
+        _memory[key] = result
+        _memory.move_to_end(key)
+        while len(_memory) > MAX_MEMORY_ENTRIES:
+            _memory.popitem(last=False)
+
+def _bump(key, amount=1):
+    with _lock:
+        _stats[key] += amount
+
+def lookup_classification(description, material=None, key=None):
+    """Cached {hs_code, category, confidence, rationale} for a description, else None. Needs an app context."""
+    key = key or classification_key(description, material)
+    with _lock:
+        result = _memory.get(key)
+        if result is not None:
+            _memory.move_to_end(key)
+            _stats["memory_hits"] += 1
+            return dict(result)
+
+    row = HSClassification.query.filter_by(lookup_key=key).first()
+    if not row:
+        _bump("misses")
+        return None
+    row.hit_count = (row.hit_count or 0) + 1
+    db.session.commit()
+    result = row.to_dict()
+    _remember(key, result)
+    _bump("db_hits")
+    return dict(result)
+
+def store_classification(description, material, result, key=None):
+    """Persists an LLM classification; results without an hs_code (errors) are ignored."""
+    if not result.get("hs_code") or "error" in result:
+        return
+    key = key or classification_key(description, material)
+    row = HSClassification(
+        lookup_key=key,
+        description=normalize_text(description)[:255],
+        material=normalize_text(material)[:255] or None,
+        hs_code=str(result["hs_code"])[:20],
+        category=result.get("category"),
+        confidence=result.get("confidence"),
+        rationale=result.get("rationale")
+    )
+    try:
+        db.session.add(row)
+        db.session.commit()
+        _bump("stores")
+    except IntegrityError:
+        # Classified concurrently by another request or worker; keep the first result
+        db.session.rollback()
+    _remember(key, {k: result.get(k) for k in ("hs_code", "category", "confidence", "rationale")})
+
+def get_hs_cache_stats():
+    with _lock:
+        stats = dict(_stats)
+        stats["memory_entries"] = len(_memory)
+    lookups = stats["memory_hits"] + stats["db_hits"] + stats["misses"]
+    stats["hit_rate"] = round((stats["memory_hits"] + stats["db_hits"]) / lookups, 3) if lookups else 0.0
+    stats["stored_classifications"] = HSClassification.query.count()
+    return stats
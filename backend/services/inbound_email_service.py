@@ -1,13 +1,16 @@
-import base64
 import os
 import json
-from services.coordinator_agent import process_quote_fully
+import secrets
+from flask import current_app
+from werkzeug.utils import secure_filename
+from services.ingestion_service import extract_quote, save_extracted_quote
+from services.upload_service import stream_base64_to_disk, discard_upload
+from services.ocr_service import classify_upload, ocr_available, OCR_DOC_TYPES, OCR_UNAVAILABLE_ERROR
+from services.job_queue import enqueue_extraction_job
 from models import db, Quote, Carrier
 from datetime import datetime
-import pdfplumber
-import io
 
-def process_inbound_email(payload):
+def process_inbound_email(payload, organization_id="org_demo_123"):
     """
     Processes a mock JSON payload from an inbound email provider (SendGrid/Postmark).
     Expected structure:
@@ -18,67 +21,58 @@ def process_inbound_email(payload):
             {"filename": "quote.pdf", "content": "base64_string", "type": "application/pdf"}
         ]
     }
+    Returns (quotes saved, ExtractionJobs queued for scanned attachments).
     """
     attachments = payload.get('attachments', [])
-    processed_quotes = []
+    processed_quotes, queued_jobs = [], []
 
     for attachment in attachments:
         if attachment.get('type') == 'application/pdf':
             filename = attachment.get('filename')
             content_base64 = attachment.get('content')
             
+            # 1. Decode PDF straight to disk (chunked, hashed on the way); kept only if a quote is saved
+            stored_name = f"{secrets.token_hex(4)}_{secure_filename(filename or 'attachment.pdf')}"
+            pdf_path = os.path.join(current_app.config['UPLOAD_FOLDER'], stored_name)
+            keep_file = False
             try:
-                # 1. Decode PDF
-                pdf_bytes = base64.b64decode(content_base64)
-                
-                # 2. Extract Text (Reusable OCR logic)
-                text = ""
-                with pdfplumber.open(io.BytesIO(pdf_bytes)) as pdf:
-                    for page in pdf.pages:
-                        page_text = page.extract_text()
-                        if page_text:
-                            text += page_text + "\n"
-                
-                if not text:
-                    print(f"No text extracted from {filename}")
-                    continue
+                content_hash, _ = stream_base64_to_disk(content_base64, pdf_path)
 
-                # 3. Multi-Agent Audit
-                extracted_data = process_quote_fully(text)
+                # Scans wait on OCR for up to OCR_TIMEOUT_SECONDS, longer than the webhook request may take: queue them
+                doc_type = classify_upload(pdf_path)
+                if doc_type == "scanned" and not ocr_available():
+                    print(f"Skipping inbound attachment {filename}: {OCR_UNAVAILABLE_ERROR}")
+                    continue
+                if doc_type in OCR_DOC_TYPES and ocr_available():
+                    queued_jobs.append(enqueue_extraction_job(
+                        organization_id, payload.get('from'), f"[Email] {filename}", stored_name,
+                        content_hash=content_hash, quote_status='PENDING'
+                    ))
+                    keep_file = True
+                    continue
+                
+                # 2. Extract Text (shared engine) + Multi-Agent Audit (forwarded duplicates hit the extraction cache)
+                text, extracted_data, cache_hit = extract_quote(pdf_path, organization_id, content_hash=content_hash)
                 if "error" in extracted_data:
                     print(f"Audit Error for {filename}: {extracted_data['error']}")
                     continue
 
-                # 4. Save to Database
-                carrier_name = extracted_data.get('carrier', 'Unknown')
-                carrier = Carrier.query.filter_by(name=carrier_name).first()
-                if not carrier:
-                    carrier = Carrier(name=carrier_name)
-                    db.session.add(carrier)
-                    db.session.commit()
-
-                new_quote = Quote(
-                    filename=f"[Email] {filename}",
+                # 3. Save to Database
+                new_quote = save_extracted_quote(
+                    extracted_data, text,
+                    organization_id=organization_id,
                     user_id=payload.get('from'), # Using email as user_id for inbound
-                    carrier=carrier,
-                    origin=extracted_data.get('origin'),
-                    destination=extracted_data.get('destination'),
-                    total_price=extracted_data.get('total_price'),
-                    currency=extracted_data.get('currency'),
-                    normalized_total_price_usd=extracted_data.get('normalized_total_price_usd'),
-                    surcharges=extracted_data.get('surcharges', []),
-                    risk_flags=extracted_data.get('risk_flags', []),
-                    agent_insights=extracted_data.get('agent_insights', []),
-                    carbon_footprint_kg=extracted_data.get('carbon_footprint_kg'),
-                    status='PENDING',
-                    full_text_content=text
+                    filename=f"[Email] {filename}",
+                    pdf_path=stored_name,
+                    status='PENDING'
                 )
-                
-                db.session.add(new_quote)
-                db.session.commit()
+                keep_file = True
                 processed_quotes.append(new_quote.to_dict())
                 
             except Exception as e:
                 print(f"Failed to process inbound attachment {filename}: {e}")
+            finally:
+                if not keep_file:
+                    discard_upload(pdf_path)
 
-    return processed_quotes
+    return processed_quotes, queued_jobs
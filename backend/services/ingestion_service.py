@@ -0,0 +1,88 @@
+from contextlib import nullcontext
+from datetime import datetime
+from models import db, Carrier, Quote, UsageMeter
+from services.ocr_service import extract_text_from_pdf
+from services.coordinator_agent import process_quote_fully
+from services.extraction_cache import hash_bytes, get_cached_extraction, store_extraction, normalization_key
+from services.upload_service import hash_file
+
+def extract_quote(source, organization_id, content_hash=None, text_extractor=extract_text_from_pdf, llm_gate=None):
+    """
+    OCR + multi-agent extraction, reusing the stored result for a byte-identical file.
+    `source` is a stored file path (preferred) or raw PDF bytes; pass content_hash when
+    it was already computed while streaming the upload to disk. `llm_gate` is an optional
+    context manager (e.g. a semaphore) held only around the LLM stage.
+    Returns (text, extracted_data, cache_hit); extracted_data carries "error" on failure.
+    """
+    if content_hash is None:
+        content_hash = hash_file(source) if isinstance(source, str) else hash_bytes(source)
+    # Taken before extracting, so a dictionary edit mid-extraction stores under the old key, not the new one
+    norm_key = normalization_key(organization_id)
+    cached = get_cached_extraction(organization_id, content_hash, norm_key)
+    if cached:
+        text, extracted_data = cached
+        return text, extracted_data, True
+
+    text = text_extractor(source)
+    if not text:
+        return None, {"error": "Failed to extract text from PDF"}, False
+
+    with llm_gate or nullcontext():
+        extracted_data = process_quote_fully(text, organization_id)
+    if "error" not in extracted_data:
+        store_extraction(organization_id, content_hash, text, extracted_data, norm_key)
+    return text, extracted_data, False
+
+def record_usage(user_id, count=1):
+    """
+    Increments the UsageMeter for a user. The caller owns the commit.
+    """
+    user_id = user_id or 'PilotUser_01'
+    usage = UsageMeter.query.filter_by(user_id=user_id).first()
+    if not usage:
+        usage = UsageMeter(user_id=user_id, quotes_processed=count)
+        db.session.add(usage)
+    else:
+        usage.quotes_processed += count
+        usage.last_processed_at = datetime.utcnow()
+    return usage
+
+def build_quote(extracted_data, text, organization_id, user_id, filename, carrier, pdf_path=None, status='DRAFT'):
+    """Maps process_quote_fully output onto an unsaved Quote."""
+    return Quote(
+        filename=filename,
+        organization_id=organization_id,
+        user_id=user_id,
+        carrier=carrier,
+        origin=extracted_data.get('origin'),
+        destination=extracted_data.get('destination'),
+        total_price=extracted_data.get('total_price'),
+        currency=extracted_data.get('currency'),
+        normalized_total_price_usd=extracted_data.get('normalized_total_price_usd'),
+        surcharges=extracted_data.get('surcharges'), # Store list
+        risk_flags=extracted_data.get('risk_flags', []),
+        agent_insights=extracted_data.get('agent_insights', []),
+        agent_timings=extracted_data.get('agent_timings'),
+        carbon_footprint_kg=extracted_data.get('carbon_footprint_kg'),
+        confidence_score=extracted_data.get('confidence_score', 1.0),
+        pdf_path=pdf_path,
+        transit_time_days=extracted_data.get('transit_time_days', 14), # Default for demo
+        status=status,
+        full_text_content=text
+    )
+
+def save_extracted_quote(extracted_data, text, organization_id, user_id, filename, pdf_path=None, status='DRAFT'):
+    """
+    Persists the output of process_quote_fully as a Quote, creating the carrier if needed.
+    """
+    carrier_name = extracted_data.get('carrier', 'Unknown')
+    carrier = Carrier.query.filter_by(name=carrier_name, organization_id=organization_id).first()
+    if not carrier:
+        carrier = Carrier(name=carrier_name, organization_id=organization_id)
+        db.session.add(carrier)
+        db.session.commit()
+
+    new_quote = build_quote(extracted_data, text, organization_id, user_id, filename, carrier, pdf_path=pdf_path, status=status)
+    db.session.add(new_quote)
+    db.session.commit()
+    return new_quote
@@ -0,0 +1,259 @@
+import os
+import secrets
+import threading
+import time
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy import or_
+from sqlalchemy.exc import OperationalError
+from models import db, ExtractionJob
+from services.ingestion_service import extract_quote, record_usage, save_extracted_quote
+from services.llm_resilience import LLMUnavailable, UNAVAILABLE_ERRORS
+from services.upload_service import discard_upload
+
+# Job lifecycle: QUEUED -> RUNNING -> COMPLETED / FAILED
+TERMINAL_STATUSES = ("COMPLETED", "FAILED")
+MAX_ATTEMPTS = int(os.getenv("EXTRACTION_JOB_MAX_ATTEMPTS", 3))
+# A RUNNING job older than this is assumed to belong to a dead worker and is re-queued.
+# Well above a job's worst case (OCR_TIMEOUT_SECONDS plus the LLM call deadlines)
+LEASE_SECONDS = int(os.getenv("EXTRACTION_JOB_LEASE_SECONDS", 300))
+# How often each worker pool looks for such jobs
+RECOVERY_INTERVAL_SECONDS = float(os.getenv("EXTRACTION_JOB_RECOVERY_SECONDS", 60))
+# A job that failed transiently waits this long after its last claim before it is retried
+RETRY_DELAY_SECONDS = int(os.getenv("EXTRACTION_JOB_RETRY_DELAY_SECONDS", 30))
+# Failures worth another attempt (upstream LLM trouble, a busy database); anything else fails the job at once
+TRANSIENT_ERRORS = UNAVAILABLE_ERRORS + (OperationalError,)
+# How often each worker pool starts runners for upload batches with work waiting
+BATCH_POLL_SECONDS = float(os.getenv("BATCH_POLL_SECONDS", 5))
+# An SSE subscription holds a web thread; it ends after this long and the client re-subscribes or polls
+EVENTS_MAX_SECONDS = float(os.getenv("EXTRACTION_JOB_EVENTS_MAX_SECONDS", 25))
+EVENTS_POLL_SECONDS = float(os.getenv("EXTRACTION_JOB_EVENTS_POLL_SECONDS", 1))
+
+def enqueue_extraction_job(organization_id, user_id, filename, pdf_path, content_hash=None, quote_status='DRAFT'):
+    """
+    Persists a QUEUED job for an upload already written to UPLOAD_FOLDER.
+    `quote_status` is the status the resulting Quote is saved with.
+    """
+    job = ExtractionJob(
+        id=secrets.token_hex(8),
+        organization_id=organization_id,
+        user_id=user_id,
+        filename=filename,
+        pdf_path=pdf_path,
+        content_hash=content_hash,
+        quote_status=quote_status,
+        status="QUEUED"
+    )
+    db.session.add(job)
+    db.session.commit()
+    return job
+
+def get_job(job_id, organization_id=None):
+    """Fetches a fresh copy of a job, optionally scoped to an organization."""
+    db.session.expire_all()
+    query = ExtractionJob.query.filter_by(id=job_id)
+    if organization_id:
+        query = query.filter_by(organization_id=organization_id)
+    return query.first()
+
+def claim_next_job():
+    """
+    Atomically moves the oldest QUEUED job to RUNNING.
+    The conditional UPDATE makes this safe across threads and gunicorn processes.
+    """
+    # Batch jobs are owned by their batch runner (services/batch_ingestion.py).
+    # started_at is the last claim, so a job re-queued after a transient failure waits out RETRY_DELAY_SECONDS
+    retry_after = datetime.utcnow() - timedelta(seconds=RETRY_DELAY_SECONDS)
+    candidates = ExtractionJob.query.filter_by(status="QUEUED", batch_id=None)\
+        .filter(or_(ExtractionJob.started_at.is_(None), ExtractionJob.started_at < retry_after))\
+        .order_by(ExtractionJob.created_at.asc()).limit(5).all()
+    for candidate in candidates:
+        claimed = ExtractionJob.query.filter_by(id=candidate.id, status="QUEUED").update({
+            "status": "RUNNING",
+            "stage": "OCR",
+            "started_at": datetime.utcnow(),
+            "attempts": ExtractionJob.attempts + 1
+        }, synchronize_session=False)
+        db.session.commit()
+        if claimed:
+            return get_job(candidate.id)
+    return None
+
+def recover_stale_jobs():
+    """
+    Re-queues RUNNING jobs whose worker died (e.g. a restart mid-extraction), or fails them
+    once they have used MAX_ATTEMPTS, so a file that kills its worker is not retried forever.
+    """
+    now = datetime.utcnow()
+    stale = ExtractionJob.query.filter(
+        ExtractionJob.status == "RUNNING",
+        ExtractionJob.started_at < now - timedelta(seconds=LEASE_SECONDS)
+    )
+    exhausted = stale.filter(ExtractionJob.attempts >= MAX_ATTEMPTS)\
+        .with_entities(ExtractionJob.id, ExtractionJob.pdf_path).all()
+    failed = ExtractionJob.query.filter(
+        ExtractionJob.id.in_([job_id for job_id, _ in exhausted]), ExtractionJob.status == "RUNNING"
+    ).update({
+        "status": "FAILED",
+        "stage": None,
+        "error": f"Worker stopped during attempt {MAX_ATTEMPTS} of {MAX_ATTEMPTS}",
+        "finished_at": now
+    }, synchronize_session=False)
+    count = stale.filter(ExtractionJob.attempts < MAX_ATTEMPTS).update(
+        {"status": "QUEUED", "stage": None}, synchronize_session=False
+    )
+    db.session.commit()
+    for _, pdf_path in exhausted:
+        discard_job_upload(pdf_path)
+    if count or failed:
+        print(f"[JOBS] Re-queued {count} stale extraction jobs, failed {failed} out of attempts")
+    return count
+
+def extraction_error(extracted_data):
+    """The exception for an extract_quote() result carrying "error": LLMUnavailable (transient) or ValueError."""
+    # An unreachable LLM is worth another attempt; any other extraction error would just repeat
+    return (LLMUnavailable if extracted_data.get("llm_unavailable") else ValueError)(extracted_data["error"])
+
+def discard_job_upload(pdf_path):
+    """Removes the stored upload of a job that failed for good; nothing will read it again."""
+    discard_upload(os.path.join(current_app.config['UPLOAD_FOLDER'], pdf_path))
+
+def _set_stage(job, stage):
+    job.stage = stage
+    db.session.commit()
+
+def process_job(job):
+    """
+    Runs OCR -> extraction -> CoordinatorAgent audit -> persist for a claimed job.
+    """
+    try:
+        # 1. OCR + Extraction + Multi-Agent Audit on the stored upload (served from the extraction cache for duplicates)
+        pdf_file = os.path.join(current_app.config['UPLOAD_FOLDER'], job.pdf_path)
+        _set_stage(job, "EXTRACTION")
+        text, extracted_data, cache_hit = extract_quote(pdf_file, job.organization_id, content_hash=job.content_hash)
+        if "error" in extracted_data:
+            raise extraction_error(extracted_data)
+
+        # 2. Persist
+        _set_stage(job, "PERSIST")
+        record_usage(job.user_id)
+        quote = save_extracted_quote(
+            extracted_data, text,
+            organization_id=job.organization_id,
+            user_id=job.user_id,
+            filename=job.filename,
+            pdf_path=job.pdf_path,
+            status=job.quote_status or 'DRAFT'
+        )
+
+        job.quote_id = quote.id
+        job.status = "COMPLETED"
+        job.error = None
+        job.finished_at = datetime.utcnow()
+        db.session.commit()
+        print(f"[JOBS] Job {job.id} completed -> Quote {quote.id}")
+    except Exception as e:
+        db.session.rollback()
+        job = get_job(job.id)
+        job.error = str(e)
+        if isinstance(e, TRANSIENT_ERRORS) and job.attempts < MAX_ATTEMPTS:
+            job.status = "QUEUED"
+            job.stage = None
+        else:
+            job.status = "FAILED"
+            job.finished_at = datetime.utcnow()
+        db.session.commit()
+        if job.status == "FAILED":
+            discard_job_upload(job.pdf_path)
+        print(f"[JOBS] Job {job.id} attempt {job.attempts} failed: {e}")
+    return job
+
+def run_pending_jobs(max_jobs=None):
+    """
+    Local stand-in worker: drains the queue synchronously in the current app context.
+    Useful for tests and for running ingestion without the background pool.
+    """
+    processed = []
+    while max_jobs is None or len(processed) < max_jobs:
+        job = claim_next_job()
+        if not job:
+            break
+        processed.append(process_job(job))
+    return processed
+
+class ExtractionWorkerPool:
+    """
+    Background threads that poll the ExtractionJob table and process jobs.
+    Each gunicorn process may run its own pool; claims are atomic in the DB.
+    """
+    def __init__(self, app, size=2, poll_interval=1.0):
+        self.app = app
+        self.size = size
+        self.poll_interval = poll_interval
+        self._stop = threading.Event()
+        self._threads = []
+
+    def start(self):
+        for i in range(self.size):
+            t = threading.Thread(target=self._run, name=f"extraction-worker-{i}", daemon=True)
+            t.start()
+            self._threads.append(t)
+        t = threading.Thread(target=self._maintain, name="extraction-maintenance", daemon=True)
+        t.start()
+        self._threads.append(t)
+        print(f"[JOBS] Started {self.size} extraction workers")
+        return self
+
+    def stop(self, timeout=5):
+        self._stop.set()
+        for t in self._threads:
+            t.join(timeout)
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                with self.app.app_context():
+                    job = claim_next_job()
+                    if job:
+                        process_job(job)
+                        continue
+            except Exception as e:
+                print(f"[JOBS] Worker error: {e}")
+            self._stop.wait(self.poll_interval)
+
+    def _maintain(self):
+        """
+        Re-queues jobs orphaned by a crashed process every RECOVERY_INTERVAL_SECONDS (no restart needed)
+        and, every BATCH_POLL_SECONDS, starts runners for upload batches with work waiting.
+        """
+        from services.batch_ingestion import resume_batches
+        next_recovery = 0
+        while True:
+            try:
+                if time.monotonic() >= next_recovery:
+                    with self.app.app_context():
+                        recover_stale_jobs()
+                    next_recovery = time.monotonic() + RECOVERY_INTERVAL_SECONDS
+                resume_batches(self.app)
+            except Exception as e:
+                print(f"[JOBS] Maintenance error: {e}")
+            if self._stop.wait(BATCH_POLL_SECONDS):
+                return
+
+_pool = None
+_pool_lock = threading.Lock()
+
+def workers_running():
+    """Whether this process runs an extraction worker pool (and so also runs upload batches)."""
+    return _pool is not None
+
+def start_extraction_workers(app, size=None):
+    """Starts the in-process worker pool once. EXTRACTION_WORKERS=0 disables it."""
+    global _pool
+    size = int(os.getenv("EXTRACTION_WORKERS", 2)) if size is None else size
+    if size <= 0:
+        return None
+    with _pool_lock:
+        if _pool is None:
+            _pool = ExtractionWorkerPool(app, size=size).start()
+    return _pool
@@ -0,0 +1,207 @@
+import os
+import threading
+import time
+import httpx
+from langchain_openai import ChatOpenAI
+from openai import OpenAI
+from services.llm_metrics import record_llm_call
+from services.llm_resilience import call_llm, llm_slot, get_resilience_stats
+
+# One keep-alive HTTP pool shared by every LangChain and OpenAI client in the process
+POOL_MAX_CONNECTIONS = int(os.getenv("LLM_POOL_MAX_CONNECTIONS", 20))
+POOL_MAX_KEEPALIVE = int(os.getenv("LLM_POOL_MAX_KEEPALIVE", 10))
+POOL_KEEPALIVE_EXPIRY = float(os.getenv("LLM_POOL_KEEPALIVE_SECONDS", 60))
+CONNECT_TIMEOUT = float(os.getenv("LLM_CONNECT_TIMEOUT", 5))
+READ_TIMEOUT = float(os.getenv("LLM_READ_TIMEOUT", 60))
+# Point every client at an OpenAI-compatible endpoint instead of api.openai.com,
+# e.g. the offline stand-in from scripts/llm_standin.py (http://127.0.0.1:8089/v1)
+BASE_URL = os.getenv("LLM_BASE_URL") or None
+# The stand-in ignores auth, so a placeholder key is enough when no real one is set
+STANDIN_API_KEY = "standin"
+
+_lock = threading.Lock()
+_http_client = None
+_chat_models = {}
+_openai_clients = {}
+
+_stats_lock = threading.Lock()
+_stats = {"requests": 0, "new_connections": 0, "errors": 0, "total_ms": 0.0, "max_ms": 0.0}
+
+# HTTP attempts made by the instrumented call running on this thread (SDK retries included)
+_current_call = threading.local()
+
+def _trace_request(request):
+    if getattr(_current_call, "attempts", None) is not None:
+        _current_call.attempts += 1
+    # httpcore reports connect_tcp only when it has to open a new connection, so the rest were reused
+    started = time.perf_counter()
+    failed = []
+
+    def trace(event, info):
+        if event == "connection.connect_tcp.started":
+            with _stats_lock:
+                _stats["new_connections"] += 1
+        elif event.endswith("response_closed.complete"):
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            with _stats_lock:
+                _stats["requests"] += 1
+                _stats["total_ms"] += elapsed_ms
+                _stats["max_ms"] = max(_stats["max_ms"], elapsed_ms)
+        elif event.endswith(".failed") and not failed:
+            failed.append(event)
+            with _stats_lock:
+                _stats["errors"] += 1
+
+    request.extensions["trace"] = trace
+
+def get_http_client():
+    """The process-wide httpx pool. httpx.Client is thread-safe; do not close it."""
+    global _http_client
+    with _lock:
+        if _http_client is None:
+            _http_client = httpx.Client(
+                limits=httpx.Limits(
+                    max_connections=POOL_MAX_CONNECTIONS,
+                    max_keepalive_connections=POOL_MAX_KEEPALIVE,
+                    keepalive_expiry=POOL_KEEPALIVE_EXPIRY
+                ),
+                timeout=httpx.Timeout(READ_TIMEOUT, connect=CONNECT_TIMEOUT),
+                event_hooks={"request": [_trace_request]}
+            )
+        return _http_client
+
+def get_api_key():
+    """OPENAI_API_KEY, or a placeholder when LLM_BASE_URL points at a local stand-in. None means no LLM."""
+    return os.getenv("OPENAI_API_KEY") or (STANDIN_API_KEY if BASE_URL else None)
+
+def get_chat_model(temperature=0, model_name="gpt-4o"):
+    """
+    Shared ChatOpenAI per (model, temperature, key). Instances hold no per-call state,
+    so one can serve every request thread.
+    """
+    api_key = get_api_key()
+    key = (model_name, temperature, api_key)
+    with _lock:
+        chat = _chat_models.get(key)
+    if chat is None:
+        # Only override the base URL when set, so OPENAI_API_BASE keeps working otherwise
+        endpoint = {"openai_api_base": BASE_URL} if BASE_URL else {}
+        chat = ChatOpenAI(
+            temperature=temperature,
+            model_name=model_name,
+            openai_api_key=api_key,
+            **endpoint,
+            http_client=get_http_client(),
+            # Retries, backoff and deadlines are handled by llm_resilience
+            max_retries=0,
+            timeout=httpx.Timeout(READ_TIMEOUT, connect=CONNECT_TIMEOUT)
+        )
+        with _lock:
+            chat = _chat_models.setdefault(key, chat)
+    return chat
+
+def get_openai_client():
+    """Shared raw OpenAI client for services that call chat.completions directly."""
+    api_key = get_api_key() or "mock_key"
+    with _lock:
+        client = _openai_clients.get(api_key)
+    if client is None:
+        client = OpenAI(
+            api_key=api_key,
+            base_url=BASE_URL,
+            http_client=get_http_client(),
+            max_retries=0,
+            timeout=httpx.Timeout(READ_TIMEOUT, connect=CONNECT_TIMEOUT)
+        )
+        with _lock:
+            client = _openai_clients.setdefault(api_key, client)
+    return client
+
+def _attempt_timeout(remaining):
+    # Never wait on one attempt past the call's deadline
+    return httpx.Timeout(min(READ_TIMEOUT, remaining), connect=min(CONNECT_TIMEOUT, remaining))
+
+def _instrumented(call_site, organization_id, attempt, usage_of, deadline_seconds=None):
+    _current_call.attempts = 0
+    started = time.perf_counter()
+    usage, failed = (0, 0), True
+    try:
+        result = call_llm(lambda remaining: attempt(_attempt_timeout(remaining)), organization_id, deadline_seconds)
+        usage, failed = usage_of(result), False
+        return result
+    finally:
+        record_llm_call(
+            call_site, organization_id, (time.perf_counter() - started) * 1000,
+            prompt_tokens=usage[0], completion_tokens=usage[1],
+            retries=max(_current_call.attempts - 1, 0), failed=failed
+        )
+        _current_call.attempts = None
+
+def _langchain_usage(message):
+    usage = getattr(message, "usage_metadata", None) or {}
+    return usage.get("input_tokens", 0), usage.get("output_tokens", 0)
+
+def _openai_usage(completion):
+    usage = getattr(completion, "usage", None)
+    return (usage.prompt_tokens, usage.completion_tokens) if usage else (0, 0)
+
+def invoke_chat(chat, messages, call_site, organization_id=None, deadline_seconds=None):
+    """
+    chat.invoke(messages) under the llm_resilience limits (slots, deadline, retries, breaker),
+    recorded under (organization_id, call_site) in llm_metrics. Raises LLMUnavailable when refused.
+    """
+    return _instrumented(call_site, organization_id, lambda timeout: chat.invoke(messages, timeout=timeout),
+                         _langchain_usage, deadline_seconds)
+
+def stream_chat(chat, messages, call_site, organization_id=None, deadline_seconds=None):
+    """
+    Yields text deltas from chat.stream(messages) while holding one llm_resilience slot.
+    Not retried: a failure after the first token cannot be replayed transparently.
+    Recorded in llm_metrics once the stream ends.
+    """
+    started = time.perf_counter()
+    usage, failed = (0, 0), True
+    deadline = time.monotonic() + deadline_seconds if deadline_seconds else None
+    try:
+        with llm_slot(organization_id, deadline) as remaining:
+            message = None
+            for chunk in chat.stream(messages, timeout=_attempt_timeout(remaining), stream_usage=True):
+                message = chunk if message is None else message + chunk
+                if chunk.content:
+                    yield chunk.content
+        usage, failed = (_langchain_usage(message) if message is not None else (0, 0)), False
+    finally:
+        record_llm_call(call_site, organization_id, (time.perf_counter() - started) * 1000,
+                        prompt_tokens=usage[0], completion_tokens=usage[1], failed=failed)
+
+def create_chat_completion(call_site, organization_id=None, deadline_seconds=None, **kwargs):
+    """get_openai_client().chat.completions.create(**kwargs), guarded and recorded like invoke_chat."""
+    client = get_openai_client()
+    return _instrumented(call_site, organization_id, lambda timeout: client.chat.completions.create(timeout=timeout, **kwargs),
+                         _openai_usage, deadline_seconds)
+
+def get_client_stats():
+    """Connection reuse and HTTP latency for all LLM traffic since process start."""
+    with _stats_lock:
+        requests = _stats["requests"]
+        new_connections = _stats["new_connections"]
+        return {
+            "base_url": BASE_URL,
+            "pool": {
+                "max_connections": POOL_MAX_CONNECTIONS,
+                "max_keepalive": POOL_MAX_KEEPALIVE,
+                "keepalive_seconds": POOL_KEEPALIVE_EXPIRY,
+                "connect_timeout": CONNECT_TIMEOUT,
+                "read_timeout": READ_TIMEOUT
+            },
+            "resilience": get_resilience_stats(),
+            "chat_models": len(_chat_models),
+            "openai_clients": len(_openai_clients),
+            "requests": requests,
+            "errors": _stats["errors"],
+            "new_connections": new_connections,
+            "reused_connections": max(requests - new_connections, 0),
+            "reuse_ratio": round(1 - new_connections / requests, 3) if requests else None,
+            "avg_ms": round(_stats["total_ms"] / requests, 2) if requests else None,
+            "max_ms": round(_stats["max_ms"], 2)
+        }
@@ -0,0 +1,104 @@
+import csv
+import io
+import threading
+import time
+
+# Upper bounds (ms) of the latency histogram buckets; the last bucket is open-ended
+LATENCY_BUCKETS_MS = (250, 500, 1000, 2000, 5000, 10000, 30000, 60000)
+UNKNOWN_ORG = "unknown"
+
+_lock = threading.Lock()
+_series = {}
+_started_at = time.time()
+
+def _new_series():
+    return {
+        "calls": 0, "failures": 0, "retries": 0,
+        "prompt_tokens": 0, "completion_tokens": 0,
+        "total_ms": 0.0, "max_ms": 0.0,
+        "buckets": [0] * (len(LATENCY_BUCKETS_MS) + 1)
+    }
+
+def record_llm_call(call_site, organization_id, elapsed_ms, prompt_tokens=0, completion_tokens=0, retries=0, failed=False):
+    """Adds one LLM call to the (org, call site) series."""
+    bucket = next((i for i, bound in enumerate(LATENCY_BUCKETS_MS) if elapsed_ms <= bound), len(LATENCY_BUCKETS_MS))
+    with _lock:
+        series = _series.setdefault((organization_id or UNKNOWN_ORG, call_site), _new_series())
+        series["calls"] += 1
+        series["failures"] += failed
+        series["retries"] += retries
+        series["prompt_tokens"] += prompt_tokens or 0
+        series["completion_tokens"] += completion_tokens or 0
+        series["total_ms"] += elapsed_ms
+        series["max_ms"] = max(series["max_ms"], elapsed_ms)
+        series["buckets"][bucket] += 1
+
+def _percentile(buckets, fraction):
+    # Upper bound of the bucket holding the given fraction of calls (None = beyond the last bound)
+    target = sum(buckets) * fraction
+    seen = 0
+    for i, count in enumerate(buckets):
+        seen += count
+        if count and seen >= target:
+            return LATENCY_BUCKETS_MS[i] if i < len(LATENCY_BUCKETS_MS) else None
+    return None
+
+def _summarize(series):
+    calls = series["calls"]
+    return {
+        "calls": calls,
+        "failures": series["failures"],
+        "retries": series["retries"],
+        "prompt_tokens": series["prompt_tokens"],
+        "completion_tokens": series["completion_tokens"],
+        "total_tokens": series["prompt_tokens"] + series["completion_tokens"],
+        "avg_ms": round(series["total_ms"] / calls, 1) if calls else None,
+        "max_ms": round(series["max_ms"], 1),
+        "p50_ms_bucket": _percentile(series["buckets"], 0.5),
+        "p95_ms_bucket": _percentile(series["buckets"], 0.95),
+        "histogram": {f"le_{bound}": n for bound, n in zip(LATENCY_BUCKETS_MS, series["buckets"])} | {"gt_max": series["buckets"][-1]}
+    }
+
+def _merge(target, series):
+    for key in ("calls", "failures", "retries", "prompt_tokens", "completion_tokens", "total_ms"):
+        target[key] += series[key]
+    target["max_ms"] = max(target["max_ms"], series["max_ms"])
+    target["buckets"] = [a + b for a, b in zip(target["buckets"], series["buckets"])]
+
+def get_llm_usage(organization_id=None):
+    """
+    Latency and token usage per call site since process start, for one org or (None) all orgs.
+    """
+    with _lock:
+        rows = [(org, site, dict(s, buckets=list(s["buckets"]))) for (org, site), s in _series.items()
+                if organization_id is None or org == organization_id]
+
+    by_site, by_org, total = {}, {}, _new_series()
+    for org, site, series in rows:
+        _merge(by_site.setdefault(site, _new_series()), series)
+        _merge(by_org.setdefault(org, _new_series()), series)
+        _merge(total, series)
+    return {
+        "since": _started_at,
+        "bucket_bounds_ms": list(LATENCY_BUCKETS_MS),
+        "total": _summarize(total),
+        "call_sites": {site: _summarize(s) for site, s in sorted(by_site.items())},
+        "organizations": {org: _summarize(s) for org, s in sorted(by_org.items())}
+    }
+
+def export_llm_usage_csv(organization_id=None):
+    """One row per (org, call site) with counters and histogram buckets, for capacity planning."""
+    with _lock:
+        rows = sorted((org, site, dict(s, buckets=list(s["buckets"]))) for (org, site), s in _series.items()
+                      if organization_id is None or org == organization_id)
+
+    out = io.StringIO()
+    writer = csv.writer(out)
+    writer.writerow(["organization_id", "call_site", "calls", "failures", "retries", "prompt_tokens",
+                     "completion_tokens", "avg_ms", "max_ms"]
+                    + [f"le_{bound}_ms" for bound in LATENCY_BUCKETS_MS] + ["gt_max_ms"])
+    for org, site, s in rows:
+        writer.writerow([org, site, s["calls"], s["failures"], s["retries"], s["prompt_tokens"],
+                         s["completion_tokens"], round(s["total_ms"] / s["calls"], 1) if s["calls"] else "",
+                         round(s["max_ms"], 1)] + s["buckets"])
+    return out.getvalue()
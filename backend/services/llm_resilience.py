@@ -0,0 +1,194 @@
+import contextvars
+import os
+import random
+import threading
+import time
+from contextlib import contextmanager
+import openai
+
+# In-flight LLM calls across the process, and per organization so one tenant cannot take every slot
+MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", 16))
+MAX_CONCURRENCY_PER_ORG = int(os.getenv("LLM_MAX_CONCURRENCY_PER_ORG", 4))
+# Total budget per call: queueing for a slot, every attempt and every backoff sleep
+DEFAULT_DEADLINE_SECONDS = float(os.getenv("LLM_CALL_DEADLINE_SECONDS", 25))
+# Budget shared by every call one web request makes (request_deadline()). Per-call deadlines alone let a request
+# that chains calls, like /api/extract (extraction, then the risk agent), run past gunicorn's 30 s --timeout
+REQUEST_DEADLINE_SECONDS = float(os.getenv("LLM_REQUEST_DEADLINE_SECONDS", 25))
+MAX_ATTEMPTS = int(os.getenv("LLM_MAX_RETRIES", 2)) + 1
+BACKOFF_BASE_SECONDS = float(os.getenv("LLM_BACKOFF_BASE_SECONDS", 0.5))
+BACKOFF_CAP_SECONDS = float(os.getenv("LLM_BACKOFF_CAP_SECONDS", 8))
+# Consecutive upstream failures that open the breaker, and how long it stays open before one probe call
+BREAKER_FAILURES = int(os.getenv("LLM_BREAKER_FAILURES", 5))
+BREAKER_COOLDOWN_SECONDS = float(os.getenv("LLM_BREAKER_COOLDOWN_SECONDS", 30))
+
+# Failures that say something about upstream health; bad requests and auth errors do not trip the breaker
+RETRYABLE_ERRORS = (openai.APITimeoutError, openai.APIConnectionError, openai.RateLimitError, openai.InternalServerError)
+
+class LLMUnavailable(Exception):
+    """Raised instead of calling the LLM: breaker open, no free slot, or the deadline ran out."""
+
+# What call sites catch to switch to their non-LLM fallback
+UNAVAILABLE_ERRORS = (LLMUnavailable,) + RETRYABLE_ERRORS
+
+_request_deadline = contextvars.ContextVar("llm_request_deadline", default=None)
+_global_slots = threading.BoundedSemaphore(MAX_CONCURRENCY)
+_org_slots = {}
+_lock = threading.Lock()
+_breaker = {"state": "closed", "failures": 0, "opened_at": 0.0, "probing": False}
+_stats = {"calls": 0, "retries": 0, "upstream_failures": 0, "breaker_opened": 0,
+          "breaker_rejected": 0, "slot_timeouts": 0, "deadline_exceeded": 0, "in_flight": 0}
+
+@contextmanager
+def request_deadline(seconds=REQUEST_DEADLINE_SECONDS):
+    """
+    Caps every LLM call made inside the block by one deadline (time.monotonic(), yielded). Nested blocks
+    keep the earlier deadline. Work handed to other threads shares it when run via contextvars.copy_context().
+    """
+    current = _request_deadline.get()
+    deadline = time.monotonic() + seconds
+    token = _request_deadline.set(min(deadline, current) if current else deadline)
+    try:
+        yield _request_deadline.get()
+    finally:
+        _request_deadline.reset(token)
+
+def _bounded(deadline):
+    # A call's own deadline, cut short by the request's when one is set
+    request = _request_deadline.get()
+    return min(deadline, request) if request else deadline
+
+def _org_semaphore(organization_id):
+    with _lock:
+        slots = _org_slots.get(organization_id)
+        if slots is None:
+            slots = _org_slots[organization_id] = threading.BoundedSemaphore(MAX_CONCURRENCY_PER_ORG)
+        return slots
+
+def _bump(key, amount=1):
+    with _lock:
+        _stats[key] += amount
+
+def _admit():
+    # Closed: pass. Open: reject until the cooldown ends, then let exactly one probe through (half-open).
+    with _lock:
+        if _breaker["state"] == "closed":
+            return
+        if _breaker["state"] == "open" and time.monotonic() - _breaker["opened_at"] >= BREAKER_COOLDOWN_SECONDS:
+            _breaker["state"] = "half_open"
+        if _breaker["state"] == "half_open" and not _breaker["probing"]:
+            _breaker["probing"] = True
+            return
+        _stats["breaker_rejected"] += 1
+    raise LLMUnavailable("LLM circuit breaker is open")
+
+def _record_outcome(ok):
+    with _lock:
+        _breaker["probing"] = False
+        if ok:
+            _breaker.update(state="closed", failures=0)
+            return
+        _stats["upstream_failures"] += 1
+        _breaker["failures"] += 1
+        if _breaker["state"] == "half_open" or _breaker["failures"] >= BREAKER_FAILURES:
+            if _breaker["state"] != "open":
+                _stats["breaker_opened"] += 1
+                print(f"LLM circuit breaker opened after {_breaker['failures']} consecutive failures")
+            _breaker.update(state="open", opened_at=time.monotonic())
+
+def _release_probe():
+    # A probe that ended without an upstream verdict (e.g. a 400) must not leave the breaker half-open forever
+    with _lock:
+        _breaker["probing"] = False
+
+def _acquire(semaphore, deadline):
+    if not semaphore.acquire(timeout=max(deadline - time.monotonic(), 0)):
+        _bump("slot_timeouts")
+        raise LLMUnavailable("No free LLM slot before the deadline")
+
+@contextmanager
+def llm_slot(organization_id=None, deadline=None):
+    """
+    One admitted attempt: breaker check plus an org and a global slot, held until the block exits.
+    Yields the seconds left before `deadline` (time.monotonic(); default now + the call deadline),
+    never past the request_deadline() in effect.
+    Retryable errors raised inside count against the breaker. Used directly for streamed calls.
+    """
+    deadline = _bounded(deadline or time.monotonic() + DEFAULT_DEADLINE_SECONDS)
+    _admit()
+    try:
+        org_slots = _org_semaphore(organization_id or "unknown")
+        _acquire(org_slots, deadline)
+        try:
+            _acquire(_global_slots, deadline)
+        except LLMUnavailable:
+            org_slots.release()
+            raise
+    except LLMUnavailable:
+        _release_probe()
+        raise
+
+    _bump("in_flight")
+    try:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            _bump("deadline_exceeded")
+            raise LLMUnavailable("LLM deadline exceeded")
+        yield remaining
+        _record_outcome(True)
+    except RETRYABLE_ERRORS:
+        _record_outcome(False)
+        raise
+    except BaseException:
+        # Includes a streaming client hanging up (GeneratorExit)
+        _release_probe()
+        raise
+    finally:
+        _bump("in_flight", -1)
+        _global_slots.release()
+        org_slots.release()
+
+def call_llm(attempt, organization_id=None, deadline_seconds=None):
+    """
+    Runs attempt(timeout) under the shared limits. `attempt` makes one HTTP call with the given
+    timeout in seconds. Retryable failures are retried with full-jitter backoff while the deadline
+    allows; the last one is re-raised. Raises LLMUnavailable when the call is refused outright.
+    """
+    deadline = _bounded(time.monotonic() + (deadline_seconds or DEFAULT_DEADLINE_SECONDS))
+    _bump("calls")
+    for attempt_number in range(MAX_ATTEMPTS):
+        try:
+            with llm_slot(organization_id, deadline) as remaining:
+                return attempt(remaining)
+        except RETRYABLE_ERRORS as e:
+            # 1. Out of attempts or time: surface the upstream error
+            backoff = random.uniform(0, min(BACKOFF_CAP_SECONDS, BACKOFF_BASE_SECONDS * 2 ** attempt_number))
+            out_of_time = time.monotonic() + backoff >= deadline
+            if attempt_number + 1 >= MAX_ATTEMPTS or out_of_time:
+                if out_of_time:
+                    _bump("deadline_exceeded")
+                raise
+            print(f"LLM call failed ({type(e).__name__}), retrying in {backoff:.2f}s")
+
+        # 2. Sleep outside the slots so a backing-off call does not block others
+        _bump("retries")
+        time.sleep(backoff)
+
+def get_resilience_stats():
+    with _lock:
+        return {
+            "limits": {
+                "max_concurrency": MAX_CONCURRENCY,
+                "max_concurrency_per_org": MAX_CONCURRENCY_PER_ORG,
+                "deadline_seconds": DEFAULT_DEADLINE_SECONDS,
+                "request_deadline_seconds": REQUEST_DEADLINE_SECONDS,
+                "max_attempts": MAX_ATTEMPTS,
+                "breaker_failures": BREAKER_FAILURES,
+                "breaker_cooldown_seconds": BREAKER_COOLDOWN_SECONDS
+            },
+            "breaker": {
+                "state": _breaker["state"],
+                "consecutive_failures": _breaker["failures"],
+                "open_for_seconds": round(time.monotonic() - _breaker["opened_at"], 1) if _breaker["state"] == "open" else None
+            },
+            **_stats
+        }
@@ -1,45 +1,84 @@
 import json
 import os
-from langchain_openai import ChatOpenAI
 from langchain_core.messages import HumanMessage, SystemMessage
 from utils.normalization import convert_currency, convert_weight
+from services.text_chunking import select_relevant_text
+from services.llm_clients import get_api_key, get_chat_model, invoke_chat, stream_chat
+from services.llm_resilience import UNAVAILABLE_ERRORS
+from services.draft_cache import cached_draft, get_cached_draft, store_draft
+from services.surcharge_cache import get_surcharge_entry
+from services.surcharge_normalizer import normalize_surcharges
 
-def extract_data_with_llm(text):
+# Map surcharge names locally after extraction instead of pasting the dictionary into the prompt
+LOCAL_NORMALIZATION = os.getenv("LOCAL_SURCHARGE_NORMALIZATION", "1") == "1"
+
+RAW_EXTRACTION_PROMPT = """
+You are a Senior Logistics Auditor. Extract the following from this text: Carrier, Origin, Destination, Total Price, Currency, and a list of all Surcharges.
+
+Rules:
+1. Extract the "raw_name" of each surcharge exactly as it appears in the text (code and/or description).
+2. Output Number values for amounts.
+
+Output valid JSON:
+{
+    "carrier": "string",
+    "origin": "string",
+    "destination": "string",
+    "total_price": number,
+    "currency": "string",
+    "surcharges": [
+        {
+            "raw_name": "string",
+            "amount": number,
+            "currency": "string"
+        }
+    ]
+}
+"""
+
+def normalize_total_price(data):
+    """
+    Post-processing Normalization (Calculated Fields): adds normalized_total_price_usd.
+    """
+    if "total_price" in data and "currency" in data:
+        from models import ExchangeRate
+        # Fetch dynamic rate
+        currency_code = data["currency"].upper()
+        exchange_rate_obj = ExchangeRate.query.filter_by(currency_code=currency_code).first()
+        
+        if exchange_rate_obj:
+             data["normalized_total_price_usd"] = data["total_price"] * exchange_rate_obj.rate_to_usd
+        else:
+             # Fallback to hardcoded utility
+             data["normalized_total_price_usd"] = convert_currency(data["total_price"], data["currency"])
+    return data
+
+def extract_data_with_llm(text, organization_id=None):
     """
     Uses LangChain to extract structured data from text and applies normalization.
     """
-    from models import SurchargeReference
-    
-    # Fetch dynamic surcharge dictionary
-    # In a production app, cache this to avoid DB hits on every request
-    surcharges = SurchargeReference.query.all()
-    dynamic_surcharge_dict = {
-        s.raw_name: {"normalized": s.normalized_name, "category": s.category} 
-        for s in surcharges
-    }
-    
-    # Fallback to defaults if empty (bootstrapping)
-    if not dynamic_surcharge_dict:
-        dynamic_surcharge_dict = {
-            "BAF": {"normalized": "Bunker Adjustment Factor", "category": "Fuel"},
-            "PSS": {"normalized": "Peak Season Surcharge", "category": "Seasonal"},
-            "LSS": {"normalized": "Low Sulphur Surcharge", "category": "Fuel"},
-            "THC": {"normalized": "Terminal Handling Charge", "category": "Handling"},
-            "DOC": {"normalized": "Documentation Fee", "category": "Admin"}
-        }
+    # Cached per org; the alias index and prompt fragment are built once per dictionary version
+    surcharge_entry = get_surcharge_entry(organization_id)
+    dynamic_surcharge_dict = surcharge_entry["dictionary"]
+
+    # Long documents: send only the pricing/lane sections that fit the token budget
+    text, chunk_stats = select_relevant_text(text, surcharge_codes=dynamic_surcharge_dict.keys())
+    if chunk_stats["kept_sections"] is not None:
+        print(f"Trimmed quote text {chunk_stats['original_tokens']} -> {chunk_stats['sent_tokens']} tokens "
+              f"({chunk_stats['kept_sections']}/{chunk_stats['sections']} sections)")
 
-    api_key = os.getenv("OPENAI_API_KEY")
+    api_key = get_api_key()
     if not api_key:
         return {"error": "OPENAI_API_KEY not found"}
 
     try:
-        chat = ChatOpenAI(temperature=0, model_name="gpt-4o", openai_api_key=api_key)
+        chat = get_chat_model(temperature=0, model_name="gpt-4o")
         
-        SYSTEM_PROMPT = f"""
+        SYSTEM_PROMPT = RAW_EXTRACTION_PROMPT if LOCAL_NORMALIZATION else f"""
 You are a Senior Logistics Auditor. Extract the following from this text: Carrier, Origin, Destination, Total Price, Currency, and a list of all Surcharges.
 
 Refer to this Surcharge Dictionary for normalization:
-{json.dumps(dynamic_surcharge_dict, indent=2)}
+{surcharge_entry["prompt_fragment"]}
 
 Rules:
 1. Extract the "raw_name" exactly as it appears in the text.
@@ -70,7 +109,7 @@ Output valid JSON:
             SystemMessage(content=SYSTEM_PROMPT),
             HumanMessage(content=text)
         ]
-        response = chat.invoke(messages)
+        response = invoke_chat(chat, messages, "extraction", organization_id)
         content = response.content
         
         # Strip markdown code blocks
@@ -83,35 +122,79 @@ Output valid JSON:
         
         # Post-processing Normalization (Calculated Fields)
         # 1. Normalize Total Price to USD
-        if "total_price" in data and "currency" in data:
-            from models import ExchangeRate
-            # Fetch dynamic rate
-            currency_code = data["currency"].upper()
-            exchange_rate_obj = ExchangeRate.query.filter_by(currency_code=currency_code).first()
-            
-            if exchange_rate_obj:
-                 data["normalized_total_price_usd"] = data["total_price"] * exchange_rate_obj.rate_to_usd
-            else:
-                 # Fallback to hardcoded utility
-                 data["normalized_total_price_usd"] = convert_currency(data["total_price"], data["currency"])
+        normalize_total_price(data)
+
+        # 2. Map raw surcharge names onto the org's dictionary
+        if LOCAL_NORMALIZATION:
+            normalize_surcharges(data.get("surcharges"), surcharge_entry["index"])
             
         return data
 
+    except UNAVAILABLE_ERRORS as e:
+        # Lets the fast path fall back to a low-confidence template parse
+        return {"error": f"LLM unavailable: {str(e)}", "llm_unavailable": True}
     except Exception as e:
         return {"error": f"LLM extraction failed: {str(e)}"}
 
-def generate_booking_email(data):
-    """
-    Generates a booking confirmation email based on quote data.
-    """
-    api_key = os.getenv("OPENAI_API_KEY")
-    if not api_key:
-        return {"error": "OPENAI_API_KEY not found"}
+def _booking_email_template(data):
+    return {
+        "subject": f"Booking Request: {data.get('origin', 'N/A')} to {data.get('destination', 'N/A')}",
+        "body": f"Dear {data.get('carrier', 'Carrier')} Team,\n\nWe would like to book the shipment from {data.get('origin', 'N/A')} "
+                f"to {data.get('destination', 'N/A')} at {data.get('total_price', 'N/A')} {data.get('currency', '')} as quoted. "
+                f"Please confirm the booking number and cut-off dates.\n\n(AI drafting unavailable - this is a template fallback).",
+        "fallback": True
+    }
 
-    try:
-        chat = ChatOpenAI(temperature=0.7, model_name="gpt-4o", openai_api_key=api_key)
-        
-        prompt = f"""
+def _exception_email_template(po_number, reason):
+    return {
+        "subject": f"URGENT: Issue with PO {po_number}",
+        "body": f"Dear Team,\n\nPlease note there is a {reason} affecting PO {po_number}.\n\n(AI drafting unavailable - this is a template fallback).",
+        "fallback": True
+    }
+
+def _negotiation_email_template(data, challenges):
+    points = "\n".join(f"- {c}" if isinstance(c, str) else f"- {json.dumps(c)}" for c in challenges or [])
+    return {
+        "subject": f"Rate Review Request: {(data or {}).get('origin', 'N/A')} to {(data or {}).get('destination', 'N/A')}",
+        "body": f"Dear {(data or {}).get('carrier', 'Carrier')} Team,\n\nBefore we confirm this quote, please review the following points "
+                f"and waive or justify the related fees:\n{points}\n\n(AI drafting unavailable - this is a template fallback).",
+        "fallback": True
+    }
+
+# Quote fields the booking prompt reads; the draft cache keys on exactly these
+BOOKING_EMAIL_FIELDS = ("carrier", "origin", "destination", "total_price", "currency")
+
+JSON_DRAFT_FORMAT = """
+        Output valid JSON:
+        {
+            "subject": "string",
+            "body": "string"
+        }
+        """
+
+# Streamed drafts ask for plain text so the forwarded tokens are readable as they arrive
+STREAM_DRAFT_FORMAT = """
+        Output plain text, no JSON or markdown: the first line is "Subject: " followed by the subject line,
+        then a blank line, then the email body.
+        """
+
+def _parse_draft(content):
+    """{subject, body} from either the JSON format or the streamed "Subject: ..." format."""
+    content = content.strip()
+    if content.startswith("```json"):
+        content = content[7:]
+    if content.endswith("```"):
+        content = content[:-3]
+    content = content.strip()
+    if content.startswith("{"):
+        return json.loads(content)
+    first_line, _, body = content.partition("\n")
+    if not first_line.lower().startswith("subject:"):
+        raise ValueError("Draft has no subject line")
+    return {"subject": first_line[len("subject:"):].strip(), "body": body.strip()}
+
+def _booking_email_messages(data, output_format):
+    prompt = f"""
         You are a Logistics Manager. Write a professional, concise booking confirmation email to the carrier based on this quote:
         
         Carrier: {data.get('carrier', 'Carrier')}
@@ -121,121 +204,161 @@ def generate_booking_email(data):
         
         Subject Line: [Generate a professional subject line]
         Body: [Generate the email body]
+        """ + output_format
+    return [
+        SystemMessage(content="You are a helpful logistics assistant."),
+        HumanMessage(content=prompt)
+    ]
+
+def _exception_email_messages(po_number, reason, output_format):
+    prompt = f"""
+        You are a proactive Logistics Coordinator. Write an urgent but professional email to the Warehouse Receiving Team regarding a shipment delay.
         
-        Output valid JSON:
-        {{
-            "subject": "string",
-            "body": "string"
-        }}
-        """
+        Context:
+        - PO Number: {po_number}
+        - Issue: {reason}
         
-        messages = [
-            SystemMessage(content="You are a helpful logistics assistant."),
-            HumanMessage(content=prompt)
-        ]
+        Goal: Inform them of the change and ask them to hold the dock slot or reschedule.
+        """ + output_format
+    return [
+        SystemMessage(content="You are a helpful logistics assistant."),
+        HumanMessage(content=prompt)
+    ]
+
+def _negotiation_email_messages(data, challenges, output_format):
+    prompt = f"""
+        You are a tough but professional Freight Procurement Manager. Write an email to the carrier challenging specific fees/risks in their latest quote.
         
-        response = chat.invoke(messages)
-        content = response.content
+        Quote Context:
+        {json.dumps(data)}
         
-        if content.startswith("```json"):
-            content = content[7:]
-        if content.endswith("```"):
-            content = content[:-3]
-            
-        return json.loads(content.strip())
+        Specific Challenges to address:
+        {json.dumps(challenges)}
+        
+        Goal: Ask them to waive the unmapped fees or reduce the price based on these specific findings.
+        """ + output_format
+    return [
+        SystemMessage(content="You are a professional logistics negotiator."),
+        HumanMessage(content=prompt)
+    ]
+
+def _booking_inputs(data):
+    return {f: data.get(f) for f in BOOKING_EMAIL_FIELDS}
+
+def _negotiation_inputs(data, challenges):
+    return {"quote": data, "challenges": sorted(json.dumps(c, sort_keys=True) for c in challenges or [])}
+
+def generate_booking_email(data, organization_id=None, regenerate=False):
+    """
+    Generates a booking confirmation email based on quote data. Cached per org and quote fields;
+    regenerate=True forces a fresh draft.
+    """
+    return cached_draft("booking_email", organization_id, _booking_inputs(data),
+                        lambda: _draft_booking_email(data, organization_id), regenerate)
+
+def _draft_booking_email(data, organization_id=None):
+    api_key = get_api_key()
+    if not api_key:
+        return {"error": "OPENAI_API_KEY not found"}
+
+    try:
+        chat = get_chat_model(temperature=0.7, model_name="gpt-4o")
+        response = invoke_chat(chat, _booking_email_messages(data, JSON_DRAFT_FORMAT), "booking_email", organization_id)
+        return _parse_draft(response.content)
+    except UNAVAILABLE_ERRORS:
+        return _booking_email_template(data)
     except Exception as e:
         return {"error": f"Email generation failed: {str(e)}"}
 
-def generate_exception_email(po_number, reason):
+def generate_exception_email(po_number, reason, organization_id=None, regenerate=False):
     """
-    Generates a context-aware exception email using OpenAI.
+    Generates a context-aware exception email using OpenAI. Cached per org, PO and reason.
     """
-    api_key = os.getenv("OPENAI_API_KEY")
+    return cached_draft("exception_email", organization_id, {"po_number": po_number, "reason": reason},
+                        lambda: _draft_exception_email(po_number, reason, organization_id), regenerate)
+
+def _draft_exception_email(po_number, reason, organization_id=None):
+    api_key = get_api_key()
     # Graceful fallback for demo if no key
     if not api_key:
-        return {
-            "subject": f"URGENT: Issue with PO {po_number}",
-            "body": f"Dear Team,\n\nPlease note there is a {reason} affecting PO {po_number}.\n\n(AI Key Missing - this is a template fallback)."
-        }
+        return _exception_email_template(po_number, reason)
 
     try:
-        chat = ChatOpenAI(temperature=0.7, model_name="gpt-4o", openai_api_key=api_key)
-        
-        prompt = f"""
-        You are a proactive Logistics Coordinator. Write an urgent but professional email to the Warehouse Receiving Team regarding a shipment delay.
-        
-        Context:
-        - PO Number: {po_number}
-        - Issue: {reason}
-        
-        Goal: Inform them of the change and ask them to hold the dock slot or reschedule.
-        
-        Output valid JSON:
-        {{
-            "subject": "string",
-            "body": "string"
-        }}
-        """
-        
-        messages = [
-            SystemMessage(content="You are a helpful logistics assistant."),
-            HumanMessage(content=prompt)
-        ]
-        
-        response = chat.invoke(messages)
-        content = response.content
-        
-        if content.startswith("```json"):
-            content = content[7:]
-        if content.endswith("```"):
-            content = content[:-3]
-            
-        return json.loads(content.strip())
+        chat = get_chat_model(temperature=0.7, model_name="gpt-4o")
+        response = invoke_chat(chat, _exception_email_messages(po_number, reason, JSON_DRAFT_FORMAT), "exception_email", organization_id)
+        return _parse_draft(response.content)
+    except UNAVAILABLE_ERRORS:
+        return _exception_email_template(po_number, reason)
     except Exception as e:
         return {"error": f"Exception email generation failed: {str(e)}"}
 
-def generate_negotiation_email(data, challenges):
+def generate_negotiation_email(data, challenges, organization_id=None, regenerate=False):
     """
-    Generates a rate challenge/negotiation email based on flagged findings.
+    Generates a rate challenge/negotiation email based on flagged findings. Cached per org,
+    quote and challenge set (order-insensitive).
     """
-    api_key = os.getenv("OPENAI_API_KEY")
+    return cached_draft("negotiation_email", organization_id, _negotiation_inputs(data, challenges),
+                        lambda: _draft_negotiation_email(data, challenges, organization_id), regenerate)
+
+def _draft_negotiation_email(data, challenges, organization_id=None):
+    api_key = get_api_key()
     if not api_key:
         return {"error": "OPENAI_API_KEY not found"}
 
     try:
-        chat = ChatOpenAI(temperature=0.7, model_name="gpt-4o", openai_api_key=api_key)
-        
-        prompt = f"""
-        You are a tough but professional Freight Procurement Manager. Write an email to the carrier challenging specific fees/risks in their latest quote.
-        
-        Quote Context:
-        {json.dumps(data)}
-        
-        Specific Challenges to address:
-        {json.dumps(challenges)}
-        
-        Goal: Ask them to waive the unmapped fees or reduce the price based on these specific findings.
-        
-        Output valid JSON:
-        {{
-            "subject": "string",
-            "body": "string"
-        }}
-        """
-        
-        messages = [
-            SystemMessage(content="You are a professional logistics negotiator."),
-            HumanMessage(content=prompt)
-        ]
-        
-        response = chat.invoke(messages)
-        content = response.content
-        
-        if content.startswith("```json"):
-            content = content[7:]
-        if content.endswith("```"):
-            content = content[:-3]
-            
-        return json.loads(content.strip())
+        chat = get_chat_model(temperature=0.7, model_name="gpt-4o")
+        response = invoke_chat(chat, _negotiation_email_messages(data, challenges, JSON_DRAFT_FORMAT), "negotiation_email", organization_id)
+        return _parse_draft(response.content)
+    except UNAVAILABLE_ERRORS:
+        return _negotiation_email_template(data, challenges)
     except Exception as e:
         return {"error": f"Negotiation email generation failed: {str(e)}"}
+
+def _stream_draft(kind, organization_id, inputs, messages, fallback, no_key, regenerate):
+    """
+    Yields ("token", text) as the draft streams in, then exactly one ("draft", dict) with the same
+    payload the blocking generator returns. Cache hits yield only the draft.
+    """
+    if not regenerate:
+        cached = get_cached_draft(kind, organization_id, inputs)
+        if cached is not None:
+            yield "draft", cached
+            return
+    if not get_api_key():
+        yield "draft", no_key()
+        return
+
+    parts = []
+    try:
+        chat = get_chat_model(temperature=0.7, model_name="gpt-4o")
+        for text in stream_chat(chat, messages, kind, organization_id):
+            parts.append(text)
+            yield "token", text
+        draft = _parse_draft("".join(parts))
+    except UNAVAILABLE_ERRORS:
+        draft = fallback()
+    except Exception as e:
+        draft = {"error": f"Draft generation failed: {str(e)}"}
+    store_draft(kind, organization_id, inputs, draft)
+    yield "draft", draft
+
+def stream_booking_email(data, organization_id=None, regenerate=False):
+    """Streaming variant of generate_booking_email; see _stream_draft."""
+    return _stream_draft("booking_email", organization_id, _booking_inputs(data),
+                         _booking_email_messages(data, STREAM_DRAFT_FORMAT),
+                         lambda: _booking_email_template(data),
+                         lambda: {"error": "OPENAI_API_KEY not found"}, regenerate)
+
+def stream_exception_email(po_number, reason, organization_id=None, regenerate=False):
+    """Streaming variant of generate_exception_email."""
+    return _stream_draft("exception_email", organization_id, {"po_number": po_number, "reason": reason},
+                         _exception_email_messages(po_number, reason, STREAM_DRAFT_FORMAT),
+                         lambda: _exception_email_template(po_number, reason),
+                         lambda: _exception_email_template(po_number, reason), regenerate)
+
+def stream_negotiation_email(data, challenges, organization_id=None, regenerate=False):
+    """Streaming variant of generate_negotiation_email."""
+    return _stream_draft("negotiation_email", organization_id, _negotiation_inputs(data, challenges),
+                         _negotiation_email_messages(data, challenges, STREAM_DRAFT_FORMAT),
+                         lambda: _negotiation_email_template(data, challenges),
+                         lambda: {"error": "OPENAI_API_KEY not found"}, regenerate)
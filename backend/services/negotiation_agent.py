@@ -1,14 +1,12 @@
 import os
 import json
-from openai import OpenAI
+from services.llm_clients import create_chat_completion
 
 # Mocking OpenAI if API key is missing
-def get_negotiation_response(tender_title, carrier_name, current_rate, counter_offer, history):
+def get_negotiation_response(tender_title, carrier_name, current_rate, counter_offer, history, organization_id=None):
     """
     Simulates a carrier's response to a counter-offer using GPT-4 logic.
     """
-    client = OpenAI(api_key=os.getenv("OPENAI_API_KEY", "mock_key"))
-    
     prompt = f"""
     You are representing a freight carrier '{carrier_name}' negotiating for the tender '{tender_title}'.
     The current rate offered is ${current_rate}.
@@ -58,7 +56,8 @@ def get_negotiation_response(tender_title, carrier_name, current_rate, counter_o
             }
 
     try:
-        completion = client.chat.completions.create(
+        completion = create_chat_completion(
+            "carrier_negotiation", organization_id,
             model="gpt-4-turbo-preview",
             messages=[{"role": "system", "content": prompt}],
             response_format={ "type": "json_object" }
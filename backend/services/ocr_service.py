@@ -1,15 +1,238 @@
+import io
+import json
+import mmap
+import os
+import multiprocessing
+import threading
+from contextlib import contextmanager
+from concurrent.futures import ProcessPoolExecutor
 import fitz  # PyMuPDF
+import pdfplumber
 
-def extract_text_from_pdf(pdf_bytes):
+# Page cap for very long tariff annexes; pages past this are ignored
+MAX_PAGES = int(os.getenv("PDF_MAX_PAGES", 1000))
+# Documents shorter than this are extracted inline; pool start-up isn't worth it
+PARALLEL_MIN_PAGES = int(os.getenv("PDF_PARALLEL_MIN_PAGES", 40))
+# Smallest page range handed to a single worker process
+MIN_SHARD_PAGES = int(os.getenv("PDF_MIN_SHARD_PAGES", 10))
+PROCESSES = int(os.getenv("PDF_EXTRACT_PROCESSES", min(4, os.cpu_count() or 1)))
+# Image-only (scanned) pages are OCR'd in their own pool so they never queue ahead of text PDFs
+OCR_PROCESSES = int(os.getenv("OCR_PROCESSES", 1))
+OCR_TIMEOUT_SECONDS = float(os.getenv("OCR_TIMEOUT_SECONDS", 60))
+# classify_document() types with image-only pages
+OCR_DOC_TYPES = ("scanned", "mixed")
+OCR_UNAVAILABLE_ERROR = "This PDF is a scan and OCR (Tesseract) is not installed on this server"
+
+# Fastest backend per document type, as measured by scripts/bench_extraction_backends.py
+BACKEND_PREFERENCES_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'data', 'extraction_backends.json')
+DEFAULT_BACKEND = "pymupdf"
+
+_executors = {}
+_executor_lock = threading.Lock()
+
+def _get_executor(name, size):
+    with _executor_lock:
+        if name not in _executors:
+            # spawn: forking a multi-threaded gunicorn worker is not safe
+            _executors[name] = ProcessPoolExecutor(max_workers=size, mp_context=multiprocessing.get_context("spawn"))
+        return _executors[name]
+
+@contextmanager
+def open_pdf(source):
+    """
+    Opens a PDF from raw bytes or a file path.
+    Paths are memory-mapped and handed to PyMuPDF as a zero-copy buffer, so large
+    uploads are paged in by the OS instead of being read into the Python heap.
+    """
+    if not isinstance(source, str):
+        doc = fitz.open(stream=source, filetype="pdf")
+        try:
+            yield doc
+        finally:
+            doc.close()
+        return
+
+    with open(source, 'rb') as f:
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        view = memoryview(mapped)
+        doc = fitz.open(stream=view, filetype="pdf")
+        try:
+            yield doc
+        finally:
+            doc.close()
+            del doc
+            view.release()
+            mapped.close()
+
+# --- Backends: each returns the text of pages [0, page_count) as a list, in page order ---
+
+def _extract_page_range(source, start, stop):
+    """Worker entry point: text of pages [start, stop) in order."""
+    with open_pdf(source) as doc:
+        return [doc[i].get_text() for i in range(start, stop)]
+
+def _shard_ranges(page_count, shards):
+    size = -(-page_count // shards)
+    return [(start, min(start + size, page_count)) for start in range(0, page_count, size)]
+
+def extract_pages_parallel(source, page_count, processes=None):
+    """
+    Spreads contiguous page ranges over the process pool and returns page texts in order.
+    """
+    processes = processes or PROCESSES
+    shards = max(1, min(processes, page_count // MIN_SHARD_PAGES))
+    executor = _get_executor("extract", PROCESSES)
+    futures = [executor.submit(_extract_page_range, source, start, stop) for start, stop in _shard_ranges(page_count, shards)]
+    return [text for future in futures for text in future.result()]
+
+def _pymupdf_backend(source, page_count):
+    if page_count < PARALLEL_MIN_PAGES or PROCESSES < 2:
+        return _extract_page_range(source, 0, page_count)
+    try:
+        return extract_pages_parallel(source, page_count)
+    except Exception as e:
+        print(f"Parallel extraction failed, falling back to serial: {e}")
+        return _extract_page_range(source, 0, page_count)
+
+def _pdfplumber_backend(source, page_count):
+    with pdfplumber.open(source if isinstance(source, str) else io.BytesIO(source)) as pdf:
+        return [page.extract_text() or "" for page in pdf.pages[:page_count]]
+
+BACKENDS = {
+    "pymupdf": _pymupdf_backend,
+    "pdfplumber": _pdfplumber_backend
+}
+
+def register_backend(name, fn):
+    """Plugs in an extra backend: fn(source, page_count) -> list of page texts."""
+    BACKENDS[name] = fn
+
+_preferences = None
+
+def get_backend_preferences():
+    global _preferences
+    if _preferences is None:
+        try:
+            with open(BACKEND_PREFERENCES_PATH) as f:
+                _preferences = json.load(f)
+        except (OSError, ValueError):
+            _preferences = {}
+    return _preferences
+
+# --- Scanned-page detection and OCR ---
+
+def find_scanned_pages(doc, page_count):
+    """
+    Fast check for image-only pages: no fonts in the page resources but at least one image.
+    Reads resource dictionaries only, no text layout.
+    """
+    return [i for i in range(page_count) if not doc[i].get_fonts() and doc[i].get_images()]
+
+class UnreadablePDF(Exception):
+    """Raised for an upload that is empty or not a PDF PyMuPDF can open."""
+
+def classify_upload(source, max_pages=None):
+    """
+    Validates a stored upload and returns its classify_document() type ("scanned" and "mixed" need OCR).
+    Raises UnreadablePDF instead of the PyMuPDF/mmap errors a bad file would otherwise surface as.
+    """
+    if isinstance(source, str):
+        with open(source, 'rb') as f:
+            head = f.read(1024)
+    else:
+        head = bytes(source[:1024])
+    if not head:
+        raise UnreadablePDF("The uploaded file is empty")
+    # The spec allows junk before the header, but it has to be in the first 1 KB
+    if b"%PDF-" not in head:
+        raise UnreadablePDF("The uploaded file is not a PDF")
+    try:
+        with open_pdf(source) as doc:
+            page_count = min(len(doc), max_pages or MAX_PAGES)
+            return classify_document(page_count, find_scanned_pages(doc, page_count))
+    except (RuntimeError, ValueError) as e:
+        raise UnreadablePDF(f"The uploaded PDF could not be read: {e}")
+
+_ocr_available = None
+
+def ocr_available():
+    """Whether Tesseract and its tessdata are installed; PyMuPDF's OCR needs both. Checked once per process."""
+    global _ocr_available
+    if _ocr_available is None:
+        try:
+            fitz.get_tessdata()
+            _ocr_available = True
+        except RuntimeError as e:
+            print(f"OCR unavailable, scanned pages cannot be read: {e}")
+            _ocr_available = False
+    return _ocr_available
+
+def _ocr_pages(source, page_numbers):
+    """OCR worker entry point. Needs Tesseract; pages it can't read come back empty."""
+    texts = {}
+    with open_pdf(source) as doc:
+        for i in page_numbers:
+            try:
+                texts[i] = doc[i].get_text(textpage=doc[i].get_textpage_ocr(full=True))
+            except Exception as e:
+                print(f"OCR failed for page {i}: {e}")
+                texts[i] = ""
+    return texts
+
+def classify_document(page_count, scanned_pages):
+    if scanned_pages and len(scanned_pages) == page_count:
+        return "scanned"
+    if scanned_pages:
+        return "mixed"
+    if page_count >= PARALLEL_MIN_PAGES:
+        return "large"
+    return "text"
+
+def extract_document(source, max_pages=None, backend=None):
+    """
+    Shared extraction engine for UI uploads and inbound email.
+    `source` is PDF bytes or a file path (preferred: workers map the file instead of receiving a copy).
+    Returns {"text", "doc_type", "backend", "page_count", "scanned_pages"}.
+    """
+    max_pages = max_pages or MAX_PAGES
+    with open_pdf(source) as doc:
+        page_count = min(len(doc), max_pages)
+        scanned_pages = find_scanned_pages(doc, page_count)
+
+    # 1. Hand scanned pages to the OCR pool first so they run alongside text extraction
+    ocr_future = None
+    if scanned_pages and ocr_available():
+        ocr_future = _get_executor("ocr", OCR_PROCESSES).submit(_ocr_pages, source, scanned_pages)
+
+    # 2. Text layer with the fastest backend for this document type
+    doc_type = classify_document(page_count, scanned_pages)
+    backend = backend or get_backend_preferences().get(doc_type, DEFAULT_BACKEND)
+    if backend not in BACKENDS:
+        backend = DEFAULT_BACKEND
+    pages = BACKENDS[backend](source, page_count) if doc_type != "scanned" else [""] * page_count
+
+    # 3. Merge OCR output back in page order
+    if ocr_future:
+        try:
+            for i, text in ocr_future.result(timeout=OCR_TIMEOUT_SECONDS).items():
+                pages[i] = text
+        except Exception as e:
+            print(f"OCR pool did not return in time, continuing without scanned pages: {e}")
+
+    return {
+        "text": "".join(t if t.endswith("\n") else t + "\n" for t in pages if t),
+        "doc_type": doc_type,
+        "backend": backend,
+        "page_count": page_count,
+        "scanned_pages": scanned_pages
+    }
+
+def extract_text_from_pdf(source, max_pages=None):
     """
-    Extracts text from a PDF file stream (bytes) using PyMuPDF.
+    Extracts text from PDF bytes or a stored file path using the shared extraction engine.
     """
     try:
-        doc = fitz.open(stream=pdf_bytes, filetype="pdf")
-        text = ""
-        for page in doc:
-            text += page.get_text()
-        return text
+        return extract_document(source, max_pages=max_pages)["text"]
     except Exception as e:
         print(f"Error extracting text: {e}")
         return None
@@ -0,0 +1,83 @@
+import base64
+import json
+import os
+from datetime import datetime
+from sqlalchemy import and_, or_
+
+DEFAULT_PAGE_SIZE = int(os.getenv("DEFAULT_PAGE_SIZE", 100))
+MAX_PAGE_SIZE = int(os.getenv("MAX_PAGE_SIZE", 500))
+
+class InvalidPageRequest(ValueError):
+    """Malformed cursor or page size; list endpoints answer 400."""
+
+def page_size(value, default=DEFAULT_PAGE_SIZE, maximum=MAX_PAGE_SIZE):
+    """?limit= clamped to 1..maximum."""
+    if value in (None, ""):
+        return default
+    try:
+        return max(1, min(int(value), maximum))
+    except (TypeError, ValueError):
+        raise InvalidPageRequest(f"limit must be an integer, got {value!r}")
+
+def encode_cursor(values):
+    """Opaque token for the sort key of the last row on a page."""
+    payload = json.dumps([v.isoformat() if isinstance(v, datetime) else v for v in values], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+def decode_cursor(token, order):
+    try:
+        values = json.loads(base64.urlsafe_b64decode(token + "=" * (-len(token) % 4)))
+        if not isinstance(values, list) or len(values) != len(order):
+            raise ValueError("wrong number of values")
+        return [datetime.fromisoformat(v) if _is_datetime(column) and v is not None else v
+                for (column, _), v in zip(order, values)]
+    except ValueError as e:
+        raise InvalidPageRequest(f"Invalid cursor: {e}")
+
+def _is_datetime(column):
+    try:
+        return column.type.python_type is datetime
+    except NotImplementedError:
+        return False
+
+def _after(order, values):
+    # Rows strictly past `values` in (c1, c2, ...) order: c1 past, or c1 equal and c2 past, ...
+    clauses = []
+    for i, (column, descending) in enumerate(order):
+        past = column < values[i] if descending else column > values[i]
+        clauses.append(and_(*[c == v for (c, _), v in zip(order[:i], values[:i])], past))
+    # The leading bound repeated on its own lets SQLite seek the index instead of scanning it
+    first, descending = order[0]
+    return and_(first <= values[0] if descending else first >= values[0], or_(*clauses))
+
+def _order_by(order):
+    return [column.desc() if descending else column.asc() for column, descending in order]
+
+def keyset_query(query, order, cursor=None, limit=DEFAULT_PAGE_SIZE):
+    """`query` filtered past `cursor`, ordered by `order` and limited to limit + 1 rows (the extra row means "more")."""
+    if cursor:
+        query = query.filter(_after(order, decode_cursor(cursor, order)))
+    return query.order_by(*_order_by(order)).limit(limit + 1)
+
+def keyset_page(query, order, cursor=None, limit=DEFAULT_PAGE_SIZE, key=None):
+    """
+    One page of `query` in `order` ([(column, descending), ...], ending with a unique column such as
+    the primary key) starting after `cursor`. `key(row)` returns a row's values for those columns
+    (default: attribute lookup by column name). Returns (rows, next_cursor or None on the last page).
+    """
+    rows = keyset_query(query, order, cursor, limit).all()
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    key = key or (lambda row: [getattr(row, column.key) for column, _ in order])
+    return rows, encode_cursor(key(rows[-1]))
+
+def paginate(query, order, args, default_limit=None, key=None):
+    """
+    keyset_page driven by ?limit= and ?cursor= in `args` (request.args). Endpoints without a
+    default_limit return every row, still in `order`, unless the client asks for a page.
+    Raises InvalidPageRequest for a malformed limit or cursor.
+    """
+    if default_limit is None and "limit" not in args and "cursor" not in args:
+        return query.order_by(*_order_by(order)).all(), None
+    return keyset_page(query, order, args.get("cursor"), page_size(args.get("limit"), default_limit or DEFAULT_PAGE_SIZE), key)
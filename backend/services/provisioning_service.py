@@ -0,0 +1,193 @@
+import os
+import threading
+from datetime import datetime, timedelta
+from sqlalchemy import insert, select
+from sqlalchemy.exc import IntegrityError, OperationalError
+from models import db, Carrier, Quote, Invoice, Tender, OrganizationProvision
+
+DEMO_ORG_ID = "org_demo_123"
+# A SEEDING flag older than this belongs to a process that died mid-clone and may be taken over
+STALE_SEEDING_SECONDS = float(os.getenv("PROVISIONING_STALE_SECONDS", 300))
+
+# Orgs known to be provisioned in this process; after the first request the per-request check is a set lookup
+_provisioned = {DEMO_ORG_ID}
+_lock = threading.Lock()
+_org_locks = {}
+_stats = {"flag_lookups": 0, "seeded": 0, "seed_failures": 0}
+
+def _bump(key):
+    with _lock:
+        _stats[key] += 1
+
+def _org_lock(organization_id):
+    with _lock:
+        lock = _org_locks.get(organization_id)
+        if lock is None:
+            lock = _org_locks[organization_id] = threading.Lock()
+        return lock
+
+# Columns copied verbatim from the demo rows; ids, organization_id and remapped foreign keys are set per clone
+CARRIER_COLUMNS = ("name", "reliability_score", "contact_info", "is_verified", "tax_id", "compliance_score", "onboarding_status")
+QUOTE_COLUMNS = ("filename", "carrier_id", "origin", "destination", "currency", "total_price", "normalized_total_price_usd",
+                 "surcharges", "risk_flags", "full_text_content", "po_number", "status", "allocation_date",
+                 "time_to_value_seconds", "booking_ref", "agent_insights", "agent_timings", "is_audited", "audited_by",
+                 "carbon_footprint_kg", "transit_time_days", "confidence_score", "estimated_duties", "estimated_taxes", "pdf_path")
+INVOICE_COLUMNS = ("filename", "invoice_date", "invoice_number", "quote_id", "total_amount", "normalized_total_amount_usd",
+                   "currency", "status", "discrepancy_details")
+TENDER_COLUMNS = ("title", "description", "created_at", "deadline", "status", "estimated_volume", "lane_info")
+
+def _demo_rows(model, columns):
+    """The demo org's rows as dicts of `columns` plus "id", in id order."""
+    result = db.session.execute(
+        select(model.id, *[getattr(model, c) for c in columns])
+        .where(model.organization_id == DEMO_ORG_ID).order_by(model.id)
+    )
+    return [row._asdict() for row in result]
+
+def _clone(model, rows, org_id):
+    """Bulk-inserts copies of `rows` into `org_id`: one executemany, no per-row flush."""
+    for row in rows:
+        row["organization_id"] = org_id
+    if rows:
+        db.session.execute(insert(model), rows)
+
+def seed_organization_data(org_id):
+    """
+    Clones demo data to a new organization context to prevent empty states, in one transaction.
+    Returns False if the clone failed.
+    """
+    if not org_id or org_id == DEMO_ORG_ID:
+        return True
+    
+    # Orgs seeded before provisioning flags existed already have carriers
+    if Carrier.query.filter_by(organization_id=org_id).first():
+        return True
+        
+    print(f"Seeding demo data for new organization: {org_id}")
+    
+    try:
+        # 1. Read everything first so the write lock is only held for the inserts
+        carriers = _demo_rows(Carrier, CARRIER_COLUMNS)
+        quotes = _demo_rows(Quote, QUOTE_COLUMNS)
+        invoices = _demo_rows(Invoice, INVOICE_COLUMNS)
+        tenders = _demo_rows(Tender, TENDER_COLUMNS)
+
+        # 2. Clone Carriers (appending org_id to name to keep demo and tenant names apart), then map
+        # demo ids to new ids through the (name, organization_id) unique key
+        safe_names = {}
+        for c in carriers:
+            c["name"] = safe_names[c.pop("id")] = f"{c['name']} ({org_id[-6:]})"
+        _clone(Carrier, carriers, org_id)
+        new_ids = dict(db.session.execute(
+            select(Carrier.name, Carrier.id).where(Carrier.organization_id == org_id)
+        ).all())
+        carrier_map = {old_id: new_ids[name] for old_id, name in safe_names.items()}
+
+        # 3. Clone Quotes, taking their database-assigned ids back in insert order to remap invoices
+        for q in quotes:
+            q["organization_id"] = org_id
+            q["carrier_id"] = carrier_map.get(q["carrier_id"])
+        old_ids = [q.pop("id") for q in quotes]
+        new_quote_ids = db.session.scalars(
+            insert(Quote).returning(Quote.id, sort_by_parameter_order=True), quotes
+        ).all() if quotes else []
+        quote_map = dict(zip(old_ids, new_quote_ids))
+
+        # 4. Clone Invoices, pointing them at the cloned quotes
+        for i in invoices:
+            del i["id"]
+            i["quote_id"] = quote_map.get(i["quote_id"])
+        _clone(Invoice, invoices, org_id)
+
+        # 5. Clone Tenders
+        for t in tenders:
+            del t["id"]
+        _clone(Tender, tenders, org_id)
+
+        db.session.commit()
+        return True
+    except Exception as e:
+        db.session.rollback()
+        print(f"Error seeding data for {org_id}: {e}")
+        return False
+
+def _claim(organization_id):
+    # 1. Insert the SEEDING flag; the primary key makes only one process win
+    row = db.session.get(OrganizationProvision, organization_id)
+    if row is None:
+        try:
+            db.session.add(OrganizationProvision(organization_id=organization_id))
+            db.session.commit()
+            return True
+        except IntegrityError:
+            db.session.rollback()
+            return False
+    # 2. Take over a clone that has been SEEDING for too long
+    cutoff = datetime.utcnow() - timedelta(seconds=STALE_SEEDING_SECONDS)
+    taken = OrganizationProvision.query.filter(
+        OrganizationProvision.organization_id == organization_id,
+        OrganizationProvision.status == "SEEDING",
+        OrganizationProvision.started_at < cutoff
+    ).update({"started_at": datetime.utcnow()}, synchronize_session=False)
+    db.session.commit()
+    return bool(taken)
+
+def provision_organization(organization_id):
+    """
+    Idempotent provisioning step: clones the demo data once and marks the org READY.
+    Returns "ready" (already provisioned), "seeded", "in_progress" (another worker is cloning) or "failed".
+    """
+    if organization_id in _provisioned:
+        return "ready"
+    _bump("flag_lookups")
+    row = db.session.get(OrganizationProvision, organization_id)
+    if row is not None and row.status == "READY":
+        _provisioned.add(organization_id)
+        return "ready"
+    if not _claim(organization_id):
+        return "in_progress"
+
+    if not seed_organization_data(organization_id):
+        # Drop the claim so the next request retries
+        OrganizationProvision.query.filter_by(organization_id=organization_id).delete()
+        db.session.commit()
+        _bump("seed_failures")
+        return "failed"
+    OrganizationProvision.query.filter_by(organization_id=organization_id)\
+        .update({"status": "READY", "provisioned_at": datetime.utcnow()})
+    db.session.commit()
+    _provisioned.add(organization_id)
+    _bump("seeded")
+    return "seeded"
+
+def ensure_provisioned(organization_id):
+    """
+    Per-request check. Free (a set lookup) once this process has seen the org provisioned.
+    Never raises on a database error: a locked database or a race with another first request
+    leaves the org to be provisioned by a later request instead of failing this one.
+    """
+    if organization_id in _provisioned:
+        return "ready"
+    with _org_lock(organization_id):
+        try:
+            return provision_organization(organization_id)
+        except (IntegrityError, OperationalError) as e:
+            db.session.rollback()
+            _bump("seed_failures")
+            print(f"Provisioning {organization_id} deferred: {e}")
+        # The other writer may have finished the clone; re-read its flag
+        try:
+            row = db.session.get(OrganizationProvision, organization_id)
+        except OperationalError:
+            db.session.rollback()
+            return "failed"
+        if row is None:
+            return "failed"
+        if row.status == "READY":
+            _provisioned.add(organization_id)
+            return "ready"
+        return "in_progress"
+
+def get_provisioning_stats():
+    with _lock:
+        return {**_stats, "provisioned_in_process": len(_provisioned)}
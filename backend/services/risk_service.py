@@ -1,3 +1,6 @@
+import os
+import threading
+
 def analyze_risk(quote_data):
     """
     Analyzes quote data for potential risks.
@@ -40,3 +43,120 @@ def analyze_risk(quote_data):
         flags.append("Unknown Carrier Entity")
 
     return list(set(flags)) # Deduplicate
+
+# --- Tiered risk cascade: rules -> lane/carrier history -> LLM only above the threshold ---
+
+RISK_LLM_THRESHOLD = float(os.getenv("RISK_LLM_THRESHOLD", 0.35))
+RISK_HISTORY_LIMIT = int(os.getenv("RISK_HISTORY_LIMIT", 50))
+# Used for "latency saved" until this process has timed a real escalation
+DEFAULT_LLM_RISK_MS = float(os.getenv("RISK_LLM_ESTIMATED_MS", 2500))
+
+# Weight per deterministic finding; anything not listed counts 0.1
+RULE_WEIGHTS = {
+    "High Volatility Surcharge": 0.2,
+    "Missing Validity Date": 0.05, # Rarely present in quote PDFs, so a weak signal on its own
+    "Missing Currency": 0.3,
+    "Unknown Carrier Entity": 0.4
+}
+
+_cascade_lock = threading.Lock()
+_cascade_stats = {}
+
+def score_rules(quote_data):
+    """Tier 1: weighted analyze_risk flags plus unmapped surcharges and missing lane data."""
+    flags = analyze_risk(quote_data)
+    score = sum(RULE_WEIGHTS.get(flag.split(":")[0].split(" (")[0], 0.1) for flag in flags)
+
+    unmapped = [s for s in quote_data.get('surcharges') or [] if s.get('flagged')]
+    if unmapped:
+        score += min(0.1 * len(unmapped), 0.3)
+        flags.append(f"{len(unmapped)} unmapped surcharge(s)")
+    if not quote_data.get('origin') or not quote_data.get('destination'):
+        score += 0.3
+        flags.append("Incomplete lane")
+    return score, flags
+
+def score_history(quote_data, organization_id):
+    """
+    Tier 2: how this lane and carrier have behaved before for the org.
+    Past risk findings on the lane, price outliers, a lane never seen before and low carrier reliability add to the score.
+    """
+    from sqlalchemy import select
+    from models import db, Quote, Carrier
+
+    score, notes = 0.0, []
+    origin, destination = quote_data.get('origin'), quote_data.get('destination')
+    if origin and destination:
+        # Only the two columns scored below; full rows would drag in quote text and surcharges
+        history = db.session.execute(
+            select(Quote.normalized_total_price_usd, Quote.agent_insights)
+            .where(Quote.organization_id == organization_id, Quote.origin == origin, Quote.destination == destination)
+            .order_by(Quote.upload_date.desc()).limit(RISK_HISTORY_LIMIT)
+        ).all()
+
+        if not history:
+            score += 0.15
+            notes.append("First quote on this lane")
+        else:
+            risky = sum(
+                1 for q in history
+                if any(i.get("agent") == "Risk Specialist" and i.get("status") not in (None, "OK") for i in q.agent_insights or [])
+            )
+            if risky:
+                score += 0.4 * risky / len(history)
+                notes.append(f"{risky}/{len(history)} past quotes on this lane were risk-flagged")
+
+            prices = [q.normalized_total_price_usd for q in history if q.normalized_total_price_usd]
+            price = quote_data.get('normalized_total_price_usd')
+            if prices and price:
+                mean = sum(prices) / len(prices)
+                if mean and abs(price - mean) / mean > 0.3:
+                    score += 0.2
+                    notes.append(f"Price {price:.0f} USD is {abs(price - mean) / mean:.0%} off the lane average")
+
+    carrier = Carrier.query.filter_by(name=quote_data.get('carrier'), organization_id=organization_id).first()
+    if carrier and carrier.reliability_score is not None and carrier.reliability_score < 80:
+        score += 0.2
+        notes.append(f"Carrier reliability {carrier.reliability_score:.0f}%")
+    return score, notes
+
+def assess_risk(quote_data, organization_id=None):
+    """
+    Runs the cheap tiers. Returns {"score", "flags", "escalate"}; escalate means the
+    combined score reached RISK_LLM_THRESHOLD and the LLM risk agent should run.
+    """
+    score, flags = score_rules(quote_data)
+    # History only matters if the rules alone don't already decide it
+    if score < RISK_LLM_THRESHOLD:
+        history_score, notes = score_history(quote_data, organization_id or "org_demo_123")
+        score += history_score
+        flags += notes
+    return {"score": round(score, 3), "flags": flags, "escalate": score >= RISK_LLM_THRESHOLD}
+
+def record_cascade(organization_id, escalated, llm_ms=None):
+    with _cascade_lock:
+        stats = _cascade_stats.setdefault(organization_id or "org_demo_123", {"assessed": 0, "escalated": 0, "llm_ms": 0.0})
+        stats["assessed"] += 1
+        if escalated:
+            stats["escalated"] += 1
+            stats["llm_ms"] += llm_ms or 0.0
+
+def get_cascade_stats(organization_id=None):
+    """Escalation rate and estimated LLM latency saved, per org (or all orgs)."""
+    with _cascade_lock:
+        escalated_total = sum(s["escalated"] for s in _cascade_stats.values())
+        llm_total = sum(s["llm_ms"] for s in _cascade_stats.values())
+        avg_llm_ms = llm_total / escalated_total if escalated_total else DEFAULT_LLM_RISK_MS
+        orgs = {}
+        for org, s in _cascade_stats.items():
+            if organization_id and org != organization_id:
+                continue
+            skipped = s["assessed"] - s["escalated"]
+            orgs[org] = {
+                "assessed": s["assessed"],
+                "escalated": s["escalated"],
+                "escalation_rate": round(s["escalated"] / s["assessed"], 3) if s["assessed"] else 0.0,
+                "llm_calls_skipped": skipped,
+                "latency_saved_ms": round(skipped * avg_llm_ms, 1)
+            }
+        return {"threshold": RISK_LLM_THRESHOLD, "avg_llm_ms": round(avg_llm_ms, 1), "organizations": orgs}
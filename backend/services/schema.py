@@ -0,0 +1,44 @@
+import os
+from alembic.migration import MigrationContext
+from alembic.script import ScriptDirectory
+from flask_migrate import upgrade
+from sqlalchemy import inspect
+from models import db
+
+# Alembic environment managed by Flask-Migrate (`flask db migrate` / `flask db upgrade`)
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'migrations')
+# The schema the old db.create_all() start-up produced; databases from that era are stamped with it once
+BASELINE_REVISION = '0001_baseline'
+STAMP_HINT = f"run `flask db stamp {BASELINE_REVISION}` once, then `flask db upgrade`"
+
+def pending_revisions(app):
+    """Migration heads the database has not been upgraded to yet (empty when the schema is current)."""
+    heads = set(ScriptDirectory(MIGRATIONS_DIR).get_heads())
+    with app.app_context():
+        with db.engine.connect() as conn:
+            current = set(MigrationContext.configure(conn).get_current_heads())
+    return sorted(heads - current)
+
+def is_unversioned(app):
+    """True for a database created by db.create_all(): it has tables but no alembic_version row."""
+    with app.app_context():
+        with db.engine.connect() as conn:
+            if MigrationContext.configure(conn).get_current_heads():
+                return False
+            return inspect(conn).has_table('quote')
+
+def schema_is_current(app):
+    pending = pending_revisions(app)
+    if pending and is_unversioned(app):
+        print(f"Database was created by db.create_all() and has no migration history; {STAMP_HINT}")
+    elif pending:
+        print(f"Database schema is behind migrations {pending}; run `flask db upgrade`")
+    return not pending
+
+def upgrade_schema(app):
+    """Applies every pending migration. Same as `flask db upgrade`, for local runs and scripts."""
+    if is_unversioned(app):
+        # The baseline revision would try to create tables that already exist
+        raise RuntimeError(f"Database was created by db.create_all() and has no migration history; {STAMP_HINT}")
+    with app.app_context():
+        upgrade(directory=MIGRATIONS_DIR)
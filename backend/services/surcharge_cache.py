@@ -0,0 +1,115 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from services.surcharge_normalizer import SurchargeIndex
+
+# Baseline aliases every org starts with; org-specific SurchargeReference rows override them
+DICTIONARY_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'data', 'surcharge_dictionary.json')
+# Invalidation is per process; the TTL bounds how stale another worker's copy can get
+TTL_SECONDS = float(os.getenv("SURCHARGE_CACHE_TTL_SECONDS", 300))
+GLOBAL_SCOPE = "__all__"
+
+# Used only if the JSON dictionary is missing
+DEFAULT_DICTIONARY = {
+    "BAF": {"normalized": "Bunker Adjustment Factor", "category": "Fuel"},
+    "PSS": {"normalized": "Peak Season Surcharge", "category": "Seasonal"},
+    "LSS": {"normalized": "Low Sulphur Surcharge", "category": "Fuel"},
+    "THC": {"normalized": "Terminal Handling Charge", "category": "Handling"},
+    "DOC": {"normalized": "Documentation Fee", "category": "Admin"}
+}
+
+_lock = threading.Lock()
+_baseline = None
+_versions = {}
+_entries = {}
+_stats = {"hits": 0, "rebuilds": 0, "invalidations": 0}
+
+def load_baseline(path=None):
+    """Reads data/surcharge_dictionary.json into the {alias: {normalized, category}} shape used in prompts."""
+    global _baseline
+    try:
+        with open(path or DICTIONARY_PATH) as f:
+            raw = json.load(f)
+        baseline = {alias: {"normalized": e.get("standard_name"), "category": e.get("category")} for alias, e in raw.items()}
+    except (OSError, ValueError, AttributeError) as e:
+        print(f"Surcharge dictionary not loaded, using defaults: {e}")
+        baseline = dict(DEFAULT_DICTIONARY)
+    with _lock:
+        _baseline = baseline
+    return baseline
+
+def _build_entry(organization_id, version):
+    from models import SurchargeReference
+
+    with _lock:
+        baseline = _baseline
+    if baseline is None:
+        baseline = load_baseline()
+
+    query = SurchargeReference.query
+    if organization_id != GLOBAL_SCOPE:
+        query = query.filter_by(organization_id=organization_id)
+    dictionary = dict(baseline)
+    for s in query.all():
+        dictionary[s.raw_name] = {"normalized": s.normalized_name, "category": s.category}
+
+    return {
+        "version": version,
+        "built_at": time.time(),
+        "dictionary": dictionary,
+        "index": SurchargeIndex(dictionary),
+        # Serialized once per version instead of on every extraction
+        "prompt_fragment": json.dumps(dictionary, indent=2),
+        # Changes whenever the dictionary's content does, in every process (unlike version)
+        "fingerprint": hashlib.sha256(json.dumps(dictionary, sort_keys=True).encode()).hexdigest()
+    }
+
+def get_surcharge_entry(organization_id=None):
+    """
+    Cached surcharge dictionary for an org: {"version", "dictionary", "index", "prompt_fragment", "fingerprint"}.
+    organization_id=None reads every org's rows. Treat the result as read-only.
+    """
+    scope = organization_id or GLOBAL_SCOPE
+    with _lock:
+        version = _versions.get(scope, 0)
+        entry = _entries.get(scope)
+        if entry and entry["version"] == version and time.time() - entry["built_at"] < TTL_SECONDS:
+            _stats["hits"] += 1
+            return entry
+
+    entry = _build_entry(scope, version)
+    with _lock:
+        # Only publish if nobody invalidated while we were reading the DB
+        if _versions.get(scope, 0) == version:
+            _entries[scope] = entry
+        _stats["rebuilds"] += 1
+    return entry
+
+def get_surcharge_dictionary(organization_id=None):
+    return get_surcharge_entry(organization_id)["dictionary"]
+
+def invalidate_surcharge_cache(organization_id=None):
+    """Write-through hook for surcharge edits: bumps the org's version (and the all-orgs view)."""
+    with _lock:
+        for scope in {organization_id or GLOBAL_SCOPE, GLOBAL_SCOPE}:
+            _versions[scope] = _versions.get(scope, 0) + 1
+            _entries.pop(scope, None)
+        _stats["invalidations"] += 1
+
+def preload_surcharge_cache(app, organization_ids=("org_demo_123",)):
+    """Startup warm-up: parse the JSON dictionary and build the entries for the given orgs."""
+    load_baseline()
+    with app.app_context():
+        for organization_id in organization_ids:
+            get_surcharge_entry(organization_id)
+
+def get_surcharge_cache_stats():
+    with _lock:
+        return {
+            **_stats,
+            "ttl_seconds": TTL_SECONDS,
+            "baseline_aliases": len(_baseline or {}),
+            "orgs": {scope: {"version": e["version"], "aliases": len(e["dictionary"])} for scope, e in _entries.items()}
+        }
@@ -0,0 +1,118 @@
+import os
+import re
+from collections import Counter
+
+# Minimum trigram similarity (Dice coefficient) for a fuzzy alias match
+FUZZY_THRESHOLD = float(os.getenv("SURCHARGE_FUZZY_THRESHOLD", 0.75))
+# Codes this short (BAF/CAF, THC/DTHC) are only matched exactly, never fuzzily
+MIN_FUZZY_LENGTH = 5
+# Aliases re-scored exactly per fuzzy lookup
+CANDIDATES = 25
+
+_NON_ALNUM = re.compile(r"[^A-Z0-9]+")
+
+def normalize_key(name):
+    return _NON_ALNUM.sub(" ", (name or "").upper()).strip()
+
+def _trigrams(key):
+    padded = f"  {key} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+class SurchargeIndex:
+    """
+    Alias index over a surcharge dictionary ({alias: {"normalized", "category"}}).
+    Lookup order: exact alias, then the longest alias found as a word sequence inside the
+    raw name (word trie, e.g. "THC Origin" -> THC), then trigram similarity for typos and
+    spelled-out variants. Standard names are indexed as aliases of themselves.
+    """
+    def __init__(self, dictionary):
+        self.entries = []
+        self.gram_sets = []
+        self.exact = {}
+        self.trie = {}
+        self.trigrams = {}
+
+        # Real aliases first so they win over a standard name with the same spelling
+        for alias, entry in dictionary.items():
+            self._add(alias, entry)
+        for entry in dictionary.values():
+            if entry.get("normalized"):
+                self._add(entry["normalized"], entry)
+
+    def _add(self, alias, entry):
+        key = normalize_key(alias)
+        if not key or key in self.exact:
+            return
+        entry_id = len(self.entries)
+        self.entries.append((key, entry))
+        self.gram_sets.append(frozenset(_trigrams(key)))
+        self.exact[key] = entry_id
+
+        node = self.trie
+        for word in key.split():
+            node = node.setdefault(word, {})
+        node[None] = entry_id
+
+        if len(key) >= MIN_FUZZY_LENGTH:
+            for gram in self.gram_sets[entry_id]:
+                self.trigrams.setdefault(gram, []).append(entry_id)
+
+    def _trie_match(self, words):
+        best = None
+        for start in range(len(words)):
+            node, length = self.trie, 0
+            for word in words[start:]:
+                node = node.get(word)
+                if node is None:
+                    break
+                length += 1
+                if None in node and (best is None or length > best[0]):
+                    best = (length, node[None])
+        return best[1] if best else None
+
+    def _fuzzy_match(self, key):
+        grams = _trigrams(key)
+        # 1. Candidates from the rarest trigrams; very common ones ("SUR", "FEE") only add noise
+        postings = sorted((self.trigrams[g] for g in grams if g in self.trigrams), key=len)
+        counts = Counter()
+        for posting in postings[:max(len(postings) // 2, 3)]:
+            counts.update(posting)
+
+        # 2. Exact Dice similarity on the best candidates
+        best_id, best_score = None, 0.0
+        for entry_id, _ in counts.most_common(CANDIDATES):
+            score = 2 * len(grams & self.gram_sets[entry_id]) / (len(grams) + len(self.gram_sets[entry_id]))
+            if score > best_score:
+                best_id, best_score = entry_id, score
+        return (best_id, best_score) if best_score >= FUZZY_THRESHOLD else (None, best_score)
+
+    def match(self, raw_name):
+        """Returns (entry, how) where how is exact/contains/fuzzy, or (None, None)."""
+        key = normalize_key(raw_name)
+        if not key:
+            return None, None
+        if key in self.exact:
+            return self.entries[self.exact[key]][1], "exact"
+        entry_id = self._trie_match(key.split())
+        if entry_id is not None:
+            return self.entries[entry_id][1], "contains"
+        if len(key) >= MIN_FUZZY_LENGTH:
+            entry_id, _ = self._fuzzy_match(key)
+            if entry_id is not None:
+                return self.entries[entry_id][1], "fuzzy"
+        return None, None
+
+    def __len__(self):
+        return len(self.entries)
+
+def normalize_surcharges(surcharges, index):
+    """
+    Fills normalized_name, category and flagged on extracted surcharge lines in place.
+    Lines with no alias match are flagged for manual mapping.
+    """
+    for s in surcharges or []:
+        entry, _ = index.match(s.get("raw_name"))
+        s["normalized_name"] = entry.get("normalized") if entry else None
+        s["category"] = entry.get("category") if entry else None
+        s["flagged"] = entry is None
+    return surcharges
@@ -0,0 +1,194 @@
+import json
+import os
+import re
+import threading
+import time
+from services.llm_service import normalize_total_price
+from services.surcharge_cache import get_surcharge_entry
+from services.surcharge_normalizer import normalize_surcharges
+
+# Layout templates for high-volume carriers: anchors fingerprint the layout, regexes pull the fields
+TEMPLATES_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'data', 'carrier_templates.json')
+FAST_PATH_ENABLED = os.getenv("TEMPLATE_FAST_PATH", "1") == "1"
+# Below this the parsed result is discarded and the quote goes to the LLM
+MIN_CONFIDENCE = float(os.getenv("TEMPLATE_MIN_CONFIDENCE", 0.9))
+# Allowed gap between base freight + surcharges and the stated total (fraction of total)
+TOTAL_TOLERANCE = 0.01
+REQUIRED_FIELDS = ("origin", "destination", "total_price", "currency")
+
+_templates = None
+_templates_lock = threading.Lock()
+
+_stats_lock = threading.Lock()
+_stats = {
+    "template": {"count": 0, "total_ms": 0.0, "max_ms": 0.0},
+    "llm": {"count": 0, "total_ms": 0.0, "max_ms": 0.0},
+    "by_template": {},
+    "low_confidence": 0,
+    "llm_unavailable_fallbacks": 0
+}
+
+def _compile(template):
+    return {
+        "id": template["id"],
+        "carrier": template["carrier"],
+        "anchors": [(a["text"], a.get("max_line")) for a in template["anchors"]],
+        "fields": {name: re.compile(pattern, re.MULTILINE) for name, pattern in template["fields"].items()},
+        "surcharges": {
+            "start": re.compile(template["surcharges"]["start"]),
+            "end": re.compile(template["surcharges"]["end"]),
+            "line": re.compile(template["surcharges"]["line"])
+        } if template.get("surcharges") else None
+    }
+
+def load_templates(path=None):
+    """Compiles the template registry once; pass a path to reload from a different file."""
+    global _templates
+    with _templates_lock:
+        if _templates is None or path:
+            try:
+                with open(path or TEMPLATES_PATH) as f:
+                    _templates = [_compile(t) for t in json.load(f)]
+            except (OSError, ValueError, KeyError, re.error) as e:
+                print(f"Failed to load carrier templates: {e}")
+                _templates = []
+        return _templates
+
+def fingerprint(text, templates=None):
+    """
+    Returns the template whose anchors all appear in the text (and within max_line where given), else None.
+    """
+    lines = text.splitlines()
+    for template in templates if templates is not None else load_templates():
+        matched = True
+        for anchor, max_line in template["anchors"]:
+            haystack = "\n".join(lines[:max_line]) if max_line else text
+            if anchor not in haystack:
+                matched = False
+                break
+        if matched:
+            return template
+    return None
+
+def _to_number(value):
+    return float(value.replace(",", ""))
+
+def _surcharge_lines(template, lines):
+    rules = template["surcharges"]
+    if not rules:
+        return []
+    found, inside = [], False
+    for line in lines:
+        line = line.strip()
+        if not inside:
+            inside = bool(rules["start"].search(line))
+            continue
+        if rules["end"].search(line):
+            break
+        match = rules["line"].match(line)
+        if match:
+            found.append({
+                "raw_name": match.group("raw_name").strip(),
+                "amount": _to_number(match.group("amount")),
+                "currency": match.group("currency")
+            })
+    return found
+
+def parse_with_template(template, text, surcharge_index):
+    """
+    Applies a template's compiled rules. Returns (data, confidence) in the same shape
+    extract_data_with_llm produces, minus the currency normalization.
+    """
+    data = {"carrier": template["carrier"]}
+    for name, pattern in template["fields"].items():
+        match = pattern.search(text)
+        if match:
+            data[name] = match.group(1).strip()
+
+    for name in ("total_price", "base_freight"):
+        if name in data:
+            try:
+                data[name] = _to_number(data[name])
+            except ValueError:
+                del data[name]
+
+    data["surcharges"] = normalize_surcharges(_surcharge_lines(template, text.splitlines()), surcharge_index)
+
+    # 1. Every required field must be present
+    confidence = sum(1 for f in REQUIRED_FIELDS if data.get(f) not in (None, "")) / len(REQUIRED_FIELDS)
+
+    # 2. Base freight + surcharges should reconcile with the stated total
+    if confidence == 1.0 and "base_freight" in data:
+        computed = data["base_freight"] + sum(s["amount"] for s in data["surcharges"] if s["currency"] == data["currency"])
+        if abs(computed - data["total_price"]) > TOTAL_TOLERANCE * max(data["total_price"], 1):
+            confidence = 0.7
+    data.pop("base_freight", None)
+    return data, confidence
+
+def _record(path, elapsed_ms, template_id=None):
+    with _stats_lock:
+        bucket = _stats[path]
+        bucket["count"] += 1
+        bucket["total_ms"] += elapsed_ms
+        bucket["max_ms"] = max(bucket["max_ms"], elapsed_ms)
+        if template_id:
+            _stats["by_template"][template_id] = _stats["by_template"].get(template_id, 0) + 1
+
+def extract_with_fast_path(text, llm_extractor, organization_id=None):
+    """
+    Tries the template registry first and falls back to `llm_extractor(text, organization_id)`
+    when no layout matches or the parse is not confident. If the LLM is unavailable, a
+    low-confidence template parse is returned rather than an error. Tags the result with extraction_path.
+    """
+    start = time.perf_counter()
+    template = fingerprint(text) if FAST_PATH_ENABLED else None
+    template_data = None
+    if template:
+        data, confidence = parse_with_template(template, text, get_surcharge_entry(organization_id)["index"])
+        if confidence >= MIN_CONFIDENCE:
+            normalize_total_price(data)
+            data["extraction_path"] = f"template:{template['id']}"
+            data["extraction_confidence"] = confidence
+            _record("template", (time.perf_counter() - start) * 1000, template["id"])
+            return data
+        print(f"Template {template['id']} matched but confidence {confidence:.2f} < {MIN_CONFIDENCE}, using LLM")
+        with _stats_lock:
+            _stats["low_confidence"] += 1
+        template_data = data
+
+    data = llm_extractor(text, organization_id)
+    if data.get("llm_unavailable") and template_data:
+        normalize_total_price(template_data)
+        template_data["extraction_path"] = f"template_fallback:{template['id']}"
+        template_data["extraction_confidence"] = confidence
+        with _stats_lock:
+            _stats["llm_unavailable_fallbacks"] += 1
+        _record("template", (time.perf_counter() - start) * 1000, template["id"])
+        return template_data
+    if "error" not in data:
+        data["extraction_path"] = "llm"
+    _record("llm", (time.perf_counter() - start) * 1000)
+    return data
+
+def get_fast_path_stats():
+    """Fast-path hit rate and per-path latency since process start."""
+    with _stats_lock:
+        total = _stats["template"]["count"] + _stats["llm"]["count"]
+        paths = {}
+        for path in ("template", "llm"):
+            bucket = _stats[path]
+            paths[path] = {
+                "count": bucket["count"],
+                "avg_ms": round(bucket["total_ms"] / bucket["count"], 2) if bucket["count"] else None,
+                "max_ms": round(bucket["max_ms"], 2)
+            }
+        return {
+            "enabled": FAST_PATH_ENABLED,
+            "templates_loaded": len(load_templates()),
+            "total_extractions": total,
+            "hit_rate": round(_stats["template"]["count"] / total, 3) if total else 0.0,
+            "low_confidence_fallbacks": _stats["low_confidence"],
+            "llm_unavailable_fallbacks": _stats["llm_unavailable_fallbacks"],
+            "paths": paths,
+            "by_template": dict(_stats["by_template"])
+        }
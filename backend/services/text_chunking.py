@@ -0,0 +1,127 @@
+import os
+import re
+import threading
+
+# Token budget for the quote text sent to extraction; longer documents are trimmed to their most relevant sections
+TOKEN_BUDGET = int(os.getenv("LLM_INPUT_TOKEN_BUDGET", 3000))
+CHUNKING_ENABLED = os.getenv("LLM_CHUNKING", "1") == "1"
+# Long blocks without blank lines or headings are cut into sections of at most this many lines
+MAX_SECTION_LINES = 40
+TOKENIZER_MODEL = "gpt-4o"
+
+AMOUNT_PATTERN = re.compile(
+    r"(?:\b[A-Z]{3}\s?|[$€£¥])\s?\d[\d,]*(?:\.\d{1,2})?\b|\b\d[\d,]*\.\d{2}\s?[A-Z]{3}\b"
+)
+LANE_PATTERN = re.compile(
+    r"\b(?:POL|POD|port of (?:loading|discharge)|place of (?:receipt|delivery)|origin|destination|routing|"
+    r"transshipment|start location|end location)\b|^\s*(?:from|to|via)\s*:",
+    re.IGNORECASE | re.MULTILINE
+)
+PRICE_PATTERN = re.compile(
+    r"\b(?:total|all[- ]in|freight|rate|surcharge|charge|fee|tariff|price|amount|per container|"
+    r"20'?(?:GP|DV)|40'?(?:HC|HQ|GP|DV))\b",
+    re.IGNORECASE
+)
+BOILERPLATE_PATTERN = re.compile(
+    r"\b(?:liability|liable|indemnif\w*|hereby|herein|hereunder|arbitration|jurisdiction|governed by|"
+    r"force majeure|warrant\w*|terms and conditions|bill of lading clause|limitation|confidential)\b",
+    re.IGNORECASE
+)
+# All-caps titles, "Label:" lines and page footers; no digits so charge lines never qualify
+HEADING_PATTERN = re.compile(r"^(?:[A-Z][A-Z &/()'-]{2,60}|[A-Za-z][A-Za-z ]{1,60}:|(?i:page) \d+(?: of \d+)?)$")
+
+_encoder = None
+_encoder_failed = False
+_encoder_lock = threading.Lock()
+
+def _get_encoder():
+    global _encoder, _encoder_failed
+    with _encoder_lock:
+        if _encoder is None and not _encoder_failed:
+            try:
+                import tiktoken
+                _encoder = tiktoken.encoding_for_model(TOKENIZER_MODEL)
+            except Exception as e:
+                # tiktoken fetches its BPE file on first use; without it, fall back to an estimate
+                print(f"tiktoken unavailable, estimating tokens from length: {e}")
+                _encoder_failed = True
+        return _encoder
+
+def count_tokens(text):
+    encoder = _get_encoder()
+    if encoder:
+        return len(encoder.encode(text, disallowed_special=()))
+    return len(text) // 4 + 1
+
+def split_sections(text):
+    """
+    Splits quote text into sections at blank lines, page breaks and heading-like lines.
+    Returns a list of strings in document order.
+    """
+    sections, current = [], []
+    for line in text.replace("\f", "\n\n").splitlines():
+        stripped = line.strip()
+        starts_section = not stripped or (HEADING_PATTERN.match(stripped) and len(current) > 2)
+        if (starts_section or len(current) >= MAX_SECTION_LINES) and current:
+            sections.append("\n".join(current))
+            current = []
+        if stripped:
+            current.append(line)
+    if current:
+        sections.append("\n".join(current))
+    return sections
+
+def score_section(section, surcharge_codes=(), tokens=None):
+    """
+    Relevance of a section for pricing/lane extraction: amounts, surcharge codes and lane
+    labels count up, legal boilerplate counts down. Normalized by length so long annexes don't win.
+    """
+    amounts = len(AMOUNT_PATTERN.findall(section))
+    lanes = len(LANE_PATTERN.findall(section))
+    prices = len(PRICE_PATTERN.findall(section))
+    boilerplate = len(BOILERPLATE_PATTERN.findall(section))
+    words = set(re.findall(r"\b[A-Z]{2,6}\b", section))
+    codes = len(words & set(surcharge_codes))
+
+    score = amounts * 3 + codes * 3 + lanes * 2 + prices - boilerplate * 3
+    return score / (max(tokens or count_tokens(section), 1) ** 0.5)
+
+def select_relevant_text(text, budget=None, surcharge_codes=()):
+    """
+    Returns (text, stats). Text within the budget is returned untouched; otherwise the
+    highest-scoring sections are kept, in document order, until the budget is spent.
+    The first section (letterhead: carrier name, reference) is always kept.
+    """
+    budget = budget or TOKEN_BUDGET
+    total_tokens = count_tokens(text)
+    stats = {"original_tokens": total_tokens, "sent_tokens": total_tokens, "sections": None, "kept_sections": None}
+    if not CHUNKING_ENABLED or total_tokens <= budget:
+        return text, stats
+
+    codes = {c.upper() for c in surcharge_codes}
+    sections = split_sections(text)
+    tokens = [count_tokens(s) for s in sections]
+    scores = [score_section(s, codes, t) for s, t in zip(sections, tokens)]
+
+    # 1. Letterhead first, then best score; ties keep the earlier section
+    ranked = sorted(range(1, len(sections)), key=lambda i: (-scores[i], i))
+    keep, used = set(), 0
+    for i in [0] + ranked:
+        if i > 0 and scores[i] <= 0:
+            break
+        # +2 covers the joining blank line and a possible "[...]" gap marker
+        if used + tokens[i] + 2 <= budget:
+            keep.add(i)
+            used += tokens[i] + 2
+
+    # 2. Reassemble in document order, marking gaps so the model knows text was dropped
+    parts, previous = [], -1
+    for i in sorted(keep):
+        if i != previous + 1:
+            parts.append("[...]")
+        parts.append(sections[i])
+        previous = i
+    selected = "\n\n".join(parts)
+
+    stats.update({"sent_tokens": count_tokens(selected), "sections": len(sections), "kept_sections": len(keep)})
+    return selected, stats
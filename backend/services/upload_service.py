@@ -0,0 +1,68 @@
+import binascii
+import hashlib
+import os
+
+CHUNK_SIZE = 1024 * 1024
+MAX_UPLOAD_BYTES = int(float(os.getenv("MAX_UPLOAD_MB", 25)) * 1024 * 1024)
+
+class UploadTooLarge(Exception):
+    """Raised when an upload or attachment exceeds the per-request size limit."""
+    def __init__(self, limit):
+        super().__init__(f"File exceeds the {limit / (1024 * 1024):g} MB upload limit")
+        self.limit = limit
+
+def hash_file(path):
+    """SHA-256 hex digest of a file on disk, read in chunks."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def _write_chunks(chunks, dest_path, max_bytes):
+    digest = hashlib.sha256()
+    size = 0
+    try:
+        with open(dest_path, 'wb') as out:
+            for chunk in chunks:
+                size += len(chunk)
+                if size > max_bytes:
+                    raise UploadTooLarge(max_bytes)
+                digest.update(chunk)
+                out.write(chunk)
+    except Exception:
+        if os.path.exists(dest_path):
+            os.remove(dest_path)
+        raise
+    return digest.hexdigest(), size
+
+def discard_upload(path):
+    """Removes a stored upload that no quote or job will reference. Missing files are ignored."""
+    if path and os.path.exists(path):
+        os.remove(path)
+
+def stream_to_disk(stream, dest_path, max_bytes=MAX_UPLOAD_BYTES):
+    """
+    Copies a file-like upload to disk in fixed-size chunks, hashing as it goes.
+    Returns (sha256_hex, size). Memory use is bounded by CHUNK_SIZE.
+    """
+    return _write_chunks(iter(lambda: stream.read(CHUNK_SIZE), b''), dest_path, max_bytes)
+
+def _decode_base64_chunks(content):
+    carry = ""
+    # Step in multiples of 4 so each slice decodes on its own; whitespace is stripped per slice
+    for start in range(0, len(content), CHUNK_SIZE * 4):
+        piece = carry + "".join(content[start:start + CHUNK_SIZE * 4].split())
+        usable = len(piece) - (len(piece) % 4)
+        carry = piece[usable:]
+        if usable:
+            yield binascii.a2b_base64(piece[:usable])
+    if carry:
+        raise binascii.Error("Incorrect base64 padding")
+
+def stream_base64_to_disk(content, dest_path, max_bytes=MAX_UPLOAD_BYTES):
+    """
+    Decodes a base64 attachment straight to disk without materializing the decoded bytes.
+    Returns (sha256_hex, size).
+    """
+    return _write_chunks(_decode_base64_chunks(content), dest_path, max_bytes)
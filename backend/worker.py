@@ -0,0 +1,31 @@
+"""
+Standalone ingestion worker for async /api/extract jobs.
+
+    python worker.py            # run a worker pool until interrupted
+    python worker.py --drain    # process everything queued, then exit
+"""
+import os
+import sys
+import time
+
+from app import app, start_background_services
+from services.job_queue import recover_stale_jobs, run_pending_jobs
+
+if __name__ == "__main__":
+    if "--drain" in sys.argv:
+        with app.app_context():
+            recover_stale_jobs()
+            jobs = run_pending_jobs()
+            print(f"Processed {len(jobs)} jobs.")
+        sys.exit(0)
+
+    size = int(os.getenv("WORKER_POOL_SIZE", 2))
+    pool = start_background_services(workers=size)
+    if pool is None:
+        print("Worker not started: the schema is behind (run `flask --app app db upgrade`) or WORKER_POOL_SIZE is 0")
+        sys.exit(1)
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        pool.stop()
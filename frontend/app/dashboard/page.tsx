@@ -86,11 +86,31 @@ export default function DashboardPage() {
             }
 
             try {
-                await apiRequest('/api/extract', {
+                const result = await apiRequest('/api/extract', {
                     method: 'POST',
                     body: formData,
                 }, orgId)
 
+                // Scanned documents are queued for OCR (202 + job_id); wait for the job to finish
+                if (result.job_id) {
+                    let job = result
+                    const giveUpAt = Date.now() + 5 * 60 * 1000
+                    while (job.status !== 'COMPLETED' && job.status !== 'FAILED' && Date.now() < giveUpAt) {
+                        await new Promise(resolve => setTimeout(resolve, 2000))
+                        job = await apiRequest(result.poll_url, {}, orgId)
+                    }
+                    if (job.status === 'FAILED') {
+                        throw new Error(job.error || 'Extraction job failed')
+                    }
+                    if (job.status !== 'COMPLETED') {
+                        toast.info(`Still processing: ${file.name}`, {
+                            id: toastId,
+                            description: "The quote will appear in the matrix once the job finishes."
+                        })
+                        continue
+                    }
+                }
+
                 toast.success(`Success: ${file.name}`, {
                     id: toastId,
                     description: "Extraction complete. Quote matrix updated."